@@ -6,6 +6,7 @@ app_name = "accounts_api"
 
 urlpatterns = [
     path("csrf/", views.api_csrf, name="csrf"),
+    path("bootstrap/", views.api_bootstrap, name="bootstrap"),
     path("register/", views.api_register, name="register"),
     path("login/", views.api_login, name="login"),
     path("logout/", views.api_logout, name="logout"),
@@ -0,0 +1,61 @@
+import time
+
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# Signed into every access token so reads can skip the user lookup.
+CLAIM_FIELDS = ("username", "is_active")
+
+
+def issue_access_token(user):
+    refresh = RefreshToken.for_user(user)
+    for field in CLAIM_FIELDS:
+        refresh[field] = getattr(user, field)
+    return str(refresh.access_token)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWT authentication that trusts the token's claims on safe requests.
+
+    GET/HEAD/OPTIONS requests get a User built from the claims without a
+    query; every other field is deferred and loaded on first access. Writes,
+    tokens without the claims and tokens older than JWT_CLAIMS_TTL_SECONDS
+    load the user from the database as usual.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+
+        if request.method in SAFE_METHODS:
+            user = self.get_claims_user(validated_token)
+            if user is not None:
+                return user, validated_token
+        return self.get_user(validated_token), validated_token
+
+    def get_claims_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+            issued_at = validated_token["iat"]
+            claims = [validated_token[field] for field in CLAIM_FIELDS]
+        except KeyError:
+            return None
+        if time.time() - issued_at > settings.JWT_CLAIMS_TTL_SECONDS:
+            return None
+
+        user_id = self.user_model._meta.pk.to_python(user_id)
+        user = self.user_model.from_db(
+            None, [api_settings.USER_ID_FIELD, *CLAIM_FIELDS], [user_id, *claims]
+        )
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return user
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 11:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_alter_userprofile_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='photo_file_id',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+    ]
@@ -7,6 +7,7 @@ class UserProfile(models.Model):
     display_name = models.CharField(max_length=120, blank=True)
     channel_description = models.TextField(blank=True)
     photo_url = models.URLField(max_length=500, blank=True)
+    photo_file_id = models.CharField(max_length=200, blank=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
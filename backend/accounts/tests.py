@@ -1,3 +1,95 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.authentication import issue_access_token
+from accounts.models import UserProfile
+from videos.models import ChannelSubscription, Video, WatchHistory, WatchLater
+
+
+class ClaimsJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="viewer", email="viewer@example.com")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {issue_access_token(self.user)}")
+
+    def user_queries(self, method, path):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(path)
+        table = User._meta.db_table
+        return response, [q for q in queries.captured_queries if f'FROM "{table}"' in q["sql"]]
+
+    def test_safe_requests_skip_user_query(self):
+        response, queries = self.user_queries("get", "/api/videos/trending/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, [])
+
+    def test_deferred_fields_load_on_access(self):
+        response, queries = self.user_queries("get", "/api/auth/me/")
+        self.assertEqual(response.json()["user"]["email"], "viewer@example.com")
+        self.assertEqual(len(queries), 1)
+
+    def test_writes_load_user(self):
+        response, queries = self.user_queries("post", "/api/auth/logout/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+
+    def test_inactive_claim_is_rejected(self):
+        self.user.is_active = False
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {issue_access_token(self.user)}")
+        self.assertEqual(self.client.get("/api/videos/trending/").status_code, 401)
+
+
+class BootstrapTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="viewer", email="viewer@example.com")
+        self.channel = User.objects.create_user(username="channel")
+        self.videos = [
+            Video.objects.create(
+                user=self.channel,
+                title=f"Video {index}",
+                file_id=f"v{index}",
+                Video_url=f"https://ik.imagekit.io/demo/v{index}.mp4",
+            )
+            for index in range(3)
+        ]
+        self.client = APIClient()
+
+    def test_anonymous_gets_csrf_token_only(self):
+        response = self.client.get("/api/auth/bootstrap/")
+        data = response.json()
+        self.assertFalse(data["authenticated"])
+        self.assertIsNone(data["user"])
+        self.assertTrue(data["csrf_token"])
+        self.assertIn("csrftoken", response.cookies)
+
+    def test_signed_in_payload(self):
+        ChannelSubscription.objects.create(subscriber=self.user, channel=self.channel)
+        for age, video in enumerate(self.videos[:2]):
+            at = timezone.now() - timedelta(hours=2 - age)
+            WatchLater.objects.create(user=self.user, video=video)
+            WatchHistory.objects.create(user=self.user, video=video)
+            WatchLater.objects.filter(video=video).update(created_at=at)
+            WatchHistory.objects.filter(video=video).update(watched_at=at)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {issue_access_token(self.user)}")
+
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get("/api/auth/bootstrap/").json()
 
-# Create your tests here.
+        self.assertTrue(data["authenticated"])
+        self.assertEqual(data["user"], {"id": self.user.id, "username": "viewer", "email": "viewer@example.com"})
+        self.assertEqual(data["profile"]["display_name"], "viewer")
+        self.assertEqual(data["subscribed_channel_ids"], [self.channel.id])
+        newest_first = [self.videos[1].id, self.videos[0].id]
+        self.assertEqual(data["watch_later_ids"], newest_first)
+        self.assertEqual(data["history_ids"], newest_first)
+        # Profile, email (deferred by the claims token), subscriptions,
+        # watch later and history: one query each.
+        self.assertEqual(len(queries), 5)
+        # Bootstrap is read-only: no profile row is created.
+        self.assertFalse(UserProfile.objects.filter(user=self.user).exists())
@@ -1,15 +1,20 @@
 from django.contrib.auth import authenticate, login, logout as auth_logout
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
-from django.db import DatabaseError
+from django.db import DatabaseError, transaction
+from django.middleware.csrf import get_token
 from django.views.decorators.csrf import ensure_csrf_cookie
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from .authentication import issue_access_token
 from .models import UserProfile
-from videos.imagekit_client import upload_profile_photo
+from videos.storage import get_storage
+from videos.models import ChannelSubscription, PendingFileDeletion, WatchHistory, WatchLater
+
+BOOTSTRAP_WATCH_LATER_LIMIT = 500
+BOOTSTRAP_HISTORY_LIMIT = 50
 
 
 @ensure_csrf_cookie
@@ -64,12 +69,11 @@ def api_register(request):
 
     user.save()
     login(request, user)
-    refresh = RefreshToken.for_user(user)
     return Response(
         {
             "success": True,
             "user": {"id": user.id, "username": user.username},
-            "access_token": str(refresh.access_token),
+            "access_token": issue_access_token(user),
         }
     )
 
@@ -89,12 +93,11 @@ def api_login(request):
         )
 
     login(request, user)
-    refresh = RefreshToken.for_user(user)
     return Response(
         {
             "success": True,
             "user": {"id": user.id, "username": user.username},
-            "access_token": str(refresh.access_token),
+            "access_token": issue_access_token(user),
         }
     )
 
@@ -106,13 +109,52 @@ def api_logout(request):
     return Response({"success": True})
 
 
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def api_bootstrap(request):
+    # Everything the SPA needs before its first render, read-only.
+    csrf_token = get_token(request)
+    user = request.user if request.user.is_authenticated else None
+    if not user:
+        return Response({"authenticated": False, "csrf_token": csrf_token, "user": None})
+
+    profile = _get_profile(user)
+    return Response(
+        {
+            "authenticated": True,
+            "csrf_token": csrf_token,
+            "user": {"id": user.id, "username": user.username, "email": user.email},
+            "profile": {
+                "display_name": profile.display_name or user.username,
+                "channel_description": profile.channel_description,
+                "photo_url": profile.photo_url,
+            },
+            "subscribed_channel_ids": list(
+                ChannelSubscription.objects.filter(subscriber=user).values_list(
+                    "channel_id", flat=True
+                )
+            ),
+            "watch_later_ids": list(
+                WatchLater.objects.filter(user=user)
+                .order_by("-created_at")
+                .values_list("video_id", flat=True)[:BOOTSTRAP_WATCH_LATER_LIMIT]
+            ),
+            "history_ids": list(
+                WatchHistory.objects.filter(user=user)
+                .order_by("-watched_at")
+                .values_list("video_id", flat=True)[:BOOTSTRAP_HISTORY_LIMIT]
+            ),
+        }
+    )
+
+
 @api_view(["GET"])
 @permission_classes([AllowAny])
 def api_me(request):
     user = request.user if request.user.is_authenticated else None
     if not user:
         return Response({"authenticated": False, "user": None})
-    profile = _get_or_create_profile(user)
+    profile = _get_profile(user)
 
     return Response(
         {
@@ -133,7 +175,7 @@ def api_me(request):
 @permission_classes([IsAuthenticated])
 def api_settings(request):
     user = request.user
-    profile = _get_or_create_profile(user)
+    profile = _get_profile(user)
     return Response(
         {
             "success": True,
@@ -164,21 +206,26 @@ def api_update_settings(request):
     profile.display_name = display_name[:120]
     profile.channel_description = channel_description
 
+    replaced_photo_file_id = ""
     photo_file = request.FILES.get("photo_file")
     if photo_file:
         try:
-            upload_result = upload_profile_photo(
-                file_data=photo_file.read(),
+            upload_result = get_storage().upload_profile_photo(
+                file_data=photo_file,
                 file_name=photo_file.name or f"{user.username}_profile.jpg",
             )
+            replaced_photo_file_id = profile.photo_file_id
             profile.photo_url = upload_result["url"]
+            profile.photo_file_id = upload_result["file_id"]
         except Exception as exc:
             return Response(
                 {"success": False, "error": f"Photo upload failed: {exc}"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-    profile.save()
+    with transaction.atomic():
+        profile.save()
+        PendingFileDeletion.enqueue(replaced_photo_file_id)
 
     return Response(
         {
@@ -194,15 +241,25 @@ def api_update_settings(request):
     )
 
 
+class _ProfileFallback:
+    # Safety fallback when migration has not yet been applied.
+    display_name = ""
+    channel_description = ""
+    photo_url = ""
+    photo_file_id = ""
+
+
+def _get_profile(user):
+    # Reads never create the profile; api_update_settings does on first save.
+    try:
+        return UserProfile.objects.filter(user=user).first() or UserProfile(user=user)
+    except DatabaseError:
+        return _ProfileFallback()
+
+
 def _get_or_create_profile(user):
     try:
         profile, _ = UserProfile.objects.get_or_create(user=user)
         return profile
     except DatabaseError:
-        # Safety fallback when migration has not yet been applied.
-        class _ProfileFallback:
-            display_name = ""
-            channel_description = ""
-            photo_url = ""
-
         return _ProfileFallback()
@@ -0,0 +1,104 @@
+import hashlib
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+PRIMARY_PIN_CACHE_KEY = "db:primary_pin:{client}"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class _RequestState:
+    # Mutated in place, so the flags survive the context copies made when
+    # sync code runs under ASGI.
+    __slots__ = ("pinned", "wrote")
+
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.wrote = False
+
+
+_request_state = ContextVar("db_request_state", default=None)
+
+
+def get_replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        if (state is not None and state.pinned) or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        replicas = get_replica_aliases()
+        if not replicas:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            # Later reads in this request must see the write too.
+            state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data, so cross-alias relations are fine.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Local SQLite replicas are plain files and need the schema too.
+        return True
+
+
+class ReplicaPinMiddleware:
+    """Keep reads on the primary during and shortly after a write.
+
+    Unsafe requests, and the rest of any request once it has written (a
+    GET that records a view, say), read from the primary. The client is
+    then pinned in the shared cache for REPLICA_PIN_SECONDS. Clients are
+    identified by their bearer token's user id, else their session: the
+    SPA calls the API cross-site, where a pin cookie would not be sent.
+    Anonymous clients without a session are not pinned.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not get_replica_aliases():
+            return self.get_response(request)
+
+        pin_key = _pin_key(request)
+        pinned = request.method not in SAFE_METHODS or (
+            pin_key is not None and cache.get(pin_key) is not None
+        )
+        state = _RequestState(pinned)
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+
+        if state.wrote and pin_key is not None:
+            cache.set(pin_key, 1, settings.REPLICA_PIN_SECONDS)
+        return response
+
+
+def _pin_key(request):
+    header = request.META.get("HTTP_AUTHORIZATION", "")
+    if header.startswith("Bearer "):
+        try:
+            client = f"user:{AccessToken(header[7:].strip())[api_settings.USER_ID_CLAIM]}"
+        except (TokenError, KeyError):
+            return None
+    elif session_key := request.COOKIES.get(settings.SESSION_COOKIE_NAME):
+        client = "session:" + hashlib.sha256(session_key.encode()).hexdigest()[:32]
+    else:
+        return None
+    return PRIMARY_PIN_CACHE_KEY.format(client=client)
@@ -11,13 +11,19 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
 from pathlib import Path
-from dotenv import load_dotenv
 import os
 import dj_database_url
 
+from backend.sqlite import tune_sqlite
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
-load_dotenv(BASE_DIR / ".env", override=True)
+# Deployments set real environment variables; only pay for python-dotenv
+# when a local .env file is present.
+if (BASE_DIR / ".env").exists():
+    from dotenv import load_dotenv
+
+    load_dotenv(BASE_DIR / ".env", override=True)
 
 
 # Quick-start development settings - unsuitable for production
@@ -52,6 +58,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "backend.cors_middleware.SimpleCorsMiddleware",
+    "backend.db_router.ReplicaPinMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -83,14 +90,89 @@ WSGI_APPLICATION = "backend.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+def _parse_csv_env(name, default=""):
+    raw = os.getenv(name, default)
+    values = []
+    for item in raw.split(","):
+        normalized = item.strip().rstrip("/")
+        if normalized and normalized not in values:
+            values.append(normalized)
+    return values
+
+
+# SQLite databases get WAL (readers never wait for the writer),
+# synchronous=NORMAL, memory-mapped reads and a larger page cache on every
+# connection, plus BEGIN IMMEDIATE and an in-process writer queue
+# (backend/sqlite). Set SQLITE_TUNING=false for the stock backend.
+SQLITE_TUNING = os.getenv("SQLITE_TUNING", "true").lower() == "true"
+SQLITE_BUSY_TIMEOUT_SECONDS = float(os.getenv("SQLITE_BUSY_TIMEOUT_SECONDS", "10"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KIB = int(os.getenv("SQLITE_CACHE_SIZE_KIB", str(64 * 1024)))
+
+
+def _tune_sqlite(config):
+    if not SQLITE_TUNING:
+        return config
+    return tune_sqlite(
+        config, SQLITE_BUSY_TIMEOUT_SECONDS, SQLITE_MMAP_SIZE, SQLITE_CACHE_SIZE_KIB
+    )
+
+
+# Persistent connections are per thread, and ASGI runs sync views on
+# throwaway threads, so they would pile up open; 0 closes them per request.
+CONN_MAX_AGE = int(os.getenv("CONN_MAX_AGE", "0"))
+
 DATABASES = {
-    "default": dj_database_url.config(
-        default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}",
-        conn_max_age=600,
-        ssl_require=False,
+    "default": _tune_sqlite(
+        dj_database_url.config(
+            default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}",
+            conn_max_age=CONN_MAX_AGE,
+            ssl_require=False,
+        )
     )
 }
 
+# Read replicas, e.g. DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3 for local testing.
+# Safe-method requests read from a replica; writes and requests made shortly
+# after a write (see REPLICA_PIN_SECONDS) stay on the primary.
+for _index, _replica_url in enumerate(_parse_csv_env("DATABASE_REPLICA_URLS"), start=1):
+    DATABASES[f"replica_{_index}"] = {
+        **_tune_sqlite(
+            dj_database_url.parse(_replica_url, conn_max_age=CONN_MAX_AGE, ssl_require=False)
+        ),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["backend.db_router.PrimaryReplicaRouter"]
+
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", "5"))
+
+
+# Cache
+# Shared across workers when REDIS_URL is set (requires the `redis` package);
+# otherwise each process keeps its own in-memory cache.
+
+if redis_url := os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": redis_url,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Where uploads go; see videos.storage.MediaStorage.
+MEDIA_STORAGE = os.getenv("MEDIA_STORAGE", "videos.imagekit_client.ImageKitStorage")
+
+# Live counter updates fan out within one process unless a broker is set
+# (e.g. redis://localhost:6379/1); multi-worker deployments need one.
+LIVE_BROKER_URL = os.getenv("LIVE_BROKER_URL", "")
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -133,16 +215,6 @@ LOGOUT_REDIRECT_URL = "/"
 LOGIN_URL = "/accounts/login/"
 
 
-def _parse_csv_env(name, default=""):
-    raw = os.getenv(name, default)
-    values = []
-    for item in raw.split(","):
-        normalized = item.strip().rstrip("/")
-        if normalized and normalized not in values:
-            values.append(normalized)
-    return values
-
-
 CORS_ALLOWED_ORIGINS = _parse_csv_env(
     "CORS_ALLOWED_ORIGINS",
     "http://127.0.0.1:5173,http://localhost:5173,https://youtube-cloneaditya.netlify.app",
@@ -155,10 +227,37 @@ CSRF_TRUSTED_ORIGINS = _parse_csv_env(
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.ClaimsJWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.AllowAny",
     ),
+    # orjson renders pre-encoded video cards (videos.cards) without re-parsing.
+    "DEFAULT_RENDERER_CLASSES": (
+        "videos.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "videos.renderers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
+    # Token-bucket budgets per viewer (user id, or client IP when anonymous).
+    "DEFAULT_THROTTLE_RATES": {
+        "video_read": os.getenv("THROTTLE_VIDEO_READ", "600/min"),
+        "video_view": os.getenv("THROTTLE_VIDEO_VIEW", "30/min"),
+        "video_write": os.getenv("THROTTLE_VIDEO_WRITE", "30/min"),
+        # Playback heartbeats, sent every few seconds while a video plays.
+        "video_progress": os.getenv("THROTTLE_VIDEO_PROGRESS", "30/min"),
+        # Opening a live counter stream; EventSource reconnects count too.
+        "video_live": os.getenv("THROTTLE_VIDEO_LIVE", "20/min"),
+    },
 }
+
+# Safe requests trust a token's username/is_active claims (no user query)
+# for this long after it was issued; older tokens load the user row.
+JWT_CLAIMS_TTL_SECONDS = int(os.getenv("JWT_CLAIMS_TTL_SECONDS", "300"))
+
+# Legacy VideoView rows older than this are pruned by `manage.py rollup_stats`.
+VIDEO_VIEW_RETENTION_DAYS = int(os.getenv("VIDEO_VIEW_RETENTION_DAYS", "90"))
@@ -0,0 +1,27 @@
+def tune_sqlite(config, busy_timeout_seconds, mmap_size, cache_size_kib):
+    """Switch a stock SQLite database config to the tuned backend.
+
+    Pragmas run on every new connection (WAL, synchronous=NORMAL, mmap,
+    page cache); writes start with BEGIN IMMEDIATE and are queued per
+    process (see ``backend.sqlite.base``). Other engines are returned as is.
+    """
+    if config.get("ENGINE") != "django.db.backends.sqlite3":
+        return config
+    pragmas = [
+        "journal_mode=WAL",
+        "synchronous=NORMAL",
+        f"mmap_size={mmap_size}",
+        f"cache_size=-{cache_size_kib}",
+        "temp_store=MEMORY",
+    ]
+    return {
+        **config,
+        "ENGINE": "backend.sqlite",
+        "OPTIONS": {
+            # Passed to sqlite3.connect(); this is SQLite's busy_timeout.
+            "timeout": busy_timeout_seconds,
+            "transaction_mode": "IMMEDIATE",
+            "init_command": "; ".join(f"PRAGMA {pragma}" for pragma in pragmas),
+            **config.get("OPTIONS", {}),
+        },
+    }
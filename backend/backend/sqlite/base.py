@@ -0,0 +1,102 @@
+"""SQLite backend that queues writers inside the process.
+
+SQLite allows one writer per database file. Every transaction and every
+autocommit INSERT/UPDATE/DELETE here first takes a per-file lock, so
+threads wait for each other in order instead of polling the file lock
+inside busy_timeout and failing with "database is locked". With WAL
+(see ``SQLITE_TUNING`` in settings) readers don't take the lock and never
+wait for writers.
+"""
+
+import threading
+
+from django.db.backends.sqlite3 import base
+
+WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+_write_locks = {}
+_write_locks_guard = threading.Lock()
+
+
+def _write_lock(name):
+    with _write_locks_guard:
+        return _write_locks.setdefault(str(name), threading.Lock())
+
+
+def _is_write(query):
+    return query.lstrip()[:7].upper().startswith(WRITE_STATEMENTS)
+
+
+class SQLiteCursorWrapper(base.SQLiteCursorWrapper):
+    def execute(self, query, params=None):
+        if not self._needs_lock(query):
+            return super().execute(query, params)
+        self.db.acquire_write_lock()
+        try:
+            return super().execute(query, params)
+        finally:
+            self.db.release_write_lock()
+
+    def executemany(self, query, param_list):
+        if not self._needs_lock(query):
+            return super().executemany(query, param_list)
+        self.db.acquire_write_lock()
+        try:
+            return super().executemany(query, param_list)
+        finally:
+            self.db.release_write_lock()
+
+    def _needs_lock(self, query):
+        # Inside a transaction the lock was taken at BEGIN.
+        return not self.connection.in_transaction and _is_write(query)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.write_lock = _write_lock(self.settings_dict["NAME"])
+        self._holds_write_lock = False
+
+    def create_cursor(self, name=None):
+        cursor = self.connection.cursor(factory=SQLiteCursorWrapper)
+        cursor.db = self
+        return cursor
+
+    def acquire_write_lock(self):
+        if self._holds_write_lock:
+            return
+        # Past the busy timeout, fall through to SQLite's own locking
+        # rather than waiting forever.
+        timeout = self.settings_dict["OPTIONS"].get("timeout", 5)
+        self._holds_write_lock = self.write_lock.acquire(timeout=timeout)
+
+    def release_write_lock(self):
+        if self._holds_write_lock:
+            self._holds_write_lock = False
+            self.write_lock.release()
+
+    def _start_transaction_under_autocommit(self):
+        self.acquire_write_lock()
+        try:
+            super()._start_transaction_under_autocommit()
+        except Exception:
+            self.release_write_lock()
+            raise
+
+    def _commit(self):
+        try:
+            super()._commit()
+        finally:
+            self.release_write_lock()
+
+    def _rollback(self):
+        try:
+            super()._rollback()
+        finally:
+            self.release_write_lock()
+
+    def _close(self):
+        try:
+            super()._close()
+        finally:
+            self.release_write_lock()
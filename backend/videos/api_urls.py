@@ -5,19 +5,47 @@ app_name = "videos_api"
 
 urlpatterns = [
     path("", views.VideoListAPIView.as_view(), name="list"),
+    path("channels/top/", views.api_top_channels, name="top_channels"),
     path("channel/<str:username>/", views.api_channel_videos, name="channel"),
     path("channel/<str:username>/subscribe/", views.api_toggle_subscribe, name="subscribe"),
+    path("channel/<str:username>/export/", views.api_channel_export, name="channel_export"),
+    path("channel/<str:username>/analytics/", views.api_channel_analytics, name="channel_analytics"),
+    path("home/", views.api_home_feed, name="home"),
     path("subscribed-feed/", views.api_subscribed_feed, name="subscribed_feed"),
+    path("suggestions/", views.api_video_suggestions, name="suggestions"),
     path("trending/", views.api_trending_videos, name="trending"),
     path("history/", views.api_watch_history, name="history"),
+    path("continue-watching/", views.api_continue_watching, name="continue_watching"),
     path("liked/", views.api_liked_videos, name="liked"),
     path("watch-later/", views.api_watch_later_list, name="watch_later_list"),
+    path("watch-later/bulk/", views.api_watch_later_bulk, name="watch_later_bulk"),
+    path("subscriptions/bulk/", views.api_subscriptions_bulk, name="subscriptions_bulk"),
+    path("playlists/", views.api_playlists, name="playlists"),
+    path("playlists/<int:playlist_id>/", views.api_playlist_detail, name="playlist_detail"),
+    path("playlists/<int:playlist_id>/delete/", views.api_playlist_delete, name="playlist_delete"),
+    path("playlists/<int:playlist_id>/items/", views.api_playlist_add, name="playlist_add"),
+    path(
+        "playlists/<int:playlist_id>/items/<int:item_id>/move/",
+        views.api_playlist_move,
+        name="playlist_move",
+    ),
+    path(
+        "playlists/<int:playlist_id>/items/<int:item_id>/delete/",
+        views.api_playlist_remove,
+        name="playlist_remove",
+    ),
     path("upload/", views.api_video_upload, name="upload"),
     path("<int:video_id>/", views.api_video_detail, name="detail"),
+    path("<int:video_id>/live/", views.api_video_live, name="live"),
+    path("<int:video_id>/progress/", views.api_video_progress, name="progress"),
+    path("<int:video_id>/related/", views.api_related_videos, name="related"),
+    path("<int:video_id>/analytics/", views.api_video_analytics, name="analytics"),
     path("<int:video_id>/comments/", views.api_video_comments, name="comments"),
     path("<int:video_id>/comments/add/", views.api_add_comment, name="comment_add"),
     path("<int:video_id>/delete/", views.api_video_delete, name="delete"),
     path("<int:video_id>/watch-later/", views.api_watch_later_toggle, name="watch_later_toggle"),
     path("<int:video_id>/vote/", views.api_video_vote, name="vote"),
     path("comments/<int:comment_id>/like/", views.api_toggle_comment_like, name="comment_like"),
+    path("comments/<int:comment_id>/replies/", views.api_comment_replies, name="comment_replies"),
+    path("comments/<int:comment_id>/delete/", views.api_delete_comment, name="comment_delete"),
 ]
@@ -0,0 +1,134 @@
+import threading
+from collections import OrderedDict
+
+import orjson
+from django.core.cache import cache
+
+from .models import Video
+
+# Static card fragments kept per process; a few KB of URLs each.
+FRAGMENT_CACHE_SIZE = 20_000
+
+# Static card parts shared by all viewers, keyed by the video's version so
+# an edit is a new key and a deleted video is never looked up. Counters
+# change on every view and vote, so they're read per page instead.
+PUBLIC_CARD_CACHE_KEY = "videos:card:{video_id}:{version}"
+PUBLIC_CARD_CACHE_SECONDS = 3600
+COUNTER_FIELDS = ("views", "unique_views", "likes", "dislikes", "comment_count")
+
+
+class FragmentCache:
+    """Thread-safe LRU of encoded card fragments."""
+
+    def __init__(self, maxsize=FRAGMENT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+fragments = FragmentCache()
+
+
+def static_fragment(video):
+    """Encoded fields of a card that only change when the video is edited.
+
+    Returned without the surrounding braces so counters can be appended.
+    Keyed by ``updated_at``, so edits must bump it.
+    """
+    key = (video.id, video.updated_at)
+    fragment = fragments.get(key)
+    if fragment is None:
+        fragment = orjson.dumps(
+            {
+                "id": video.id,
+                "title": video.title,
+                "description": video.description,
+                "video_url": video.Video_url,
+                "thumbnail_url": video.display_thumbnail_url,
+                "thumbnail_srcset": video.thumbnail_srcset,
+                "streaming_url": video.streaming_url,
+                "optimized_url": video.optimized_url,
+                "channel": video.user.username,
+                "created_at": video.created_at.isoformat(),
+            }
+        )[1:-1]
+        fragments.set(key, fragment)
+    return fragment
+
+
+def counters_fragment(values):
+    """Encoded ``COUNTER_FIELDS`` for ``values`` in the same order, without braces."""
+    return orjson.dumps(dict(zip(COUNTER_FIELDS, values)))[1:-1]
+
+
+def public_fragment(video):
+    """Static fragment plus the video's counters, still without braces."""
+    counters = counters_fragment(getattr(video, field) for field in COUNTER_FIELDS)
+    return static_fragment(video) + b"," + counters
+
+
+def load_public_cards(video_ids):
+    """Map video id to ``(channel_id, public fragment)`` for existing videos.
+
+    One primary-key query reads the versions and current counters; static
+    parts come from the shared cache, and misses are read in one more
+    query and cached.
+    """
+    rows = {
+        row[0]: row[1:]
+        for row in Video.objects.filter(id__in=video_ids).values_list(
+            "id", "updated_at", *COUNTER_FIELDS
+        )
+    }
+    keys = {_card_key(video_id, row[0]): video_id for video_id, row in rows.items()}
+    static = {keys[key]: card for key, card in cache.get_many(keys).items()}
+    missing = [video_id for video_id in rows if video_id not in static]
+    if missing:
+        loaded = {
+            video.id: (video, (video.user_id, static_fragment(video)))
+            for video in Video.objects.select_related("user").filter(id__in=missing)
+        }
+        cache.set_many(
+            {_card_key(video.id, video.updated_at): card for video, card in loaded.values()},
+            PUBLIC_CARD_CACHE_SECONDS,
+        )
+        static.update({video_id: card for video_id, (_, card) in loaded.items()})
+    return {
+        video_id: (channel_id, fragment + b"," + counters_fragment(rows[video_id][1:]))
+        for video_id, (channel_id, fragment) in static.items()
+    }
+
+
+def _card_key(video_id, updated_at):
+    return PUBLIC_CARD_CACHE_KEY.format(
+        video_id=video_id, version=int(updated_at.timestamp() * 1_000_000)
+    )
+
+
+def render_card(fragment, **overlay):
+    """Merge a public fragment with per-viewer ``overlay`` fields."""
+    if not overlay:
+        return orjson.Fragment(b"{" + fragment + b"}")
+    return orjson.Fragment(b"{" + fragment + b"," + orjson.dumps(overlay)[1:])
+
+
+def video_card(video, **overlay):
+    return render_card(public_fragment(video), **overlay)
@@ -0,0 +1,362 @@
+import csv
+import json
+import math
+from collections import Counter
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from .models import ChannelSubscription, Comment, SuggestionChange, Video
+
+IMPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_SIZE = 2000
+# Lines joined per hop to the sync thread when streaming an export under ASGI.
+EXPORT_LINES_PER_PULL = 200
+EXPORT_FIELDS = [
+    "id",
+    "title",
+    "created_at",
+    "views",
+    "unique_views",
+    "likes",
+    "dislikes",
+    "comment_count",
+    "duration",
+    "width",
+    "height",
+    "video_url",
+]
+VIDEO_INT_FIELDS = ("views", "unique_views", "likes", "dislikes")
+VIDEO_METADATA_FIELDS = ("duration", "width", "height", "bitrate", "codec")
+# Only the first rejected rows are kept for the report; all are counted.
+MAX_REPORTED_ERRORS = 100
+
+_REQUIRED_FIELDS = {
+    "user": ("username",),
+    "video": ("user", "file_id", "url"),
+    "comment": ("user", "video_file_id", "text"),
+    "subscription": ("subscriber", "channel"),
+}
+_OPTIONAL_TEXT_FIELDS = ("email", "title", "description", "thumbnail_url", "codec", "created_at")
+# Upper bounds of the target columns, so one out-of-range value can't fail a batch.
+_MAX_LENGTHS = {"username": 150, "file_id": 200, "url": 500, "thumbnail_url": 500, "codec": 32}
+_NUMBER_LIMITS = {
+    "views": (int, 2**31 - 1),
+    "unique_views": (int, 2**31 - 1),
+    "likes": (int, 2**31 - 1),
+    "dislikes": (int, 2**31 - 1),
+    "width": (int, 2**31 - 1),
+    "height": (int, 2**31 - 1),
+    "bitrate": (int, 2**63 - 1),
+    "duration": (float, None),
+}
+
+
+class CatalogImporter:
+    """Load a JSONL catalog with batched inserts.
+
+    Each line is one object with a ``type`` of ``user``, ``video``,
+    ``comment`` or ``subscription``. Records refer to users by username
+    and to videos by ``file_id``; references are resolved per batch, so
+    memory stays bounded by the batch size however large the file is.
+    Users, videos (by file_id) and subscriptions that already exist are
+    skipped, so an interrupted import can be re-run. Comments are always
+    inserted.
+
+    Malformed records and records whose references don't resolve are
+    skipped rather than aborting the import; ``errors`` lists them as
+    ``(line_number, reason)``.
+    """
+
+    def __init__(self, batch_size=IMPORT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.pending = {"user": [], "video": [], "comment": [], "subscription": []}
+        self.stats = Counter()
+        self.errors = []
+        self.rejected = 0
+
+    def feed(self, lines):
+        for line_number, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                self._reject(line_number, "not valid JSON")
+                continue
+            error = _validate(record)
+            if error:
+                self._reject(line_number, error)
+                continue
+            kind = record["type"]
+            batch = self.pending[kind]
+            batch.append((line_number, record))
+            if len(batch) >= self.batch_size:
+                self.flush(kind)
+        for kind in self.pending:
+            self.flush(kind)
+        return self.stats
+
+    def flush(self, kind):
+        # Records may refer to users or videos still waiting in a batch.
+        if kind in ("video", "comment", "subscription"):
+            self._flush_batch("user")
+        if kind == "comment":
+            self._flush_batch("video")
+        self._flush_batch(kind)
+
+    def _flush_batch(self, kind):
+        records, self.pending[kind] = self.pending[kind], []
+        if records:
+            with transaction.atomic():
+                getattr(self, f"_import_{kind}s")(records)
+
+    def _reject(self, line_number, reason, stat="invalid"):
+        self.stats[stat] += 1
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line_number, reason))
+
+    def _import_users(self, records):
+        unusable_password = make_password(None)
+        users = {
+            record["username"]: User(
+                username=record["username"],
+                email=record.get("email") or "",
+                password=unusable_password,
+            )
+            for _, record in records
+        }
+        existing = set(
+            User.objects.filter(username__in=users).values_list("username", flat=True)
+        )
+        created = User.objects.bulk_create(
+            [user for username, user in users.items() if username not in existing],
+            ignore_conflicts=True,
+        )
+        self.stats["users"] += len(created)
+        self.stats["skipped"] += len(records) - len(created)
+
+    def _import_videos(self, records):
+        user_ids = self._user_ids(record["user"] for _, record in records)
+        existing = set(
+            Video.objects.filter(
+                file_id__in=[record["file_id"] for _, record in records]
+            ).values_list("file_id", flat=True)
+        )
+        videos, created_at = [], []
+        for line_number, record in records:
+            user_id = user_ids.get(record["user"])
+            file_id = record["file_id"]
+            if not user_id:
+                self._reject(line_number, f"unknown user {record['user']!r}", "skipped")
+                continue
+            if file_id in existing:
+                self.stats["skipped"] += 1
+                continue
+            existing.add(file_id)
+            video = Video(
+                user_id=user_id,
+                title=(record.get("title") or "")[:120],
+                description=record.get("description") or "",
+                file_id=file_id,
+                Video_url=record["url"],
+                thumbnail_url=record.get("thumbnail_url") or "",
+                **{field: record.get(field) or 0 for field in VIDEO_INT_FIELDS},
+                **{
+                    field: record[field]
+                    for field in VIDEO_METADATA_FIELDS
+                    if record.get(field) is not None
+                },
+            )
+            videos.append(video)
+            created_at.append(_parse_datetime(record.get("created_at")))
+
+        videos = Video.objects.bulk_create(videos)
+        _restore_created_at(Video, videos, created_at)
+        SuggestionChange.log(*(video.id for video in videos))
+        self.stats["videos"] += len(videos)
+
+    def _import_comments(self, records):
+        user_ids = self._user_ids(record["user"] for _, record in records)
+        video_ids = dict(
+            Video.objects.filter(
+                file_id__in={record["video_file_id"] for _, record in records}
+            ).values_list("file_id", "id")
+        )
+        comments, created_at = [], []
+        for line_number, record in records:
+            user_id = user_ids.get(record["user"])
+            video_id = video_ids.get(record["video_file_id"])
+            if not user_id:
+                self._reject(line_number, f"unknown user {record['user']!r}", "skipped")
+                continue
+            if not video_id:
+                self._reject(
+                    line_number, f"unknown video file_id {record['video_file_id']!r}", "skipped"
+                )
+                continue
+            comments.append(Comment(user_id=user_id, video_id=video_id, text=record["text"]))
+            created_at.append(_parse_datetime(record.get("created_at")))
+
+        comments = Comment.objects.bulk_create(comments)
+        _restore_created_at(Comment, comments, created_at)
+        self.stats["comments"] += len(comments)
+
+    def _import_subscriptions(self, records):
+        user_ids = self._user_ids(
+            record[field] for _, record in records for field in ("subscriber", "channel")
+        )
+        subscriptions = []
+        for line_number, record in records:
+            missing = [
+                record[field] for field in ("subscriber", "channel") if record[field] not in user_ids
+            ]
+            if missing:
+                self._reject(line_number, f"unknown user {missing[0]!r}", "skipped")
+                continue
+            subscriptions.append(
+                ChannelSubscription(
+                    subscriber_id=user_ids[record["subscriber"]],
+                    channel_id=user_ids[record["channel"]],
+                )
+            )
+        ChannelSubscription.objects.bulk_create(subscriptions, ignore_conflicts=True)
+        self.stats["subscriptions"] += len(subscriptions)
+
+    def _user_ids(self, usernames):
+        return dict(
+            User.objects.filter(username__in=set(usernames)).values_list("username", "id")
+        )
+
+
+def _validate(record):
+    """Why ``record`` can't be imported, or None.
+
+    Numeric video fields are converted in place, so the importer can use
+    them as they are.
+    """
+    if not isinstance(record, dict):
+        return "not a JSON object"
+    kind = record.get("type")
+    if kind not in _REQUIRED_FIELDS:
+        return f"unknown type {kind!r}"
+    for field in _REQUIRED_FIELDS[kind]:
+        value = record.get(field)
+        if not isinstance(value, str) or not value.strip():
+            return f"{field} is missing or not a string"
+    for field in _OPTIONAL_TEXT_FIELDS:
+        if record.get(field) is not None and not isinstance(record[field], str):
+            return f"{field} is not a string"
+    for field, limit in _MAX_LENGTHS.items():
+        if len(record.get(field) or "") > limit:
+            return f"{field} is longer than {limit} characters"
+    if kind == "subscription" and record["subscriber"] == record["channel"]:
+        return "a channel can't subscribe to itself"
+    if kind == "video":
+        for field, (convert, limit) in _NUMBER_LIMITS.items():
+            value = record.get(field)
+            if value is None:
+                continue
+            number = _number(value, convert)
+            if number is None:
+                return f"{field} must be a non-negative number"
+            if limit is not None and number > limit:
+                return f"{field} is larger than {limit}"
+            record[field] = number
+    return None
+
+
+def _number(value, convert):
+    # Accepts JSON numbers and numeric strings; None for anything else.
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        return None
+    try:
+        number = convert(value)
+    except (ValueError, OverflowError):
+        return None
+    if isinstance(value, float) and convert is int and number != value:
+        return None
+    if not math.isfinite(number) or number < 0:
+        return None
+    return number
+
+
+def _parse_datetime(value):
+    try:
+        return parse_datetime(value) if value else None
+    except ValueError:
+        return None
+
+
+def _restore_created_at(model, objects, created_at):
+    # auto_now_add overwrites created_at on insert; put source dates back.
+    dated = []
+    for obj, value in zip(objects, created_at):
+        if value is not None and obj.pk is not None:
+            obj.created_at = value
+            dated.append(obj)
+    if dated:
+        # Small batches keep the generated CASE expression cheap to evaluate.
+        model.objects.bulk_update(dated, ["created_at"], batch_size=100)
+
+
+def iter_video_export_rows(user):
+    """Yield one dict per video of ``user``, read through a server-side cursor."""
+    rows = (
+        Video.objects.filter(user=user)
+        .order_by("id")
+        .values_list(
+            "id",
+            "title",
+            "created_at",
+            "views",
+            "unique_views",
+            "likes",
+            "dislikes",
+            "comment_count",
+            "duration",
+            "width",
+            "height",
+            "Video_url",
+        )
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    for row in rows:
+        data = dict(zip(EXPORT_FIELDS, row))
+        data["created_at"] = data["created_at"].isoformat()
+        yield data
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.DictWriter(_Echo(), fieldnames=EXPORT_FIELDS)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_jsonl(rows):
+    for row in rows:
+        yield json.dumps(row) + "\n"
+
+
+async def stream_async(lines):
+    """Serve a sync line generator as an async iterator.
+
+    ASGI buffers a sync streaming body into one list before sending it, so
+    the lines are pulled through the sync thread a batch at a time instead.
+    """
+    lines = iter(lines)
+    pull = sync_to_async(lambda: "".join(islice(lines, EXPORT_LINES_PER_PULL)))
+    while chunk := await pull():
+        yield chunk
@@ -0,0 +1,89 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import ChannelStats, ChannelSubscription, Comment, Video
+
+EMPTY_CHANNEL_STATS = {
+    "video_count": 0,
+    "total_views": 0,
+    "total_likes": 0,
+    "subscriber_count": 0,
+    "last_upload_at": None,
+}
+
+
+def _count_subquery(queryset, group_field):
+    return Coalesce(
+        Subquery(
+            queryset.order_by()
+            .values(group_field)
+            .annotate(total=Count("id"))
+            .values("total")[:1]
+        ),
+        Value(0),
+    )
+
+
+def reconcile_comment_counts(dry_run=False):
+    """Recount Video.comment_count and Comment.reply_count where they drifted.
+
+    Returns (videos_fixed, comments_fixed).
+    """
+    videos = Video.objects.annotate(
+        actual=_count_subquery(Comment.objects.filter(video=OuterRef("pk")), "video")
+    ).exclude(comment_count=F("actual"))
+    comments = Comment.objects.annotate(
+        actual=_count_subquery(Comment.objects.filter(parent=OuterRef("pk")), "parent")
+    ).exclude(reply_count=F("actual"))
+
+    video_ids = list(videos.values_list("id", flat=True))
+    comment_ids = list(comments.values_list("id", flat=True))
+    if not dry_run:
+        if video_ids:
+            Video.objects.filter(id__in=video_ids).update(
+                comment_count=_count_subquery(
+                    Comment.objects.filter(video=OuterRef("pk")), "video"
+                )
+            )
+        if comment_ids:
+            Comment.objects.filter(id__in=comment_ids).update(
+                reply_count=_count_subquery(
+                    Comment.objects.filter(parent=OuterRef("pk")), "parent"
+                )
+            )
+    return len(video_ids), len(comment_ids)
+
+
+def rebuild_channel_stats():
+    """Recompute every ChannelStats row from videos and subscriptions."""
+    stats = defaultdict(lambda: dict(EMPTY_CHANNEL_STATS))
+    for row in Video.objects.values("user_id").annotate(
+        videos=Count("id"), views=Sum("views"), likes=Sum("likes"), last=Max("created_at")
+    ):
+        stats[row["user_id"]].update(
+            video_count=row["videos"],
+            total_views=row["views"] or 0,
+            total_likes=row["likes"] or 0,
+            last_upload_at=row["last"],
+        )
+    for channel_id, total in (
+        ChannelSubscription.objects.values("channel_id")
+        .annotate(total=Count("id"))
+        .values_list("channel_id", "total")
+    ):
+        stats[channel_id]["subscriber_count"] = total
+
+    with transaction.atomic():
+        # Channels whose videos and subscribers are all gone drop to zero.
+        ChannelStats.objects.update(**EMPTY_CHANNEL_STATS)
+        ChannelStats.objects.bulk_create(
+            [ChannelStats(user_id=user_id, **values) for user_id, values in stats.items()],
+            update_conflicts=True,
+            unique_fields=["user"],
+            update_fields=list(EMPTY_CHANNEL_STATS),
+            batch_size=500,
+        )
+    return len(stats)
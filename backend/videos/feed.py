@@ -0,0 +1,141 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import ChannelSubscription, RelatedVideo, UniqueViewerSketch, Video, WatchHistory
+
+TRENDING_CACHE_KEY = "videos:trending_ids"
+TRENDING_CACHE_SECONDS = 300
+TRENDING_LIMIT = 30
+
+HOME_FEED_CACHE_KEY = "videos:home_feed:{user_id}"
+HOME_FEED_CACHE_SECONDS = 600
+HOME_FEED_LIMIT = 200
+
+# How much each candidate source contributes to a video's score.
+SUBSCRIPTION_WEIGHT = 3.0
+COWATCH_WEIGHT = 2.0
+TRENDING_WEIGHT = 1.0
+FRESH_WEIGHT = 0.5
+
+SUBSCRIPTION_CANDIDATES = 100
+COWATCH_SEED_VIDEOS = 20
+FRESH_CANDIDATES = 50
+
+
+def get_trending_video_ids():
+    video_ids = cache.get(TRENDING_CACHE_KEY)
+    if video_ids is None:
+        video_ids = rank_trending_video_ids()
+        cache.set(TRENDING_CACHE_KEY, video_ids, TRENDING_CACHE_SECONDS)
+    return video_ids
+
+
+def get_home_feed_ids(user):
+    key = HOME_FEED_CACHE_KEY.format(user_id=user.id)
+    video_ids = cache.get(key)
+    if video_ids is None:
+        video_ids = rank_home_feed(user)
+        cache.set(key, video_ids, HOME_FEED_CACHE_SECONDS)
+    return video_ids
+
+
+def rank_home_feed(user, limit=HOME_FEED_LIMIT):
+    """Blend subscription, co-watch, trending and fresh candidates for one user.
+
+    Videos the user already watched or uploaded are left out. A short feed
+    is topped up with the newest unwatched videos, and one that would be
+    empty (everything watched) falls back to trending. Runs a fixed number
+    of queries regardless of history size.
+    """
+    now = timezone.now()
+    watched = list(
+        WatchHistory.objects.filter(user=user)
+        .order_by("-watched_at")
+        .values_list("video_id", flat=True)
+    )
+    excluded = set(watched)
+    excluded.update(Video.objects.filter(user=user).values_list("id", flat=True))
+    scores = {}
+
+    def add(video_id, score):
+        if video_id not in excluded:
+            scores[video_id] = scores.get(video_id, 0.0) + score
+
+    subscribed = ChannelSubscription.objects.filter(subscriber=user).values("channel_id")
+    for video_id, created_at in (
+        Video.objects.filter(user_id__in=subscribed)
+        .order_by("-created_at")
+        .values_list("id", "created_at")[:SUBSCRIPTION_CANDIDATES]
+    ):
+        add(video_id, SUBSCRIPTION_WEIGHT * _freshness(now, created_at, half_life_days=7))
+
+    for video_id, score in (
+        RelatedVideo.objects.filter(video_id__in=watched[:COWATCH_SEED_VIDEOS])
+        .values("related_id")
+        .annotate(total=Sum("score"))
+        .values_list("related_id", "total")
+    ):
+        add(video_id, COWATCH_WEIGHT * score)
+
+    trending = get_trending_video_ids()
+    for position, video_id in enumerate(trending):
+        add(video_id, TRENDING_WEIGHT * (1 - position / len(trending)))
+
+    for video_id, created_at in (
+        Video.objects.exclude(user=user)
+        .order_by("-created_at")
+        .values_list("id", "created_at")[:FRESH_CANDIDATES]
+    ):
+        add(video_id, FRESH_WEIGHT * _freshness(now, created_at, half_life_days=3))
+
+    ranked = sorted(scores, key=scores.get, reverse=True)[:limit]
+    if len(ranked) < limit:
+        ranked += list(
+            Video.objects.exclude(user=user)
+            .exclude(id__in=ranked)
+            .exclude(id__in=WatchHistory.objects.filter(user=user).values("video_id"))
+            .order_by("-created_at")
+            .values_list("id", flat=True)[: limit - len(ranked)]
+        )
+    if not ranked:
+        own = excluded.difference(watched)
+        ranked = [video_id for video_id in trending if video_id not in own][:limit]
+    return ranked
+
+
+def rank_trending_video_ids():
+    # Unique viewers over the last 7 days come from merged daily sketches.
+    week_start = timezone.localdate() - timedelta(days=6)
+    recent_unique_views = UniqueViewerSketch.window_counts(week_start)
+    ranked = []
+    if recent_unique_views:
+        counts = sorted(recent_unique_views.values(), reverse=True)
+        cutoff = counts[min(TRENDING_LIMIT, len(counts)) - 1]
+        contenders = [
+            video_id for video_id, count in recent_unique_views.items() if count >= cutoff
+        ]
+        rows = Video.objects.filter(id__in=contenders).values_list(
+            "id", "likes", "comment_count", "views"
+        )
+        rows = sorted(
+            rows,
+            key=lambda row: (recent_unique_views[row[0]], row[1], row[2], row[3]),
+            reverse=True,
+        )
+        ranked = [row[0] for row in rows[:TRENDING_LIMIT]]
+
+    if len(ranked) < TRENDING_LIMIT:
+        ranked += list(
+            Video.objects.exclude(id__in=ranked)
+            .order_by("-likes", "-comment_count", "-views")
+            .values_list("id", flat=True)[: TRENDING_LIMIT - len(ranked)]
+        )
+    return ranked
+
+
+def _freshness(now, created_at, half_life_days):
+    age_days = max((now - created_at).total_seconds(), 0) / 86400
+    return 0.5 ** (age_days / half_life_days)
@@ -0,0 +1,108 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from accounts.models import UserProfile
+
+from .models import PendingFileDeletion, Video
+from .storage import get_storage
+
+REMOTE_FOLDERS = ("videos", "thumbnails", "profiles")
+
+
+def drain_file_deletions():
+    """Delete due outbox entries in bulk batches; failures back off exponentially.
+
+    Returns ``(deleted, kept, failed)`` counts. Kept entries are files that
+    something in the database references again, so they are dropped from the
+    outbox without being deleted.
+    """
+    storage = get_storage()
+    now = timezone.now()
+    deleted = kept = failed = 0
+    while True:
+        batch = list(
+            PendingFileDeletion.objects.filter(
+                next_attempt_at__lte=now, attempts__lt=PendingFileDeletion.MAX_ATTEMPTS
+            )[: storage.max_bulk_delete]
+        )
+        if not batch:
+            return deleted, kept, failed
+
+        file_ids = [entry.file_id for entry in batch]
+        in_use = _referenced_file_ids(file_ids)
+        to_delete = [file_id for file_id in file_ids if file_id not in in_use]
+        error = ""
+        try:
+            gone = set(storage.delete_files(to_delete)) if to_delete else set()
+        except Exception as exc:
+            gone = set()
+            error = str(exc)
+
+        PendingFileDeletion.objects.filter(file_id__in=in_use | gone).delete()
+        retries = [entry for entry in batch if entry.file_id not in in_use | gone]
+        for entry in retries:
+            entry.attempts += 1
+            entry.last_error = error or "File was not deleted."
+            entry.next_attempt_at = now + timedelta(minutes=2 ** entry.attempts)
+        PendingFileDeletion.objects.bulk_update(
+            retries, ["attempts", "last_error", "next_attempt_at"]
+        )
+        deleted += len(gone)
+        kept += len(in_use)
+        failed += len(retries)
+
+
+def find_orphaned_files(folder, grace=timedelta(hours=1)):
+    """Yield remote files in ``folder`` that nothing in the database references.
+
+    Files younger than ``grace`` are ignored so uploads whose rows are not
+    saved yet are not reported.
+    """
+    storage = get_storage()
+    referenced_ids, referenced_urls = _all_references()
+    cutoff = timezone.now() - grace
+    skip = 0
+    while True:
+        page = storage.list_files(folder, skip=skip, limit=storage.max_list_page)
+        for item in page:
+            if item["file_id"] in referenced_ids or item["url"] in referenced_urls:
+                continue
+            if item["created_at"] and item["created_at"] > cutoff:
+                continue
+            yield item
+        if len(page) < storage.max_list_page:
+            return
+        skip += len(page)
+
+
+def _referenced_file_ids(file_ids):
+    referenced = set()
+    for queryset, field in (
+        (Video.objects, "file_id"),
+        (Video.objects, "thumbnail_file_id"),
+        (UserProfile.objects, "photo_file_id"),
+    ):
+        referenced.update(
+            queryset.filter(**{f"{field}__in": file_ids}).values_list(field, flat=True)
+        )
+    return referenced
+
+
+def _all_references():
+    # Older rows only stored URLs, so both ids and URLs count as references.
+    referenced_ids = set()
+    referenced_urls = set()
+    for file_id, thumbnail_file_id, video_url, thumbnail_url in Video.objects.values_list(
+        "file_id", "thumbnail_file_id", "Video_url", "thumbnail_url"
+    ).iterator():
+        referenced_ids.update((file_id, thumbnail_file_id))
+        referenced_urls.update((video_url, thumbnail_url))
+    for photo_file_id, photo_url in UserProfile.objects.values_list(
+        "photo_file_id", "photo_url"
+    ).iterator():
+        referenced_ids.add(photo_file_id)
+        referenced_urls.add(photo_url)
+    referenced_ids.discard("")
+    referenced_urls.discard("")
+    return referenced_ids, referenced_urls
@@ -0,0 +1,66 @@
+import hashlib
+import math
+import zlib
+from collections import Counter
+
+DEFAULT_PRECISION = 12
+
+
+class HyperLogLog:
+    """Cardinality sketch with one byte per register.
+
+    With the default precision (4096 registers) the standard error is about
+    1.6%. Sketches for the same precision merge losslessly, so per-day
+    sketches can be combined into any window.
+    """
+
+    def __init__(self, precision=DEFAULT_PRECISION, registers=None):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(registers) if registers else bytearray(self.size)
+
+    def add(self, value):
+        """Add a value and return True if the sketch changed."""
+        digest = hashlib.blake2b(str(value).encode(), digest_size=8).digest()
+        hashed = int.from_bytes(digest, "big")
+        remaining_bits = 64 - self.precision
+        index = hashed >> remaining_bits
+        rest = hashed & ((1 << remaining_bits) - 1)
+        rank = remaining_bits - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            return True
+        return False
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches with different precision.")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self):
+        histogram = Counter(self.registers)
+        harmonic_sum = sum(occurrences * 2.0 ** -rank for rank, occurrences in histogram.items())
+        alpha = 0.7213 / (1 + 1.079 / self.size)
+        estimate = alpha * self.size * self.size / harmonic_sum
+        zeros = histogram.get(0, 0)
+        if estimate <= 2.5 * self.size and zeros:
+            # Linear counting is more accurate for small cardinalities.
+            estimate = self.size * math.log(self.size / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self):
+        # Sparse sketches are mostly zero registers and compress very well.
+        return bytes([self.precision]) + zlib.compress(bytes(self.registers))
+
+    @classmethod
+    def from_bytes(cls, data):
+        data = bytes(data)
+        return cls(precision=data[0], registers=zlib.decompress(data[1:]))
+
+    @classmethod
+    def union(cls, sketches, precision=DEFAULT_PRECISION):
+        merged = cls(precision=precision)
+        for sketch in sketches:
+            merged.merge(sketch)
+        return merged
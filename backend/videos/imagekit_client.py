@@ -1,10 +1,25 @@
 import os
-import base64
-import httpx
-from imagekitio import ImageKit
+
+from .storage import MediaStorage
+
+# imagekitio and httpx take a few hundred ms to import; they are only loaded
+# once something is uploaded or deleted.
+
+
+# Card widths offered in srcset; browsers pick one from layout width and DPR.
+THUMBNAIL_WIDTHS = (240, 320, 480, 640, 960, 1280)
+# HLS renditions by short-side resolution.
+STREAMING_RENDITIONS = (240, 360, 480, 720, 1080)
+DEFAULT_VIDEO_QUALITY = 50
+# Limits of the bulk delete and list APIs.
+MAX_BULK_DELETE = 100
+MAX_LIST_PAGE = 1000
 
 
 def get_imagekit_client():
+    import httpx
+    from imagekitio import ImageKit
+
     private_key = os.getenv("IMAGEKIT_PRIVATE_KEY", "").strip().strip('"')
     if not private_key:
         raise RuntimeError("Missing ImageKit configuration: IMAGEKIT_PRIVATE_KEY")
@@ -14,25 +29,93 @@ def get_imagekit_client():
     return ImageKit(private_key=private_key, http_client=http_client)
 
 
-def get_optimized_video_url(base_url: str) -> str:
-    if "?" in base_url:
-        return f"{base_url}&tr=q-50,f-auto"
-    return f"{base_url}?tr=q-50,f-auto"
+def _with_transform(url: str, transform: str) -> str:
+    if "?" in url:
+        return f"{url}&tr={transform}"
+    return f"{url}?tr={transform}"
+
+
+def get_optimized_video_url(base_url: str, quality: int = DEFAULT_VIDEO_QUALITY) -> str:
+    return _with_transform(base_url, f"q-{quality},f-auto")
+
 
+def get_streaming_url(base_url: str, renditions=STREAMING_RENDITIONS) -> str:
+    ladder = "_".join(str(rendition) for rendition in renditions)
+    return f"{base_url}/ik-master.m3u8?tr=sr-{ladder}"
 
-def get_streaming_url(base_url: str) -> str:
-    return f"{base_url}/ik-master.m3u8?tr=sr-240_360_480_720-1080"
+
+def get_streaming_renditions(width, height) -> tuple:
+    # Only offer renditions up to the source resolution; never upscale.
+    if not width or not height:
+        return STREAMING_RENDITIONS
+    source = min(width, height)
+    renditions = tuple(rendition for rendition in STREAMING_RENDITIONS if rendition <= source)
+    return renditions or STREAMING_RENDITIONS[:1]
+
+
+def get_optimized_quality(width, height, bitrate) -> int:
+    # Lean sources lose visible detail at the default quality; heavy ones
+    # have plenty to spare.
+    if not width or not height or not bitrate:
+        return DEFAULT_VIDEO_QUALITY
+    bits_per_pixel = bitrate / (width * height * 30)
+    if bits_per_pixel < 0.05:
+        return 70
+    if bits_per_pixel > 0.2:
+        return 40
+    return DEFAULT_VIDEO_QUALITY
 
 
 def get_thumbnail_url(base_url: str, width: int = 480, height: int = 270) -> str:
     # Generate a thumbnail from the very beginning of the video.
-    return f"{base_url}/ik-thumbnail.jpg?tr=so-0,w-{width},h-{height}"
+    # f-auto lets the CDN serve WebP/AVIF to browsers that accept them.
+    return f"{base_url}/ik-thumbnail.jpg?tr=so-0,w-{width},h-{height},f-auto"
+
+
+def get_image_url(image_url: str, width: int = 480, height: int = 270) -> str:
+    # Resize an uploaded image (e.g. a custom thumbnail) on the CDN.
+    return _with_transform(image_url, f"w-{width},h-{height},f-auto")
+
+
+def get_srcset(url_for_width, widths=THUMBNAIL_WIDTHS) -> str:
+    return ", ".join(f"{url_for_width(width)} {width}w" for width in widths)
+
 
+def delete_files(file_ids: list) -> list:
+    """Delete up to MAX_BULK_DELETE files and return the ids that are gone.
 
-def delete_video(file_id: str) -> str:
+    Files that no longer exist count as gone. Ids that fail for any other
+    reason are left out so the caller can retry them.
+    """
+    from imagekitio import NotFoundError
+
+    client = get_imagekit_client()
+    try:
+        response = client.files.bulk.delete(file_ids=list(file_ids))
+        return list(response.successfully_deleted_file_ids or [])
+    except NotFoundError:
+        pass
+
+    # The bulk call fails as a whole when any id is missing; go one by one.
+    gone = []
+    for file_id in file_ids:
+        try:
+            client.files.delete(file_id=file_id)
+        except NotFoundError:
+            pass
+        except Exception:
+            continue
+        gone.append(file_id)
+    return gone
+
+
+def list_files(folder: str, skip: int = 0, limit: int = MAX_LIST_PAGE) -> list:
     client = get_imagekit_client()
-    client.files.delete(file_id=file_id)
-    return True
+    response = client.assets.list(path=f"/{folder}/", type="file", skip=skip, limit=limit)
+    return [
+        {"file_id": item.file_id, "url": item.url, "created_at": item.created_at}
+        for item in response
+    ]
 
 
 # -------------------------
@@ -49,24 +132,53 @@ def upload_video(file_data: bytes, file_name: str = "video.mp4") -> dict:
 # -------------------------
 # Upload Thumbnail
 # -------------------------
-def upload_thumbnail(file_data: bytes, file_name: str = "thumbnail.jpg") -> dict:
-    client = get_imagekit_client()
+def upload_thumbnail(file_data, file_name: str = "thumbnail.jpg") -> dict:
+    """Upload a thumbnail (bytes, uploaded file or base64 data URL) after
+    resizing it and stripping metadata."""
+    from .images import normalize_thumbnail
 
-    # if frontend sends base64 string
-    if isinstance(file_data, str) and file_data.startswith("data:"):
-        base64_data = file_data.split(",", 1)[1]
-        image_bytes = base64.b64decode(base64_data)
-    else:
-        image_bytes = file_data
+    client = get_imagekit_client()
+    image_bytes, extension = normalize_thumbnail(file_data)
 
     response = client.files.upload(
-        file=image_bytes, file_name=file_name, folder="thumbnails"
+        file=image_bytes, file_name=_with_extension(file_name, extension), folder="thumbnails"
     )
 
     return {"file_id": response.file_id, "url": response.url}
 
 
-def upload_profile_photo(file_data: bytes, file_name: str = "profile.jpg") -> dict:
+def upload_profile_photo(file_data, file_name: str = "profile.jpg") -> dict:
+    from .images import normalize_profile_photo
+
     client = get_imagekit_client()
-    response = client.files.upload(file=file_data, file_name=file_name, folder="profiles")
+    image_bytes, extension = normalize_profile_photo(file_data)
+    response = client.files.upload(
+        file=image_bytes, file_name=_with_extension(file_name, extension), folder="profiles"
+    )
     return {"file_id": response.file_id, "url": response.url}
+
+
+def _with_extension(file_name: str, extension) -> str:
+    if not extension:
+        return file_name
+    return f"{os.path.splitext(file_name)[0]}.{extension}"
+
+
+class ImageKitStorage(MediaStorage):
+    max_bulk_delete = MAX_BULK_DELETE
+    max_list_page = MAX_LIST_PAGE
+
+    def upload_video(self, file_data, file_name="video.mp4"):
+        return upload_video(file_data, file_name)
+
+    def upload_thumbnail(self, file_data, file_name="thumbnail.jpg"):
+        return upload_thumbnail(file_data, file_name)
+
+    def upload_profile_photo(self, file_data, file_name="profile.jpg"):
+        return upload_profile_photo(file_data, file_name)
+
+    def delete_files(self, file_ids):
+        return delete_files(file_ids)
+
+    def list_files(self, folder, skip=0, limit=None):
+        return list_files(folder, skip=skip, limit=limit or MAX_LIST_PAGE)
@@ -0,0 +1,102 @@
+import base64
+import io
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Longest edges of the stored images; smaller renditions come from ImageKit
+# transforms (see imagekit_client.get_srcset).
+THUMBNAIL_SIZE = (1280, 720)
+PROFILE_PHOTO_SIZE = (256, 256)
+
+MAX_SOURCE_BYTES = 20 * 1024 * 1024
+MAX_SOURCE_PIXELS = 50_000_000
+WEBP_QUALITY = 80
+JPEG_QUALITY = 85
+CHUNK_SIZE = 64 * 1024
+SPOOL_MAX_SIZE = 1024 * 1024
+
+# Decoding and resizing are CPU and memory heavy; cap how many run at once
+# across request threads.
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("IMAGE_WORKERS", "2")), thread_name_prefix="images"
+)
+
+
+def normalize_thumbnail(source):
+    return _executor.submit(_normalize, source, THUMBNAIL_SIZE, False).result()
+
+
+def normalize_profile_photo(source):
+    return _executor.submit(_normalize, source, PROFILE_PHOTO_SIZE, True).result()
+
+
+def _normalize(source, size, crop):
+    """Return ``(data, extension)`` for a resized, metadata-free image.
+
+    ``source`` may be bytes, a ``data:`` URL or an uploaded file. Without
+    Pillow the decoded original is returned unchanged.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as spool:
+        _spool_source(source, spool)
+        spool.seek(0)
+        try:
+            from PIL import Image, ImageOps, features
+        except ImportError:
+            return spool.read(), None
+
+        try:
+            image = Image.open(spool)
+        except Image.DecompressionBombError as exc:
+            raise ValueError("Image is too large.") from exc
+        except (Image.UnidentifiedImageError, OSError) as exc:
+            raise ValueError("Unsupported image file.") from exc
+        # Only the header has been read so far.
+        width, height = image.size
+        if width * height > MAX_SOURCE_PIXELS:
+            raise ValueError(f"Image is too large ({width}x{height}).")
+
+        # JPEGs can be decoded at 1/2, 1/4 or 1/8 scale, which is much
+        # cheaper than decoding a full phone photo and shrinking it.
+        image.draft("RGB", size)
+        image = ImageOps.exif_transpose(image)
+        if crop:
+            image = ImageOps.fit(image, size, Image.Resampling.LANCZOS)
+        else:
+            image = ImageOps.contain(image, size, Image.Resampling.LANCZOS)
+
+        output = io.BytesIO()
+        # Saving without exif/icc/xmp arguments drops the source metadata.
+        if features.check("webp"):
+            image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+            image.save(output, "WEBP", quality=WEBP_QUALITY, method=4)
+            return output.getvalue(), "webp"
+        image.convert("RGB").save(output, "JPEG", quality=JPEG_QUALITY, optimize=True)
+        return output.getvalue(), "jpg"
+
+
+def _spool_source(source, spool):
+    total = 0
+    for chunk in _iter_source(source):
+        total += len(chunk)
+        if total > MAX_SOURCE_BYTES:
+            raise ValueError("Image file is too large.")
+        spool.write(chunk)
+
+
+def _iter_source(source):
+    if isinstance(source, str):
+        if not source.startswith("data:"):
+            raise ValueError("Unsupported image data.")
+        encoded = source.split(",", 1)[1]
+        # Decode in slices of whole base64 quanta instead of all at once.
+        step = CHUNK_SIZE // 3 * 4
+        for start in range(0, len(encoded), step):
+            yield base64.b64decode(encoded[start : start + step])
+    elif isinstance(source, (bytes, bytearray)):
+        yield bytes(source)
+    elif hasattr(source, "chunks"):
+        yield from source.chunks(CHUNK_SIZE)
+    else:
+        while chunk := source.read(CHUNK_SIZE):
+            yield chunk
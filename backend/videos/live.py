@@ -0,0 +1,184 @@
+import asyncio
+import json
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+
+FLUSH_SECONDS = 1.0
+KEEPALIVE_SECONDS = 15
+CHANNEL_PREFIX = "videos:live:"
+
+
+class Subscription:
+    """One live viewer. Deltas that arrive between reads are merged, so a
+    slow client gets one combined update instead of a growing backlog."""
+
+    def __init__(self, video_id):
+        self.video_id = video_id
+        self._loop = asyncio.get_running_loop()
+        self._pending = Counter()
+        self._ready = asyncio.Event()
+
+    def push(self, delta):
+        # Called from the flusher thread or a broker listener.
+        try:
+            self._loop.call_soon_threadsafe(self._merge, delta)
+        except RuntimeError:
+            pass
+
+    def _merge(self, delta):
+        self._pending.update(delta)
+        self._ready.set()
+
+    async def get(self, timeout):
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self._ready.clear()
+        delta = {key: value for key, value in self._pending.items() if value}
+        self._pending = Counter()
+        return delta
+
+
+class InProcessBroker:
+    """Fans deltas out to the subscriptions of this process only."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def publish(self, video_id, delta):
+        self._deliver(video_id, delta)
+
+    def subscribe(self, video_id):
+        subscription = Subscription(video_id)
+        with self._lock:
+            self._subscriptions[video_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.video_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.video_id]
+
+    def _deliver(self, video_id, delta):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(video_id, ()))
+        for subscription in subscriptions:
+            subscription.push(delta)
+
+
+class RedisBroker(InProcessBroker):
+    """Relays deltas through Redis pub/sub so every worker process sees them.
+
+    Each process holds one pattern subscription and fans out locally, so the
+    broker sees one connection per worker rather than one per viewer.
+    Requires the `redis` package.
+    """
+
+    def __init__(self, url):
+        super().__init__()
+        self._url = url
+        self._client = None
+        self._listener = None
+
+    def publish(self, video_id, delta):
+        if self._client is None:
+            import redis
+
+            self._client = redis.Redis.from_url(self._url)
+        self._client.publish(f"{CHANNEL_PREFIX}{video_id}", json.dumps(delta))
+
+    def subscribe(self, video_id):
+        subscription = super().subscribe(video_id)
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+        return subscription
+
+    async def _listen(self):
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self._url)
+        pubsub = client.pubsub()
+        await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+        try:
+            async for message in pubsub.listen():
+                if message["type"] != "pmessage":
+                    continue
+                video_id = int(message["channel"].decode().rsplit(":", 1)[1])
+                self._deliver(video_id, json.loads(message["data"]))
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+
+class CounterCoalescer:
+    """Collects counter deltas from request handlers and publishes each
+    video's combined delta at most once per ``interval`` seconds."""
+
+    def __init__(self, broker, interval=FLUSH_SECONDS):
+        self.broker = broker
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pending = defaultdict(Counter)
+        self._thread = None
+
+    def add(self, video_id, **deltas):
+        with self._lock:
+            self._pending[video_id].update(deltas)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="live-counters", daemon=True
+                )
+                self._thread.start()
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, defaultdict(Counter)
+        for video_id, counter in batch.items():
+            delta = {key: value for key, value in counter.items() if value}
+            if delta:
+                try:
+                    self.broker.publish(video_id, delta)
+                except Exception:
+                    # Live counters are best effort; the next page load is exact.
+                    pass
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+
+def _build_broker():
+    url = getattr(settings, "LIVE_BROKER_URL", "")
+    return RedisBroker(url) if url else InProcessBroker()
+
+
+broker = _build_broker()
+live_counters = CounterCoalescer(broker)
+
+
+def publish_counters(video_id, **deltas):
+    live_counters.add(video_id, **deltas)
+
+
+async def stream_counter_events(video_id):
+    """Server-sent events with coalesced counter deltas for one video."""
+    subscription = broker.subscribe(video_id)
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            delta = await subscription.get(timeout=KEEPALIVE_SECONDS)
+            if delta:
+                yield f"event: counters\ndata: {json.dumps(delta)}\n\n"
+            else:
+                yield ": keep-alive\n\n"
+    finally:
+        broker.unsubscribe(subscription)
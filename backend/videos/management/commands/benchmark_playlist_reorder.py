@@ -0,0 +1,111 @@
+import random
+import statistics
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Max
+from django.db.models.functions import Length
+
+from videos.models import Playlist, PlaylistItem, Video
+from videos.playlists import append_videos, move_item
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark reordering playlists of growing size: moving one item with "
+        "fractional position keys (a single-row UPDATE) against renumbering, "
+        "which rewrites every row between the old and new slot as integer "
+        "positions would. Runs on the configured database inside a "
+        "transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="100,1000,5000")
+        parser.add_argument("--moves", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options["sizes"].split(",")]
+        rng = random.Random(options["seed"])
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(username=f"benchmark-{uuid.uuid4().hex[:12]}")
+                video_ids = [
+                    video.id
+                    for video in Video.objects.bulk_create(
+                        Video(
+                            user=user,
+                            title=f"Benchmark {index}",
+                            file_id=f"benchmark-{index}",
+                            Video_url="https://example.com/benchmark.mp4",
+                        )
+                        for index in range(max(sizes))
+                    )
+                ]
+                for size in sizes:
+                    result = _measure(user, video_ids[:size], options["moves"], rng)
+                    self.stdout.write(_format(size, result))
+                raise _Rollback
+        except _Rollback:
+            pass
+
+
+def _measure(user, video_ids, moves, rng):
+    playlist = Playlist.objects.create(user=user, title="Benchmark")
+    for start in range(0, len(video_ids), 500):
+        append_videos(playlist, video_ids[start : start + 500])
+    order = list(playlist.items.order_by("position").values_list("id", flat=True))
+
+    result = {"fractional_ms": [], "renumber_ms": [], "renumber_rows": []}
+    for _ in range(moves):
+        old_index = rng.randrange(len(order))
+        item_id = order.pop(old_index)
+        new_index = rng.randrange(len(order) + 1)
+        after_id = order[new_index - 1] if new_index else None
+        order.insert(new_index, item_id)
+
+        started = time.perf_counter()
+        move_item(playlist, PlaylistItem(id=item_id), after_id)
+        result["fractional_ms"].append((time.perf_counter() - started) * 1000)
+
+        # The same move under integer positions shifts every row between
+        # the two slots; look the range up and rewrite it through the same
+        # index.
+        low, high = sorted((old_index, new_index))
+        started = time.perf_counter()
+        first, last = (
+            playlist.items.filter(id=order[index]).values_list("position", flat=True).get()
+            for index in (low, high)
+        )
+        rows = playlist.items.filter(position__gte=first, position__lte=last).update(
+            added_at=F("added_at")
+        )
+        result["renumber_ms"].append((time.perf_counter() - started) * 1000)
+        result["renumber_rows"].append(rows)
+
+    result["longest_key"] = playlist.items.aggregate(longest=Max(Length("position")))["longest"]
+    return result
+
+
+def _format(size, result):
+    fractional = sorted(result["fractional_ms"])
+    renumber = sorted(result["renumber_ms"])
+    return (
+        "{:>6,} items  fractional ms p50 {:.2f} p99 {:.2f} (1 row)  "
+        "renumber ms p50 {:.2f} p99 {:.2f} ({:,.0f} rows avg)  longest key {}".format(
+            size,
+            fractional[len(fractional) // 2],
+            fractional[int(len(fractional) * 0.99)],
+            renumber[len(renumber) // 2],
+            renumber[int(len(renumber) * 0.99)],
+            statistics.fmean(result["renumber_rows"]),
+            result["longest_key"],
+        )
+    )
@@ -0,0 +1,103 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from videos.cards import fragments, video_card
+from videos.models import Video
+from videos.renderers import ORJSONRenderer
+from videos.views import _serialize_video
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark serialization CPU per page of video cards: dicts rendered by "
+        "DRF's JSONRenderer against pre-encoded card fragments rendered by "
+        "orjson, cold and warm. Uses synthetic videos and does not touch the "
+        "database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, default=12)
+        parser.add_argument("--pages", type=int, default=1_000)
+
+    def handle(self, *args, **options):
+        page_size = options["page_size"]
+        now = timezone.now()
+        pages = [
+            [
+                _video(page * page_size + index, now - timedelta(minutes=page * page_size + index))
+                for index in range(page_size)
+            ]
+            for page in range(options["pages"])
+        ]
+
+        def stdlib(page):
+            return JSONRenderer().render(
+                {
+                    "results": [
+                        _serialize_video(video, None, subscriber_count=100, is_subscribed=False)
+                        for video in page
+                    ]
+                }
+            )
+
+        def cards(page):
+            return ORJSONRenderer().render(
+                {
+                    "results": [
+                        video_card(video, subscriber_count=100, is_subscribed=False)
+                        for video in page
+                    ]
+                }
+            )
+
+        fragments.clear()
+        results = [
+            ("dicts + JSONRenderer", _time_pages(stdlib, pages)),
+            ("cards, cold cache", _time_pages(cards, pages)),
+            ("cards, warm cache", _time_pages(cards, pages)),
+        ]
+
+        self.stdout.write(f"pages: {len(pages):,} x {page_size} cards")
+        for label, timings in results:
+            self.stdout.write(
+                "{:<22} us/page: p50 {:.0f}  p99 {:.0f}  mean {:.0f}".format(
+                    label,
+                    timings[len(timings) // 2],
+                    timings[int(len(timings) * 0.99)],
+                    statistics.fmean(timings),
+                )
+            )
+
+
+def _video(index, created_at):
+    video = Video(
+        id=index + 1,
+        user=User(id=index % 500 + 1, username=f"channel_{index % 500}"),
+        title=f"Synthetic video number {index}",
+        description="A description long enough to look like a real one. " * 3,
+        file_id=f"file_{index}",
+        Video_url=f"https://ik.imagekit.io/demo/videos/video_{index}.mp4",
+        width=1920,
+        height=1080,
+        bitrate=4_000_000,
+        views=index * 7,
+        likes=index,
+    )
+    video.created_at = video.updated_at = created_at
+    return video
+
+
+def _time_pages(render, pages):
+    timings = []
+    for page in pages:
+        started = time.perf_counter()
+        render(page)
+        timings.append((time.perf_counter() - started) * 1_000_000)
+    timings.sort()
+    return timings
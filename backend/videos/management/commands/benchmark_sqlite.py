@@ -0,0 +1,154 @@
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+from backend.sqlite import tune_sqlite
+
+ALIAS = "sqlite_benchmark"
+VIDEOS = 1_000
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark concurrent view counting on a scratch SQLite file: reader "
+        "threads select counters while writer threads update them and log "
+        "views, first with the stock backend and then with the tuned one "
+        "(WAL, pragmas, BEGIN IMMEDIATE, writer queue). Reports throughput "
+        "and 'database is locked' errors."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--readers", type=int, default=8)
+        parser.add_argument("--writers", type=int, default=8)
+        parser.add_argument("--seconds", type=float, default=5.0)
+        parser.add_argument(
+            "--busy-timeout",
+            type=float,
+            default=settings.SQLITE_BUSY_TIMEOUT_SECONDS,
+            help="Seconds a connection waits on a locked database (both modes).",
+        )
+
+    def handle(self, *args, **options):
+        for label in ("stock", "tuned"):
+            with tempfile.TemporaryDirectory() as directory:
+                config = {
+                    "ENGINE": "django.db.backends.sqlite3",
+                    "NAME": os.path.join(directory, "benchmark.sqlite3"),
+                    "OPTIONS": {"timeout": options["busy_timeout"]},
+                }
+                if label == "tuned":
+                    config = tune_sqlite(
+                        config,
+                        options["busy_timeout"],
+                        settings.SQLITE_MMAP_SIZE,
+                        settings.SQLITE_CACHE_SIZE_KIB,
+                    )
+                _register(config)
+                try:
+                    result = _run(options["readers"], options["writers"], options["seconds"])
+                finally:
+                    connections[ALIAS].close()
+                    del connections[ALIAS]
+                    del connections.settings[ALIAS]
+            self.stdout.write(_format(label, result, options["seconds"]))
+
+
+def _register(config):
+    configured = connections.configure_settings(
+        {DEFAULT_DB_ALIAS: settings.DATABASES[DEFAULT_DB_ALIAS], ALIAS: config}
+    )
+    connections.settings[ALIAS] = configured[ALIAS]
+    with connections[ALIAS].cursor() as cursor:
+        cursor.execute("CREATE TABLE video (id INTEGER PRIMARY KEY, views INTEGER NOT NULL)")
+        cursor.execute(
+            "CREATE TABLE video_view (id INTEGER PRIMARY KEY, video_id INTEGER NOT NULL, "
+            "viewed_at REAL NOT NULL)"
+        )
+        cursor.execute("CREATE INDEX video_view_video ON video_view (video_id)")
+        cursor.executemany(
+            "INSERT INTO video (id, views) VALUES (%s, 0)", [(i,) for i in range(VIDEOS)]
+        )
+
+
+def _run(readers, writers, seconds):
+    stop = threading.Event()
+    lock = threading.Lock()
+    result = {"reads": 0, "writes": 0, "errors": 0, "write_ms": []}
+
+    def read():
+        rng = random.Random()
+        reads = errors = 0
+        with connections[ALIAS].cursor() as cursor:
+            while not stop.is_set():
+                video_id = rng.randrange(VIDEOS)
+                try:
+                    cursor.execute("SELECT views FROM video WHERE id = %s", [video_id])
+                    cursor.fetchone()
+                    cursor.execute(
+                        "SELECT COUNT(*) FROM video_view WHERE video_id = %s", [video_id]
+                    )
+                    cursor.fetchone()
+                    reads += 1
+                except OperationalError:
+                    errors += 1
+        connections[ALIAS].close()
+        with lock:
+            result["reads"] += reads
+            result["errors"] += errors
+
+    def write():
+        rng = random.Random()
+        writes = errors = 0
+        timings = []
+        while not stop.is_set():
+            video_id = rng.randrange(VIDEOS)
+            started = time.perf_counter()
+            try:
+                with transaction.atomic(using=ALIAS), connections[ALIAS].cursor() as cursor:
+                    cursor.execute("UPDATE video SET views = views + 1 WHERE id = %s", [video_id])
+                    cursor.execute(
+                        "INSERT INTO video_view (video_id, viewed_at) VALUES (%s, %s)",
+                        [video_id, time.time()],
+                    )
+                writes += 1
+                timings.append((time.perf_counter() - started) * 1000)
+            except OperationalError:
+                errors += 1
+        connections[ALIAS].close()
+        with lock:
+            result["writes"] += writes
+            result["errors"] += errors
+            result["write_ms"] += timings
+
+    threads = [threading.Thread(target=read) for _ in range(readers)]
+    threads += [threading.Thread(target=write) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return result
+
+
+def _format(label, result, seconds):
+    timings = sorted(result["write_ms"]) or [0.0]
+    return (
+        "{:<6} reads/s {:>8,.0f}  writes/s {:>7,.0f}  errors {:>5,}  "
+        "write ms p50 {:.2f}  p99 {:.2f}  mean {:.2f}".format(
+            label,
+            result["reads"] / seconds,
+            result["writes"] / seconds,
+            result["errors"],
+            timings[len(timings) // 2],
+            timings[int(len(timings) * 0.99)],
+            statistics.fmean(timings),
+        )
+    )
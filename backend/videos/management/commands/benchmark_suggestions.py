@@ -0,0 +1,95 @@
+import random
+import statistics
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from videos.suggestions import CHANNEL, VIDEO, SuggestionIndex, normalize
+
+WORDS = (
+    "how to make best easy quick guide review top ultimate first look live "
+    "music video official trailer game play tutorial beginner advanced daily "
+    "vlog travel cooking recipe football highlights news update python django "
+    "react piano guitar lesson workout morning routine unboxing reaction"
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the suggestion index on synthetic titles: build time, memory "
+        "held by the index and lookup latency for random prefixes. Runs in "
+        "memory only and does not touch the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--titles", type=int, default=1_000_000)
+        parser.add_argument("--channels", type=int, default=20_000)
+        parser.add_argument("--queries", type=int, default=2_000)
+        parser.add_argument("--limit", type=int, default=10)
+        parser.add_argument("--seed", type=int, default=7)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        titles = [
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 8))).title() + f" #{index}"
+            for index in range(options["titles"])
+        ]
+        channels = [f"channel_{index}" for index in range(options["channels"])]
+
+        started = time.perf_counter()
+        entries = [
+            # Heavy-tailed view counts, like real catalogues.
+            (normalize(title), title, VIDEO, index + 1, int(rng.paretovariate(1.2) * 100))
+            for index, title in enumerate(titles)
+        ]
+        entries += [
+            (normalize(name), name, CHANNEL, 0, int(rng.paretovariate(1.2) * 10_000))
+            for name in channels
+        ]
+        index = SuggestionIndex()
+        index.load(entries, channels)
+        del entries
+        build_seconds = time.perf_counter() - started
+
+        queries = []
+        for _ in range(options["queries"]):
+            source = rng.choice(titles) if rng.random() < 0.9 else rng.choice(channels)
+            queries.append(source[: rng.randint(1, 12)])
+
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            index.lookup(query, options["limit"])
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+
+        self.stdout.write(f"entries: {options['titles'] + options['channels']:,}")
+        self.stdout.write(f"build: {build_seconds:.1f}s")
+        self.stdout.write(f"index memory: {_index_size(index._main) / 1024 / 1024:.0f} MiB")
+        self.stdout.write(
+            "lookup ms: p50 {:.3f}  p99 {:.3f}  max {:.3f}  mean {:.3f}".format(
+                timings[len(timings) // 2],
+                timings[int(len(timings) * 0.99)],
+                timings[-1],
+                statistics.fmean(timings),
+            )
+        )
+
+
+def _index_size(prefix_index):
+    """Bytes held by the index, counting each key and display string once."""
+    size = sum(
+        sys.getsizeof(part)
+        for part in (
+            prefix_index.keys,
+            prefix_index.texts,
+            prefix_index.kinds,
+            prefix_index.ref_ids,
+            prefix_index.weights,
+            prefix_index._tree,
+        )
+    )
+    strings = {id(text): text for text in prefix_index.keys}
+    strings.update((id(text), text) for text in prefix_index.texts)
+    return size + sum(sys.getsizeof(text) for text in strings.values())
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the related-videos table from co-watch and like co-occurrence. "
+        "Needs numpy and scipy; run it offline, e.g. nightly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top-k", type=int, default=20, help="Neighbours stored per video.")
+        parser.add_argument(
+            "--max-history",
+            type=int,
+            default=200,
+            help="Most recent watches used per user.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            from videos.recommendations import build_related_videos
+        except ImportError as exc:
+            raise CommandError(f"numpy and scipy are required: {exc}") from exc
+
+        videos = build_related_videos(
+            top_k=options["top_k"], max_history=options["max_history"]
+        )
+        self.stdout.write(f"Stored related videos for {videos} videos")
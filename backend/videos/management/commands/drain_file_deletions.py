@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from videos.file_cleanup import drain_file_deletions
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete remote ImageKit files queued in the deletion outbox, in bulk "
+        "batches. Failed deletes are retried later with exponential backoff."
+    )
+
+    def handle(self, *args, **options):
+        deleted, kept, failed = drain_file_deletions()
+        self.stdout.write(
+            f"Deleted {deleted} files, kept {kept} still in use, {failed} will be retried"
+        )
@@ -0,0 +1,126 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from videos.feed import rank_home_feed
+from videos.models import ChannelSubscription, Video, WatchHistory
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Offline evaluation of the home feed on a synthetic dataset. Users have "
+        "topic preferences; each user's latest watch is held out and recall@K "
+        "of the ranked feed is compared with a newest-first baseline. Everything "
+        "runs in a transaction that is rolled back. Use a development database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=300)
+        parser.add_argument("--channels", type=int, default=40)
+        parser.add_argument("--videos", type=int, default=600)
+        parser.add_argument("--topics", type=int, default=8)
+        parser.add_argument("--watches", type=int, default=15, help="Watches per user.")
+        parser.add_argument("-k", type=int, default=24, help="Cut-off for recall@K.")
+        parser.add_argument("--seed", type=int, default=7)
+
+    def handle(self, *args, **options):
+        try:
+            from videos.recommendations import build_related_videos
+        except ImportError as exc:
+            raise CommandError(f"numpy and scipy are required: {exc}") from exc
+
+        rng = random.Random(options["seed"])
+        try:
+            with transaction.atomic():
+                users, held_out = self._build_dataset(rng, options)
+                build_related_videos()
+                self._report(users, held_out, options["k"])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _build_dataset(self, rng, options):
+        now = timezone.now()
+        prefix = f"feed-eval-{rng.randrange(10**9)}"
+        channels = User.objects.bulk_create(
+            [User(username=f"{prefix}-channel-{i}") for i in range(options["channels"])]
+        )
+        channel_topics = {channel.id: i % options["topics"] for i, channel in enumerate(channels)}
+        videos = Video.objects.bulk_create(
+            [
+                Video(
+                    user=rng.choice(channels),
+                    title=f"Synthetic video {i}",
+                    file_id=f"{prefix}-{i}",
+                    Video_url=f"https://example.invalid/{prefix}/{i}.mp4",
+                )
+                for i in range(options["videos"])
+            ]
+        )
+        # Spread upload times over the last 60 days.
+        for video in videos:
+            video.created_at = now - timedelta(hours=rng.randrange(60 * 24))
+        Video.objects.bulk_update(videos, ["created_at"])
+
+        videos_by_topic = {}
+        for video in videos:
+            videos_by_topic.setdefault(channel_topics[video.user_id], []).append(video)
+
+        users = User.objects.bulk_create(
+            [User(username=f"{prefix}-user-{i}") for i in range(options["users"])]
+        )
+        subscriptions, history, held_out = [], [], {}
+        for user in users:
+            topics = rng.sample(range(options["topics"]), 2)
+            favourite_channels = [c for c in channels if channel_topics[c.id] in topics]
+            for channel in rng.sample(favourite_channels, min(2, len(favourite_channels))):
+                subscriptions.append(ChannelSubscription(subscriber=user, channel=channel))
+
+            watched = []
+            while len(watched) < options["watches"]:
+                # Mostly on-topic viewing with some exploration.
+                pool = videos_by_topic[rng.choice(topics)] if rng.random() < 0.85 else videos
+                video = rng.choice(pool)
+                if video not in watched:
+                    watched.append(video)
+            held_out[user.id] = watched[-1].id
+            history.extend(WatchHistory(user=user, video=video) for video in watched[:-1])
+
+        ChannelSubscription.objects.bulk_create(subscriptions)
+        WatchHistory.objects.bulk_create(history)
+        return users, held_out
+
+    def _report(self, users, held_out, k):
+        newest = list(Video.objects.order_by("-created_at").values_list("id", flat=True))
+        watched_by_user = {}
+        for user_id, video_id in WatchHistory.objects.filter(user__in=users).values_list(
+            "user_id", "video_id"
+        ):
+            watched_by_user.setdefault(user_id, set()).add(video_id)
+
+        feed_hits = baseline_hits = 0
+        max_queries = 0
+        for user in users:
+            with CaptureQueriesContext(connection) as queries:
+                feed = rank_home_feed(user)
+            max_queries = max(max_queries, len(queries))
+            watched = watched_by_user.get(user.id, set())
+            baseline = [video_id for video_id in newest if video_id not in watched]
+
+            feed_hits += held_out[user.id] in feed[:k]
+            baseline_hits += held_out[user.id] in baseline[:k]
+
+        total = len(users)
+        self.stdout.write(f"users evaluated: {total}")
+        self.stdout.write(f"home feed recall@{k}: {feed_hits / total:.3f}")
+        self.stdout.write(f"newest-first recall@{k}: {baseline_hits / total:.3f}")
+        self.stdout.write(f"max queries per feed build: {max_queries}")
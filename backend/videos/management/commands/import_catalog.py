@@ -0,0 +1,44 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from videos.catalog import IMPORT_BATCH_SIZE, CatalogImporter
+from videos.counters import rebuild_channel_stats, reconcile_comment_counts
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a JSONL catalog of users, videos, comments and subscriptions "
+        "with batched inserts. Video files must already be hosted; records carry "
+        "their file_id and url. Users must appear before the records that use them. "
+        "Rejected records are skipped and listed with their line numbers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="JSONL file, or - for stdin.")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        importer = CatalogImporter(batch_size=options["batch_size"])
+        if options["path"] == "-":
+            stats = importer.feed(sys.stdin)
+        else:
+            try:
+                with open(options["path"], encoding="utf-8") as catalog:
+                    stats = importer.feed(catalog)
+            except OSError as exc:
+                raise CommandError(str(exc)) from exc
+
+        # Bulk inserts bypass the views that keep these counters current.
+        reconcile_comment_counts()
+        rebuild_channel_stats()
+        self.stdout.write(
+            ", ".join(
+                f"{stats[key]} {key}"
+                for key in ("users", "videos", "comments", "subscriptions", "skipped", "invalid")
+            )
+        )
+        for line_number, reason in importer.errors:
+            self.stderr.write(f"line {line_number}: {reason}")
+        if importer.rejected > len(importer.errors):
+            self.stderr.write(f"... and {importer.rejected - len(importer.errors)} more")
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from videos.startup import measure_startup
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure cold start in a fresh interpreter: django.setup() time, URLconf "
+        "load time and the slowest imports. With --budget-ms, fail when startup "
+        "takes longer."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=20)
+        parser.add_argument(
+            "--depth",
+            type=int,
+            default=0,
+            help="Nesting depth of imports to list; 0 lists top-level imports only.",
+        )
+        parser.add_argument("--budget-ms", type=float)
+
+    def handle(self, *args, **options):
+        report = measure_startup()
+        setup_ms = report["setup_seconds"] * 1000
+        urls_ms = report["urls_seconds"] * 1000
+
+        self.stdout.write(f"django.setup(): {setup_ms:.0f} ms")
+        self.stdout.write(f"URLconf and views: {urls_ms:.0f} ms")
+        self.stdout.write(f"modules loaded: {len(report['modules']):,}")
+
+        imports = sorted(
+            (row for row in report["imports"] if row[3] <= options["depth"]),
+            key=lambda row: row[2],
+            reverse=True,
+        )
+        self.stdout.write("slowest imports (cumulative ms, self ms):")
+        for name, self_us, cumulative_us, depth in imports[: options["top"]]:
+            self.stdout.write(
+                f"  {cumulative_us / 1000:8.1f} {self_us / 1000:7.1f}  {'  ' * depth}{name}"
+            )
+
+        if report["heavy_modules"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    "heavy modules imported at startup: " + ", ".join(report["heavy_modules"])
+                )
+            )
+
+        budget_ms = options["budget_ms"]
+        if budget_ms is not None and setup_ms + urls_ms > budget_ms:
+            raise CommandError(
+                f"Startup took {setup_ms + urls_ms:.0f} ms, over the {budget_ms:.0f} ms budget."
+            )
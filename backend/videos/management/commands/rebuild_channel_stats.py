@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from videos.counters import rebuild_channel_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the materialized ChannelStats rows (video count, views, likes, "
+        "subscribers, last upload) from videos and subscriptions."
+    )
+
+    def handle(self, *args, **options):
+        channels = rebuild_channel_stats()
+        self.stdout.write(f"Rebuilt stats for {channels} channels")
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from videos.counters import reconcile_comment_counts
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the denormalized Video.comment_count and Comment.reply_count "
+        "columns from the comments table and fix any that drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report drift.")
+
+    def handle(self, *args, **options):
+        videos, comments = reconcile_comment_counts(dry_run=options["dry_run"])
+        verb = "Found" if options["dry_run"] else "Fixed"
+        self.stdout.write(f"{verb} {videos} video comment counts, {comments} reply counts")
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from videos.file_cleanup import REMOTE_FOLDERS, find_orphaned_files
+from videos.models import PendingFileDeletion
+
+ENQUEUE_BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        "Page through remote ImageKit folders and report files that no video or "
+        "profile references. With --delete, orphans are queued for the deletion "
+        "worker (`manage.py drain_file_deletions`)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--folder",
+            action="append",
+            choices=REMOTE_FOLDERS,
+            help="Folder to check; repeat for several. Defaults to all of them.",
+        )
+        parser.add_argument(
+            "--delete",
+            action="store_true",
+            help="Queue orphaned files for deletion instead of only reporting them.",
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        for folder in options["folder"] or REMOTE_FOLDERS:
+            batch = []
+            for item in find_orphaned_files(folder):
+                total += 1
+                self.stdout.write(f"orphan {folder}: {item['file_id']} {item['url']}")
+                if not options["delete"]:
+                    continue
+                batch.append(item["file_id"])
+                if len(batch) >= ENQUEUE_BATCH_SIZE:
+                    PendingFileDeletion.enqueue(*batch)
+                    batch = []
+            if batch:
+                PendingFileDeletion.enqueue(*batch)
+
+        action = "queued for deletion" if options["delete"] else "found"
+        self.stdout.write(f"{total} orphaned files {action}")
@@ -0,0 +1,49 @@
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+from django.utils import timezone
+
+from videos.models import VideoDailyStats
+from videos.rollups import prune_video_views, rollup_day
+
+
+class Command(BaseCommand):
+    help = (
+        "Roll up daily video and channel stats since the last rolled-up day, "
+        "then prune legacy VideoView rows past the retention window. "
+        "Run it periodically (e.g. hourly) to keep today's figures fresh."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            help="First day to (re)compute, as YYYY-MM-DD. Defaults to the last rolled-up day.",
+        )
+        parser.add_argument(
+            "--retention-days",
+            type=int,
+            default=settings.VIDEO_VIEW_RETENTION_DAYS,
+            help="Delete legacy VideoView rows older than this many days (0 keeps them).",
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        if options["since"]:
+            try:
+                day = date.fromisoformat(options["since"])
+            except ValueError as exc:
+                raise CommandError(f"Invalid --since date: {exc}") from exc
+        else:
+            day = VideoDailyStats.objects.aggregate(last=Max("day"))["last"] or today
+
+        while day <= today:
+            videos = rollup_day(day)
+            self.stdout.write(f"{day}: rolled up {videos} videos")
+            day += timedelta(days=1)
+
+        if options["retention_days"] > 0:
+            cutoff = timezone.now() - timedelta(days=options["retention_days"])
+            deleted = prune_video_views(cutoff)
+            self.stdout.write(f"Pruned {deleted} view records older than {cutoff:%Y-%m-%d}")
@@ -0,0 +1,232 @@
+import math
+import struct
+
+# ISO BMFF (MP4/MOV) boxes that only contain other boxes.
+MP4_CONTAINER_BOXES = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+
+# Matroska/WebM element ids.
+EBML_HEADER = 0x1A45DFA3
+EBML_SEGMENT = 0x18538067
+EBML_INFO = 0x1549A966
+EBML_TIMECODE_SCALE = 0x2AD7B1
+EBML_DURATION = 0x4489
+EBML_TRACKS = 0x1654AE6B
+EBML_TRACK_ENTRY = 0xAE
+EBML_TRACK_TYPE = 0x83
+EBML_CODEC_ID = 0x86
+EBML_VIDEO = 0xE0
+EBML_PIXEL_WIDTH = 0xB0
+EBML_PIXEL_HEIGHT = 0xBA
+EBML_CLUSTER = 0x1F43B675
+EBML_VIDEO_TRACK = 1
+
+# Damaged headers can claim near-zero durations; no real upload exceeds this.
+MAX_BITRATE = 1_000_000_000
+
+
+def probe_media(file_obj, file_size=None):
+    """Read duration, resolution, bitrate and codec from a video container.
+
+    Only the container headers are read; media data is skipped with seeks.
+    Returns a dict with ``duration``, ``width``, ``height``, ``bitrate`` and
+    ``codec`` keys, any of which may be None when the format is unknown or
+    the header is damaged. The file position is restored afterwards.
+    """
+    metadata = {"duration": None, "width": None, "height": None, "bitrate": None, "codec": None}
+    start = file_obj.tell()
+    try:
+        if file_size is None:
+            file_obj.seek(0, 2)
+            file_size = file_obj.tell() - start
+            file_obj.seek(start)
+
+        head = file_obj.read(12)
+        file_obj.seek(start)
+        if head[4:8] in (b"ftyp", b"moov", b"mdat", b"wide", b"free", b"skip"):
+            _probe_mp4(file_obj, start, start + file_size, metadata)
+        elif head[:4] == struct.pack(">I", EBML_HEADER):
+            _probe_ebml(file_obj, start + file_size, metadata)
+    except (struct.error, ValueError, OSError, IndexError):
+        pass
+    finally:
+        file_obj.seek(start)
+
+    duration = metadata["duration"]
+    if duration is None or not (math.isfinite(duration) and duration > 0):
+        metadata["duration"] = None
+    elif file_size:
+        metadata["bitrate"] = min(int(file_size * 8 / duration), MAX_BITRATE)
+    return metadata
+
+
+# -------------------------
+# MP4 / MOV
+# -------------------------
+def _iter_mp4_boxes(file_obj, start, end):
+    position = start
+    while position + 8 <= end:
+        file_obj.seek(position)
+        header = file_obj.read(8)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack(">I4s", header)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack(">Q", file_obj.read(8))[0]
+            header_size = 16
+        elif size == 0:
+            size = end - position
+        if size < header_size:
+            return
+        yield box_type, position + header_size, position + size
+        position += size
+
+
+def _probe_mp4(file_obj, start, end, metadata):
+    for box_type, body_start, body_end in _iter_mp4_boxes(file_obj, start, end):
+        if box_type == b"moov":
+            _probe_mp4_moov(file_obj, body_start, body_end, metadata)
+            return
+
+
+def _probe_mp4_moov(file_obj, start, end, metadata):
+    for box_type, body_start, body_end in _iter_mp4_boxes(file_obj, start, end):
+        if box_type == b"mvhd":
+            file_obj.seek(body_start)
+            version = file_obj.read(4)[0]
+            if version == 1:
+                timescale, duration = struct.unpack(">16xIQ", file_obj.read(28))
+            else:
+                timescale, duration = struct.unpack(">8xII", file_obj.read(16))
+            if timescale:
+                metadata["duration"] = duration / timescale
+        elif box_type == b"trak":
+            track = {}
+            _probe_mp4_track(file_obj, body_start, body_end, track)
+            if track.get("handler") == b"vide" and metadata["width"] is None:
+                metadata["width"] = track.get("width")
+                metadata["height"] = track.get("height")
+                metadata["codec"] = track.get("codec")
+
+
+def _probe_mp4_track(file_obj, start, end, track):
+    for box_type, body_start, body_end in _iter_mp4_boxes(file_obj, start, end):
+        if box_type in MP4_CONTAINER_BOXES:
+            _probe_mp4_track(file_obj, body_start, body_end, track)
+        elif box_type == b"tkhd":
+            # Width and height are 16.16 fixed point at the end of the box.
+            file_obj.seek(body_end - 8)
+            width, height = struct.unpack(">II", file_obj.read(8))
+            track["width"] = width >> 16
+            track["height"] = height >> 16
+        elif box_type == b"hdlr":
+            file_obj.seek(body_start + 8)
+            track["handler"] = file_obj.read(4)
+        elif box_type == b"stsd":
+            # The first sample entry's type is the codec fourcc (avc1, hvc1, vp09, ...).
+            file_obj.seek(body_start + 8 + 4)
+            track["codec"] = file_obj.read(4).decode("ascii", "replace").strip()
+
+
+# -------------------------
+# WebM / Matroska
+# -------------------------
+def _read_vint(file_obj, keep_marker):
+    first = file_obj.read(1)
+    if not first:
+        raise ValueError("Unexpected end of EBML data")
+    first = first[0]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8:
+        raise ValueError("Invalid EBML variable-size integer")
+    value = first if keep_marker else first & (mask - 1)
+    all_ones = value == mask - 1
+    for byte in file_obj.read(length - 1):
+        value = (value << 8) | byte
+        all_ones = all_ones and byte == 0xFF
+    if not keep_marker and all_ones:
+        return None
+    return value
+
+
+def _iter_ebml_elements(file_obj, start, end):
+    position = start
+    while position < end:
+        file_obj.seek(position)
+        element_id = _read_vint(file_obj, keep_marker=True)
+        size = _read_vint(file_obj, keep_marker=False)
+        data_start = file_obj.tell()
+        # Unknown sizes (live-style muxing) run to the end of the parent.
+        data_end = end if size is None else data_start + size
+        yield element_id, data_start, data_end
+        position = data_end
+
+
+def _read_ebml_uint(file_obj, start, end):
+    file_obj.seek(start)
+    return int.from_bytes(file_obj.read(end - start), "big")
+
+
+def _probe_ebml(file_obj, end, metadata):
+    for element_id, data_start, data_end in _iter_ebml_elements(file_obj, file_obj.tell(), end):
+        if element_id == EBML_SEGMENT:
+            _probe_ebml_segment(file_obj, data_start, data_end, metadata)
+            return
+
+
+def _probe_ebml_segment(file_obj, start, end, metadata):
+    timecode_scale = 1_000_000
+    raw_duration = None
+    found_tracks = False
+    for element_id, data_start, data_end in _iter_ebml_elements(file_obj, start, end):
+        if element_id == EBML_INFO:
+            for child_id, child_start, child_end in _iter_ebml_elements(
+                file_obj, data_start, data_end
+            ):
+                if child_id == EBML_TIMECODE_SCALE:
+                    timecode_scale = _read_ebml_uint(file_obj, child_start, child_end)
+                elif child_id == EBML_DURATION:
+                    file_obj.seek(child_start)
+                    fmt = ">d" if child_end - child_start == 8 else ">f"
+                    raw_duration = struct.unpack(fmt, file_obj.read(child_end - child_start))[0]
+        elif element_id == EBML_TRACKS:
+            found_tracks = True
+            for child_id, child_start, child_end in _iter_ebml_elements(
+                file_obj, data_start, data_end
+            ):
+                if child_id == EBML_TRACK_ENTRY and metadata["width"] is None:
+                    _probe_ebml_track(file_obj, child_start, child_end, metadata)
+        elif element_id == EBML_CLUSTER:
+            # Media data starts here; everything we need precedes it.
+            break
+        if found_tracks and raw_duration is not None:
+            break
+
+    if raw_duration:
+        metadata["duration"] = raw_duration * timecode_scale / 1_000_000_000
+
+
+def _probe_ebml_track(file_obj, start, end, metadata):
+    track = {}
+    for element_id, data_start, data_end in _iter_ebml_elements(file_obj, start, end):
+        if element_id == EBML_TRACK_TYPE:
+            track["type"] = _read_ebml_uint(file_obj, data_start, data_end)
+        elif element_id == EBML_CODEC_ID:
+            file_obj.seek(data_start)
+            track["codec"] = file_obj.read(data_end - data_start).decode("ascii", "replace")
+        elif element_id == EBML_VIDEO:
+            for child_id, child_start, child_end in _iter_ebml_elements(
+                file_obj, data_start, data_end
+            ):
+                if child_id == EBML_PIXEL_WIDTH:
+                    track["width"] = _read_ebml_uint(file_obj, child_start, child_end)
+                elif child_id == EBML_PIXEL_HEIGHT:
+                    track["height"] = _read_ebml_uint(file_obj, child_start, child_end)
+    if track.get("type") == EBML_VIDEO_TRACK:
+        metadata["width"] = track.get("width")
+        metadata["height"] = track.get("height")
+        metadata["codec"] = (track.get("codec") or "").strip("\x00")[:32] or None
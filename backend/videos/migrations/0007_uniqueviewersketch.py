@@ -0,0 +1,64 @@
+# Generated by Django 6.0.2 on 2026-10-19 11:23
+
+import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from videos.hyperloglog import HyperLogLog
+
+ALL_TIME = datetime.date(1970, 1, 1)
+
+
+def backfill_sketches(apps, schema_editor):
+    VideoView = apps.get_model("videos", "VideoView")
+    UniqueViewerSketch = apps.get_model("videos", "UniqueViewerSketch")
+
+    def flush(video_id, sketches):
+        UniqueViewerSketch.objects.bulk_create(
+            [
+                UniqueViewerSketch(video_id=video_id, day=day, registers=sketch.to_bytes())
+                for day, sketch in sketches.items()
+            ],
+            batch_size=500,
+        )
+
+    # Views are grouped by video so only one video's sketches are held at a time.
+    current_video_id, sketches = None, {}
+    rows = VideoView.objects.order_by("video_id").values_list(
+        "video_id", "viewer_key", "viewed_at"
+    )
+    for video_id, viewer_key, viewed_at in rows.iterator():
+        if video_id != current_video_id:
+            if sketches:
+                flush(current_video_id, sketches)
+            current_video_id, sketches = video_id, {}
+        for day in (viewed_at.date(), ALL_TIME):
+            sketches.setdefault(day, HyperLogLog()).add(viewer_key)
+    if sketches:
+        flush(current_video_id, sketches)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0006_alter_channelsubscription_id_alter_comment_id_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UniqueViewerSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('registers', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('video', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='viewer_sketches', to='videos.video')),
+            ],
+            options={
+                'ordering': ['-day'],
+                'unique_together': {('video', 'day')},
+            },
+        ),
+        migrations.RunPython(backfill_sketches, migrations.RunPython.noop),
+    ]
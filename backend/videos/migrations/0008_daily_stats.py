@@ -0,0 +1,52 @@
+# Generated by Django 6.0.2 on 2026-10-19 11:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0007_uniqueviewersketch'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChannelDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('unique_viewers', models.PositiveIntegerField(default=0)),
+                ('likes', models.PositiveIntegerField(default=0)),
+                ('dislikes', models.PositiveIntegerField(default=0)),
+                ('comments', models.PositiveIntegerField(default=0)),
+                ('subscribers_gained', models.PositiveIntegerField(default=0)),
+                ('channel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='channel_daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['day'],
+                'unique_together': {('channel', 'day')},
+            },
+        ),
+        migrations.CreateModel(
+            name='VideoDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('views_total', models.PositiveIntegerField(default=0)),
+                ('unique_viewers', models.PositiveIntegerField(default=0)),
+                ('likes', models.PositiveIntegerField(default=0)),
+                ('dislikes', models.PositiveIntegerField(default=0)),
+                ('comments', models.PositiveIntegerField(default=0)),
+                ('video', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='videos.video')),
+            ],
+            options={
+                'ordering': ['day'],
+                'unique_together': {('video', 'day')},
+            },
+        ),
+    ]
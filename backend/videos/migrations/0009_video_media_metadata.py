@@ -0,0 +1,38 @@
+# Generated by Django 6.0.2 on 2026-10-19 11:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0008_daily_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='bitrate',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='codec',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='duration',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.2 on 2026-10-19 11:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0009_video_media_metadata'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='content_sha256',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='file_size',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='video',
+            index=models.Index(fields=['content_sha256', 'file_size'], name='videos_vide_content_259074_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.2 on 2026-10-19 11:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0010_video_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingFileDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_id', models.CharField(max_length=200, unique=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('next_attempt_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['next_attempt_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='thumbnail_file_id',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-19 11:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0011_remote_file_cleanup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedVideo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='videos.video')),
+                ('video', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_entries', to='videos.video')),
+            ],
+            options={
+                'ordering': ['rank'],
+                'unique_together': {('video', 'rank')},
+            },
+        ),
+    ]
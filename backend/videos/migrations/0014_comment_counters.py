@@ -0,0 +1,42 @@
+# Generated by Django 6.0.2 on 2026-10-19 11:37
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def _count(queryset, group_field):
+    return Coalesce(
+        Subquery(
+            queryset.order_by().values(group_field).annotate(total=Count("id")).values("total")[:1]
+        ),
+        Value(0),
+    )
+
+
+def backfill_counts(apps, schema_editor):
+    Video = apps.get_model("videos", "Video")
+    Comment = apps.get_model("videos", "Comment")
+    Video.objects.update(comment_count=_count(Comment.objects.filter(video=OuterRef("pk")), "video"))
+    Comment.objects.update(reply_count=_count(Comment.objects.filter(parent=OuterRef("pk")), "parent"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0013_suggestionchange'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 6.0.2 on 2026-10-19 11:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+
+
+def backfill_channel_stats(apps, schema_editor):
+    Video = apps.get_model("videos", "Video")
+    ChannelSubscription = apps.get_model("videos", "ChannelSubscription")
+    ChannelStats = apps.get_model("videos", "ChannelStats")
+
+    stats = {}
+    for row in Video.objects.values("user_id").annotate(
+        videos=Count("id"), views=Sum("views"), likes=Sum("likes"), last=Max("created_at")
+    ):
+        stats[row["user_id"]] = ChannelStats(
+            user_id=row["user_id"],
+            video_count=row["videos"],
+            total_views=row["views"] or 0,
+            total_likes=row["likes"] or 0,
+            last_upload_at=row["last"],
+        )
+    for row in ChannelSubscription.objects.values("channel_id").annotate(total=Count("id")):
+        stats.setdefault(row["channel_id"], ChannelStats(user_id=row["channel_id"]))
+        stats[row["channel_id"]].subscriber_count = row["total"]
+    ChannelStats.objects.bulk_create(stats.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('videos', '0014_comment_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChannelStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='channel_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('video_count', models.PositiveIntegerField(default=0)),
+                ('total_views', models.PositiveBigIntegerField(default=0)),
+                ('total_likes', models.PositiveBigIntegerField(default=0)),
+                ('subscriber_count', models.PositiveIntegerField(default=0)),
+                ('last_upload_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-subscriber_count'], name='videos_chan_subscri_305407_idx'), models.Index(fields=['-total_views'], name='videos_chan_total_v_165b58_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_channel_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 6.0.2 on 2026-10-19 12:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0015_channelstats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Playlist',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=150)),
+                ('description', models.TextField(blank=True)),
+                ('is_public', models.BooleanField(default=True)),
+                ('item_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='playlists', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-updated_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PlaylistItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.CharField(max_length=255)),
+                ('added_at', models.DateTimeField(auto_now_add=True)),
+                ('playlist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='videos.playlist')),
+                ('video', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='playlist_items', to='videos.video')),
+            ],
+            options={
+                'ordering': ['position'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='playlist',
+            index=models.Index(fields=['user', '-updated_at'], name='videos_play_user_id_1187a7_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='playlistitem',
+            unique_together={('playlist', 'position'), ('playlist', 'video')},
+        ),
+    ]
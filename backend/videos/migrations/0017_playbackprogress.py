@@ -0,0 +1,33 @@
+# Generated by Django 6.0.2 on 2026-10-19 12:07
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0016_playlists'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlaybackProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position_seconds', models.FloatField()),
+                ('duration_seconds', models.FloatField(blank=True, null=True)),
+                ('in_progress', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='playback_progress', to=settings.AUTH_USER_MODEL)),
+                ('video', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='playback_progress', to='videos.video')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('in_progress', True)), fields=['user', '-updated_at'], name='videos_playback_in_progress')],
+                'unique_together': {('user', 'video')},
+            },
+        ),
+    ]
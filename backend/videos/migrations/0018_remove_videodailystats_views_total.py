@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-19 12:17
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0017_playbackprogress'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='videodailystats',
+            name='views_total',
+        ),
+    ]
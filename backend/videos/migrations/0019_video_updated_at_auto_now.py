@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 12:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0018_remove_videodailystats_views_total'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='video',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -1,7 +1,17 @@
-from django.db import models
+from datetime import date
+
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
 from django.contrib.auth.models import User
+from django.utils import timezone
+from videos.hyperloglog import HyperLogLog
 from videos.imagekit_client import (
+    get_image_url,
+    get_optimized_quality,
     get_optimized_video_url,
+    get_srcset,
+    get_streaming_renditions,
     get_streaming_url,
     get_thumbnail_url,
 )
@@ -16,26 +26,57 @@ class Video(models.Model):
     file_id = models.CharField(max_length=200)
     Video_url = models.URLField(max_length=500)
     thumbnail_url = models.URLField(max_length=500, blank=True)
+    thumbnail_file_id = models.CharField(max_length=200, blank=True)
+
+    # Probed from the container header at upload time; empty when unknown.
+    duration = models.FloatField(null=True, blank=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    bitrate = models.PositiveBigIntegerField(null=True, blank=True)
+    codec = models.CharField(max_length=32, blank=True)
+
+    # Identifies re-uploads of the same file so its stored copy can be reused.
+    content_sha256 = models.CharField(max_length=64, blank=True)
+    file_size = models.PositiveBigIntegerField(null=True, blank=True)
 
     views = models.PositiveIntegerField(default=0)
     unique_views = models.PositiveIntegerField(default=0)
     likes = models.PositiveIntegerField(default=0)
     dislikes = models.PositiveIntegerField(default=0)
+    # Includes replies; kept in step by the comment views, see `manage.py reconcile_comment_counts`.
+    comment_count = models.PositiveIntegerField(default=0)
 
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=["content_sha256", "file_size"])]
 
     def __str__(self):
         return self.title
 
+    @property
+    def has_custom_thumbnail(self):
+        return bool(self.thumbnail_url and "/thumbnails/" in self.thumbnail_url)
+
     @property
     def display_thumbnail_url(self):
-        if self.thumbnail_url and "/thumbnails/" in self.thumbnail_url:
-            return self.thumbnail_url
-        return self.generated_thumbnail_url
+        return self.thumbnail_variant_url(480)
+
+    @property
+    def thumbnail_srcset(self):
+        if not self.has_custom_thumbnail and not self.Video_url:
+            return ""
+        return get_srcset(self.thumbnail_variant_url)
+
+    def thumbnail_variant_url(self, width):
+        height = width * 9 // 16
+        if self.has_custom_thumbnail:
+            return get_image_url(self.thumbnail_url, width, height)
+        if not self.Video_url:
+            return ""
+        return get_thumbnail_url(self.Video_url, width, height)
 
     @property
     def generated_thumbnail_url(self):
@@ -47,13 +88,17 @@ class Video(models.Model):
     def streaming_url(self):
         if not self.Video_url:
             return ""
-        return get_streaming_url(self.Video_url)
+        return get_streaming_url(
+            self.Video_url, get_streaming_renditions(self.width, self.height)
+        )
 
     @property
     def optimized_url(self):
         if not self.Video_url:
             return ""
-        return get_optimized_video_url(self.Video_url)
+        return get_optimized_video_url(
+            self.Video_url, get_optimized_quality(self.width, self.height, self.bitrate)
+        )
     
 class VideoLike(models.Model):
     LIKE = 1
@@ -103,6 +148,11 @@ class WatchLater(models.Model):
 
 
 class VideoView(models.Model):
+    """Legacy per-viewer log, no longer written; `rollup_stats` prunes what is left.
+
+    Daily views are counted in VideoDailyStats as they happen.
+    """
+
     video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name="view_records")
     viewer_key = models.CharField(max_length=255)
     viewed_at = models.DateTimeField(auto_now_add=True)
@@ -115,6 +165,73 @@ class VideoView(models.Model):
         return f"{self.viewer_key} viewed {self.video.title}"
 
 
+class UniqueViewerSketch(models.Model):
+    # The ALL_TIME row accumulates every day, so unique_views needs no merge.
+    ALL_TIME = date(1970, 1, 1)
+
+    video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name="viewer_sketches")
+    day = models.DateField()
+    registers = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ["video", "day"]
+        ordering = ["-day"]
+
+    def __str__(self):
+        return f"{self.video.title} viewers on {self.day}"
+
+    @property
+    def sketch(self):
+        return HyperLogLog.from_bytes(self.registers)
+
+    @classmethod
+    def record(cls, video, viewer_key):
+        """Add a viewer to today's and the all-time sketch.
+
+        Returns the new all-time unique viewer estimate, or None when the
+        viewer did not change it.
+        """
+        days = [timezone.localdate(), cls.ALL_TIME]
+        estimate = None
+        with transaction.atomic():
+            rows = {
+                row.day: row
+                for row in cls.objects.select_for_update().filter(video=video, day__in=days)
+            }
+            for day in days:
+                row = rows.get(day)
+                sketch = row.sketch if row else HyperLogLog()
+                if not sketch.add(viewer_key):
+                    continue
+                if row:
+                    row.registers = sketch.to_bytes()
+                    row.save(update_fields=["registers", "updated_at"])
+                else:
+                    cls.objects.create(video=video, day=day, registers=sketch.to_bytes())
+                if day == cls.ALL_TIME:
+                    estimate = sketch.count()
+        return estimate
+
+    @classmethod
+    def window_counts(cls, start_day, end_day=None, video_ids=None):
+        """Estimate unique viewers per video between two days (inclusive)."""
+        rows = cls.objects.filter(day__gte=start_day).exclude(day=cls.ALL_TIME)
+        if end_day:
+            rows = rows.filter(day__lte=end_day)
+        if video_ids is not None:
+            rows = rows.filter(video_id__in=video_ids)
+
+        merged = {}
+        for video_id, registers in rows.values_list("video_id", "registers").iterator():
+            sketch = HyperLogLog.from_bytes(registers)
+            if video_id in merged:
+                merged[video_id].merge(sketch)
+            else:
+                merged[video_id] = sketch
+        return {video_id: sketch.count() for video_id, sketch in merged.items()}
+
+
 class Comment(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="video_comments")
     video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name="comments")
@@ -127,6 +244,7 @@ class Comment(models.Model):
     )
     text = models.TextField()
     likes = models.PositiveIntegerField(default=0)
+    reply_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -165,3 +283,235 @@ class ChannelSubscription(models.Model):
 
     def __str__(self):
         return f"{self.subscriber.username} subscribed {self.channel.username}"
+
+
+class VideoDailyStats(models.Model):
+    video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name="daily_stats")
+    day = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+    unique_viewers = models.PositiveIntegerField(default=0)
+    likes = models.PositiveIntegerField(default=0)
+    dislikes = models.PositiveIntegerField(default=0)
+    comments = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ["video", "day"]
+        ordering = ["day"]
+
+    def __str__(self):
+        return f"{self.video.title} on {self.day}"
+
+    @classmethod
+    def count_view(cls, video_id):
+        """Add one view to today's row; views are counted here, not by rollups."""
+        today = timezone.localdate()
+        if not cls.objects.filter(video_id=video_id, day=today).update(views=F("views") + 1):
+            cls.objects.bulk_create([cls(video_id=video_id, day=today)], ignore_conflicts=True)
+            cls.objects.filter(video_id=video_id, day=today).update(views=F("views") + 1)
+
+
+class ChannelDailyStats(models.Model):
+    channel = models.ForeignKey(User, on_delete=models.CASCADE, related_name="channel_daily_stats")
+    day = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+    unique_viewers = models.PositiveIntegerField(default=0)
+    likes = models.PositiveIntegerField(default=0)
+    dislikes = models.PositiveIntegerField(default=0)
+    comments = models.PositiveIntegerField(default=0)
+    subscribers_gained = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ["channel", "day"]
+        ordering = ["day"]
+
+    def __str__(self):
+        return f"{self.channel.username} on {self.day}"
+
+
+class PendingFileDeletion(models.Model):
+    """Outbox of remote files to delete, drained by `manage.py drain_file_deletions`."""
+
+    MAX_ATTEMPTS = 8
+
+    file_id = models.CharField(max_length=200, unique=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["next_attempt_at"]
+
+    def __str__(self):
+        return f"delete {self.file_id} (attempt {self.attempts})"
+
+    @classmethod
+    def enqueue(cls, *file_ids):
+        cls.objects.bulk_create(
+            [cls(file_id=file_id) for file_id in set(file_ids) if file_id],
+            ignore_conflicts=True,
+        )
+
+
+class RelatedVideo(models.Model):
+    """Top co-watched neighbours per video, rebuilt by `manage.py build_related_videos`."""
+
+    video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name="related_entries")
+    related = models.ForeignKey(Video, on_delete=models.CASCADE, related_name="+")
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ["video", "rank"]
+        ordering = ["rank"]
+
+    def __str__(self):
+        return f"{self.video.title} -> {self.related.title} (#{self.rank})"
+
+
+class SuggestionChange(models.Model):
+    """Change log of video ids the in-process suggestion indexes must re-read."""
+
+    video_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"video {self.video_id} changed"
+
+    @classmethod
+    def log(cls, *video_ids):
+        cls.objects.bulk_create([cls(video_id=video_id) for video_id in set(video_ids)])
+
+
+class ChannelStats(models.Model):
+    """Per-channel totals kept current by the views that change them.
+
+    Rebuild from the source tables with `manage.py rebuild_channel_stats`.
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="channel_stats"
+    )
+    video_count = models.PositiveIntegerField(default=0)
+    total_views = models.PositiveBigIntegerField(default=0)
+    total_likes = models.PositiveBigIntegerField(default=0)
+    subscriber_count = models.PositiveIntegerField(default=0)
+    last_upload_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-subscriber_count"]),
+            models.Index(fields=["-total_views"]),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username}: {self.video_count} videos, {self.subscriber_count} subscribers"
+
+    @classmethod
+    def bump(cls, user_id, **changes):
+        """Apply counter deltas (and plain values such as last_upload_at) to one row."""
+        updates = {
+            field: Greatest(F(field) + value, 0)
+            if isinstance(value, int)
+            else value
+            for field, value in changes.items()
+        }
+        updates["updated_at"] = timezone.now()
+        if not cls.objects.filter(user_id=user_id).update(**updates):
+            cls.objects.bulk_create([cls(user_id=user_id)], ignore_conflicts=True)
+            cls.objects.filter(user_id=user_id).update(**updates)
+
+    @classmethod
+    def recount_subscribers(cls, channel_ids):
+        """Set subscriber_count from the subscription rows of existing users.
+
+        For writes that can't tell how many rows they changed, such as
+        bulk_create(ignore_conflicts=True). One UPDATE once the rows exist.
+        """
+        channel_ids = set(channel_ids)
+        if not channel_ids:
+            return
+        subscribers = (
+            ChannelSubscription.objects.filter(channel_id=OuterRef("user_id"))
+            .order_by()
+            .values("channel_id")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        updates = {
+            "subscriber_count": Coalesce(Subquery(subscribers), 0),
+            "updated_at": timezone.now(),
+        }
+        if cls.objects.filter(user_id__in=channel_ids).update(**updates) < len(channel_ids):
+            cls.objects.bulk_create(
+                [cls(user_id=channel_id) for channel_id in channel_ids], ignore_conflicts=True
+            )
+            cls.objects.filter(user_id__in=channel_ids).update(**updates)
+
+
+class Playlist(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="playlists")
+    title = models.CharField(max_length=150)
+    description = models.TextField(blank=True)
+    is_public = models.BooleanField(default=True)
+    item_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-updated_at"]
+        indexes = [models.Index(fields=["user", "-updated_at"])]
+
+    def __str__(self):
+        return f"{self.user.username}: {self.title}"
+
+
+class PlaylistItem(models.Model):
+    """One video in a playlist, ordered by ``position``.
+
+    Positions are fractional keys from videos.positions: moving an item
+    rewrites only its own key, and reads page through the
+    (playlist, position) index.
+    """
+
+    playlist = models.ForeignKey(Playlist, on_delete=models.CASCADE, related_name="items")
+    video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name="playlist_items")
+    position = models.CharField(max_length=255)
+    added_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = [["playlist", "position"], ["playlist", "video"]]
+        ordering = ["position"]
+
+    def __str__(self):
+        return f"{self.playlist.title} #{self.position}: {self.video.title}"
+
+
+class PlaybackProgress(models.Model):
+    """Where a user stopped in a video, from player heartbeats.
+
+    Written in batches by videos.progress rather than once per heartbeat.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="playback_progress")
+    video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name="playback_progress")
+    position_seconds = models.FloatField()
+    duration_seconds = models.FloatField(null=True, blank=True)
+    # Started but not finished: the rows "continue watching" lists.
+    in_progress = models.BooleanField(default=False)
+    # Time of the heartbeat, not of the batched write.
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ["user", "video"]
+        indexes = [
+            models.Index(
+                fields=["user", "-updated_at"],
+                condition=models.Q(in_progress=True),
+                name="videos_playback_in_progress",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} at {self.position_seconds:.0f}s of {self.video.title}"
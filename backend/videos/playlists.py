@@ -0,0 +1,99 @@
+from django.db.models import F
+from django.db.models.functions import Greatest, Left, Length
+from django.utils import timezone
+
+from .models import Playlist, PlaylistItem, Video
+from .positions import key_between, keys_between
+
+PLAYLIST_MAX_ITEMS = 5_000
+# Repeated moves into the same gap lengthen keys; past this length the
+# playlist is renumbered once.
+POSITION_REBALANCE_LENGTH = 48
+
+
+def lock_playlist(playlist_id, user):
+    """The user's playlist, locked for the rest of the transaction; None if not theirs.
+
+    Writers of one playlist take this lock so two of them never pick the
+    same position key.
+    """
+    return Playlist.objects.select_for_update().filter(id=playlist_id, user=user).first()
+
+
+def append_videos(playlist, video_ids):
+    """Append the listed videos that exist and aren't in the playlist yet.
+
+    Returns the ids added, in request order, or None when they would take
+    the playlist past PLAYLIST_MAX_ITEMS. Call with the playlist locked.
+    """
+    present = set(
+        playlist.items.filter(video_id__in=video_ids).values_list("video_id", flat=True)
+    )
+    known = set(Video.objects.filter(id__in=video_ids).values_list("id", flat=True))
+    added = [video_id for video_id in video_ids if video_id in known and video_id not in present]
+    if playlist.item_count + len(added) > PLAYLIST_MAX_ITEMS:
+        return None
+    if not added:
+        return added
+
+    last = playlist.items.order_by("-position").values_list("position", flat=True).first()
+    PlaylistItem.objects.bulk_create(
+        PlaylistItem(playlist=playlist, video_id=video_id, position=position)
+        for video_id, position in zip(added, keys_between(last, None, len(added)))
+    )
+    Playlist.objects.filter(id=playlist.id).update(
+        item_count=F("item_count") + len(added), updated_at=timezone.now()
+    )
+    playlist.item_count += len(added)
+    return added
+
+
+def move_item(playlist, item, after_id=None):
+    """Put ``item`` right after item ``after_id``, or first when it is None.
+
+    Only the moved row is written. Returns its new position, or None when
+    ``after_id`` is not another item of the playlist. Call with the
+    playlist locked.
+    """
+    others = playlist.items.exclude(id=item.id)
+    before = None
+    if after_id is not None:
+        before = others.filter(id=after_id).values_list("position", flat=True).first()
+        if before is None:
+            return None
+        others = others.filter(position__gt=before)
+    after = others.order_by("position").values_list("position", flat=True).first()
+
+    position = key_between(before, after)
+    if len(position) > POSITION_REBALANCE_LENGTH:
+        rebalance(playlist)
+        return move_item(playlist, item, after_id)
+    PlaylistItem.objects.filter(id=item.id).update(position=position)
+    item.position = position
+    return position
+
+
+def rebalance(playlist):
+    """Give every item a fresh short key, keeping the order."""
+    item_ids = list(playlist.items.order_by("position").values_list("id", flat=True))
+    # Two passes: temporary keys end in "-", which no real key contains, so
+    # neither pass collides with the (playlist, position) unique constraint.
+    PlaylistItem.objects.bulk_update(
+        [
+            PlaylistItem(id=item_id, position=position + "-")
+            for item_id, position in zip(item_ids, keys_between(None, None, len(item_ids)))
+        ],
+        ["position"],
+        batch_size=500,
+    )
+    playlist.items.update(position=Left("position", Length("position") - 1))
+
+
+def remove_item(playlist, item_id):
+    """Delete one item; False if it wasn't in the playlist. Call with the playlist locked."""
+    removed, _ = playlist.items.filter(id=item_id).delete()
+    if removed:
+        Playlist.objects.filter(id=playlist.id).update(
+            item_count=Greatest(F("item_count") - removed, 0), updated_at=timezone.now()
+        )
+    return bool(removed)
@@ -0,0 +1,172 @@
+"""Fractional position keys for ordered lists (playlists).
+
+A key sorts bytewise between its neighbours, so moving an item only
+rewrites that item's key. Keys are an integer part followed by an
+optional fraction, after the scheme popularised by Figma and
+rocicorp/fractional-indexing. Appending increments the integer part,
+which keeps keys short; only inserts between two neighbours extend the
+fraction.
+
+Only lowercase base-36 characters are used. That keeps the order the
+same under PostgreSQL's locale collations as under SQLite's binary one.
+The integer part's head letter gives its length: ``n``-``z`` for
+non-negative integers (2-14 characters), ``m``-``a`` for negative ones.
+"""
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+ZERO_KEY = "n0"
+SMALLEST_INTEGER = "a" + DIGITS[0] * 13
+
+
+def key_between(before, after):
+    """A key that sorts after ``before`` and before ``after``.
+
+    Either side may be None for the start or end of the list.
+    """
+    if before is not None:
+        _validate_key(before)
+    if after is not None:
+        _validate_key(after)
+    if before is not None and after is not None and before >= after:
+        raise ValueError(f"{before!r} does not sort before {after!r}.")
+
+    if before is None:
+        if after is None:
+            return ZERO_KEY
+        integer = _integer_part(after)
+        fraction = after[len(integer) :]
+        if integer == SMALLEST_INTEGER:
+            return integer + _midpoint("", fraction)
+        if integer < after:
+            return integer
+        decremented = _decrement_integer(integer)
+        if decremented is None:
+            raise ValueError("No key sorts before the smallest key.")
+        return decremented
+
+    integer = _integer_part(before)
+    fraction = before[len(integer) :]
+    if after is None:
+        incremented = _increment_integer(integer)
+        return integer + _midpoint(fraction, None) if incremented is None else incremented
+
+    after_integer = _integer_part(after)
+    if integer == after_integer:
+        return integer + _midpoint(fraction, after[len(after_integer) :])
+    incremented = _increment_integer(integer)
+    if incremented is None:
+        raise ValueError("Integer part overflowed.")
+    if incremented < after:
+        return incremented
+    return integer + _midpoint(fraction, None)
+
+
+def keys_between(before, after, count):
+    """``count`` ascending keys between ``before`` and ``after``, kept short.
+
+    Runs of appends or prepends step the integer part; anything else is
+    bisected so key length grows with log(count).
+    """
+    if count <= 0:
+        return []
+    if count == 1:
+        return [key_between(before, after)]
+    if after is None:
+        keys = [key_between(before, None)]
+        for _ in range(count - 1):
+            keys.append(key_between(keys[-1], None))
+        return keys
+    if before is None:
+        keys = [key_between(None, after)]
+        for _ in range(count - 1):
+            keys.append(key_between(None, keys[-1]))
+        return keys[::-1]
+    middle = count // 2
+    key = key_between(before, after)
+    return [
+        *keys_between(before, key, middle),
+        key,
+        *keys_between(key, after, count - middle - 1),
+    ]
+
+
+def _midpoint(low, high):
+    """A fraction strictly between ``low`` and ``high`` (None means 1)."""
+    if high is not None:
+        shared = 0
+        while shared < len(high) and (low[shared] if shared < len(low) else DIGITS[0]) == high[shared]:
+            shared += 1
+        if shared:
+            return high[:shared] + _midpoint(low[shared:], high[shared:])
+
+    low_digit = DIGITS.index(low[0]) if low else 0
+    high_digit = DIGITS.index(high[0]) if high is not None else len(DIGITS)
+    if high_digit - low_digit > 1:
+        return DIGITS[(low_digit + high_digit + 1) // 2]
+    if high is not None and len(high) > 1:
+        return high[0]
+    return DIGITS[low_digit] + _midpoint(low[1:], None)
+
+
+def _integer_length(head):
+    if "n" <= head <= "z":
+        return ord(head) - ord("n") + 2
+    if "a" <= head <= "m":
+        return ord("m") - ord(head) + 2
+    raise ValueError(f"Invalid key head {head!r}.")
+
+
+def _integer_part(key):
+    length = _integer_length(key[0])
+    if length > len(key):
+        raise ValueError(f"Invalid key {key!r}.")
+    return key[:length]
+
+
+def _validate_key(key):
+    if not key or key == SMALLEST_INTEGER:
+        raise ValueError(f"Invalid key {key!r}.")
+    integer = _integer_part(key)
+    if key[len(integer) :].endswith(DIGITS[0]) or any(char not in DIGITS for char in key):
+        raise ValueError(f"Invalid key {key!r}.")
+
+
+def _increment_integer(integer):
+    head, digits = integer[0], list(integer[1:])
+    for index in reversed(range(len(digits))):
+        value = DIGITS.index(digits[index]) + 1
+        if value < len(DIGITS):
+            digits[index] = DIGITS[value]
+            return head + "".join(digits)
+        digits[index] = DIGITS[0]
+    # Every digit carried: move to the next head, one digit longer or shorter.
+    if head == "m":
+        return ZERO_KEY
+    if head == "z":
+        return None
+    head = chr(ord(head) + 1)
+    if head > "n":
+        digits.append(DIGITS[0])
+    else:
+        digits.pop()
+    return head + "".join(digits)
+
+
+def _decrement_integer(integer):
+    head, digits = integer[0], list(integer[1:])
+    for index in reversed(range(len(digits))):
+        value = DIGITS.index(digits[index]) - 1
+        if value >= 0:
+            digits[index] = DIGITS[value]
+            return head + "".join(digits)
+        digits[index] = DIGITS[-1]
+    if head == "n":
+        return "m" + DIGITS[-1]
+    if head == "a":
+        return None
+    head = chr(ord(head) - 1)
+    if head < "m":
+        digits.append(DIGITS[-1])
+    else:
+        digits.pop()
+    return head + "".join(digits)
@@ -0,0 +1,185 @@
+import logging
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.db import DatabaseError, close_old_connections
+from django.utils import timezone
+
+from .models import PlaybackProgress, Video
+
+FLUSH_SECONDS = 10.0
+# Positions before this count as not started, and positions past this
+# fraction of the duration as finished; neither is offered for resuming.
+MIN_RESUME_SECONDS = 10
+FINISHED_FRACTION = 0.95
+CONTINUE_WATCHING_LIMIT = 20
+
+logger = logging.getLogger(__name__)
+
+
+def is_in_progress(position, duration):
+    if position < MIN_RESUME_SECONDS:
+        return False
+    return not duration or position < duration * FINISHED_FRACTION
+
+
+class ProgressBuffer:
+    """Keeps the latest heartbeat per (user, video) and writes them all in
+    one batched upsert every ``interval`` seconds.
+
+    A player sends a heartbeat every few seconds, so most are overwritten
+    here and never reach the database. Heartbeats not yet flushed are lost
+    if the process exits; the player is at most ``interval`` seconds behind.
+    """
+
+    def __init__(self, interval=FLUSH_SECONDS):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._thread = None
+
+    def record(self, user_id, video_id, position, duration=None):
+        with self._lock:
+            self._pending.setdefault(user_id, {})[video_id] = (
+                position,
+                duration,
+                timezone.now(),
+            )
+            if self._thread is None and self.interval:
+                self._thread = threading.Thread(
+                    target=self._run, name="playback-progress", daemon=True
+                )
+                self._thread.start()
+
+    def pending_for(self, user_id):
+        """``{video_id: (position, duration, at)}`` not yet flushed for one user."""
+        with self._lock:
+            return dict(self._pending.get(user_id, {}))
+
+    def flush(self):
+        """Upsert everything buffered; returns the number of rows written."""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        try:
+            return _write(batch)
+        except DatabaseError:
+            self._restore(batch)
+            raise
+
+    def _restore(self, batch):
+        # Put a failed batch back unless newer heartbeats replaced it.
+        with self._lock:
+            for user_id, videos in batch.items():
+                pending = self._pending.setdefault(user_id, {})
+                for video_id, entry in videos.items():
+                    pending.setdefault(video_id, entry)
+
+    def _run(self):
+        # Nothing restarts this thread, so no error may end the loop.
+        while True:
+            time.sleep(self.interval)
+            try:
+                self._flush_round()
+            except DatabaseError:
+                logger.exception("Flushing playback progress failed; retrying next round.")
+            except Exception:
+                # Not restored: the same batch would fail the same way again.
+                logger.exception("Flushing playback progress failed; batch dropped.")
+
+    def _flush_round(self):
+        # This thread outlives requests, so it drops stale or broken
+        # connections itself, as the request cycle does.
+        close_old_connections()
+        try:
+            self.flush()
+        finally:
+            close_old_connections()
+
+
+def _write(batch):
+    if not batch:
+        return 0
+    video_ids = {video_id for videos in batch.values() for video_id in videos}
+    # Heartbeats aren't validated when they arrive; drop deleted videos and
+    # users here so one bad row can't fail the whole batch.
+    durations = dict(Video.objects.filter(id__in=video_ids).values_list("id", "duration"))
+    user_ids = set(User.objects.filter(id__in=batch).values_list("id", flat=True))
+
+    rows = []
+    for user_id, videos in batch.items():
+        if user_id not in user_ids:
+            continue
+        for video_id, (position, duration, at) in videos.items():
+            if video_id not in durations:
+                continue
+            duration = durations[video_id] or duration
+            rows.append(
+                PlaybackProgress(
+                    user_id=user_id,
+                    video_id=video_id,
+                    position_seconds=position,
+                    duration_seconds=duration,
+                    in_progress=is_in_progress(position, duration),
+                    updated_at=at,
+                )
+            )
+    PlaybackProgress.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["user", "video"],
+        update_fields=["position_seconds", "duration_seconds", "in_progress", "updated_at"],
+        batch_size=500,
+    )
+    return len(rows)
+
+
+playback_progress = ProgressBuffer()
+
+
+def record_progress(user_id, video_id, position, duration=None):
+    playback_progress.record(user_id, video_id, position, duration)
+
+
+def resume_position(user_id, video_id):
+    """Seconds to resume ``video_id`` at for one user, or None to start over."""
+    entry = playback_progress.pending_for(user_id).get(video_id)
+    if entry is None:
+        entry = (
+            PlaybackProgress.objects.filter(user_id=user_id, video_id=video_id)
+            .values_list("position_seconds", "duration_seconds", "updated_at")
+            .first()
+        )
+    if entry is None or not is_in_progress(entry[0], entry[1]):
+        return None
+    return entry[0]
+
+
+def continue_watching(user_id, limit=CONTINUE_WATCHING_LIMIT):
+    """``[(video_id, position, duration, at)]`` started but unfinished, newest first.
+
+    Reads the partial in-progress index, then lays this process's unflushed
+    heartbeats over it.
+    """
+    pending = playback_progress.pending_for(user_id)
+    entries = {
+        video_id: (position, duration, at)
+        for video_id, position, duration, at in PlaybackProgress.objects.filter(
+            user_id=user_id, in_progress=True
+        )
+        .order_by("-updated_at")
+        .values_list("video_id", "position_seconds", "duration_seconds", "updated_at")[
+            : limit + len(pending)
+        ]
+    }
+    for video_id, (position, duration, at) in pending.items():
+        known_duration = entries.get(video_id, (None, None))[1]
+        entries[video_id] = (position, known_duration or duration, at)
+
+    rows = [
+        (video_id, position, duration, at)
+        for video_id, (position, duration, at) in entries.items()
+        if is_in_progress(position, duration)
+    ]
+    rows.sort(key=lambda row: row[3], reverse=True)
+    return rows[:limit]
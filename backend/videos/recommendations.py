@@ -0,0 +1,94 @@
+import numpy as np
+from scipy import sparse
+from django.db import transaction
+
+from .models import RelatedVideo, VideoLike, WatchHistory
+
+WATCH_WEIGHT = 1.0
+LIKE_WEIGHT = 2.0
+
+
+def build_related_videos(top_k=20, max_history=200):
+    """Rebuild RelatedVideo from item-item co-occurrence of watches and likes.
+
+    Each user's recent interactions form a sparse user x video matrix; cosine
+    similarity between video columns comes from one sparse product. Only the
+    latest ``max_history`` watches per user are used so heavy users do not
+    make the product dense. Returns the number of videos with neighbours.
+    """
+    interactions = _load_interactions(max_history)
+    if not interactions:
+        with transaction.atomic():
+            RelatedVideo.objects.all().delete()
+        return 0
+
+    user_ids, video_ids, weights = zip(*interactions)
+    user_index = {user_id: index for index, user_id in enumerate(sorted(set(user_ids)))}
+    video_list = sorted(set(video_ids))
+    video_index = {video_id: index for index, video_id in enumerate(video_list)}
+
+    matrix = sparse.csr_matrix(
+        (
+            np.asarray(weights, dtype=np.float32),
+            (
+                np.fromiter((user_index[user_id] for user_id in user_ids), dtype=np.int64),
+                np.fromiter((video_index[video_id] for video_id in video_ids), dtype=np.int64),
+            ),
+        ),
+        shape=(len(user_index), len(video_list)),
+    )
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel())
+    norms[norms == 0] = 1.0
+    normalized = matrix @ sparse.diags(1.0 / norms)
+    similarity = (normalized.T @ normalized).tocsr()
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+
+    rows = []
+    for index in range(similarity.shape[0]):
+        start, end = similarity.indptr[index], similarity.indptr[index + 1]
+        if start == end:
+            continue
+        scores = similarity.data[start:end]
+        neighbours = similarity.indices[start:end]
+        if len(scores) > top_k:
+            best = np.argpartition(-scores, top_k)[:top_k]
+        else:
+            best = np.arange(len(scores))
+        best = best[np.argsort(-scores[best], kind="stable")]
+        rows.extend(
+            RelatedVideo(
+                video_id=video_list[index],
+                related_id=video_list[neighbours[position]],
+                rank=rank,
+                score=float(scores[position]),
+            )
+            for rank, position in enumerate(best, start=1)
+        )
+
+    with transaction.atomic():
+        RelatedVideo.objects.all().delete()
+        RelatedVideo.objects.bulk_create(rows, batch_size=1000)
+    return len({row.video_id for row in rows})
+
+
+def _load_interactions(max_history):
+    weights = {}
+    history_counts = {}
+    for user_id, video_id in (
+        WatchHistory.objects.order_by("user_id", "-watched_at")
+        .values_list("user_id", "video_id")
+        .iterator()
+    ):
+        history_counts[user_id] = history_counts.get(user_id, 0) + 1
+        if history_counts[user_id] <= max_history:
+            weights[(user_id, video_id)] = WATCH_WEIGHT
+
+    for user_id, video_id in (
+        VideoLike.objects.filter(value=VideoLike.LIKE)
+        .values_list("user_id", "video_id")
+        .iterator()
+    ):
+        weights[(user_id, video_id)] = weights.get((user_id, video_id), 0) + LIKE_WEIGHT
+
+    return [(user_id, video_id, weight) for (user_id, video_id), weight in weights.items()]
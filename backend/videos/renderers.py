@@ -0,0 +1,32 @@
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Covers what orjson leaves to ``default``: Decimal, lazy strings, querysets.
+_fallback = JSONEncoder().default
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer backed by orjson.
+
+    ``orjson.Fragment`` values (pre-encoded video cards, see ``videos.cards``)
+    are copied into the output as they are.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        option = orjson.OPT_NON_STR_KEYS
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=_fallback, option=option)
+
+
+class ORJSONParser(JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
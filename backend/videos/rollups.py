@@ -0,0 +1,139 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .hyperloglog import HyperLogLog
+from .models import (
+    ChannelDailyStats,
+    ChannelSubscription,
+    Comment,
+    UniqueViewerSketch,
+    Video,
+    VideoDailyStats,
+    VideoLike,
+    VideoView,
+)
+
+# Views are counted live by VideoDailyStats.count_view, so rollups leave them alone.
+VIDEO_STAT_FIELDS = ["unique_viewers", "likes", "dislikes", "comments"]
+CHANNEL_STAT_FIELDS = ["views", "unique_viewers", "likes", "dislikes", "comments", "subscribers_gained"]
+
+
+def rollup_day(day):
+    """Recompute the video and channel rollups for one day.
+
+    Views are counted into VideoDailyStats as they happen and kept as they
+    are; everything else is recounted from its source table, so past days
+    can be backfilled and re-run.
+    """
+    stats = defaultdict(lambda: dict.fromkeys(VIDEO_STAT_FIELDS, 0))
+    start, end = _day_window(day)
+
+    for video_id, count in UniqueViewerSketch.window_counts(day, day).items():
+        stats[video_id]["unique_viewers"] = count
+
+    for row in (
+        VideoLike.objects.filter(created_at__gte=start, created_at__lt=end)
+        .values("video_id", "value")
+        .annotate(total=Count("id"))
+    ):
+        field = "likes" if row["value"] == VideoLike.LIKE else "dislikes"
+        stats[row["video_id"]][field] = row["total"]
+
+    for row in (
+        Comment.objects.filter(created_at__gte=start, created_at__lt=end)
+        .values("video_id")
+        .annotate(total=Count("id"))
+    ):
+        stats[row["video_id"]]["comments"] = row["total"]
+
+    with transaction.atomic():
+        VideoDailyStats.objects.bulk_create(
+            [
+                VideoDailyStats(video_id=video_id, day=day, **values)
+                for video_id, values in stats.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["video", "day"],
+            update_fields=VIDEO_STAT_FIELDS,
+            batch_size=500,
+        )
+        _rollup_channels(day)
+    return len(stats)
+
+
+def _rollup_channels(day):
+    stats = defaultdict(lambda: dict.fromkeys(CHANNEL_STAT_FIELDS, 0))
+
+    for row in (
+        VideoDailyStats.objects.filter(day=day)
+        .values("video__user_id")
+        .annotate(
+            views_sum=Sum("views"),
+            likes_sum=Sum("likes"),
+            dislikes_sum=Sum("dislikes"),
+            comments_sum=Sum("comments"),
+        )
+    ):
+        stats[row["video__user_id"]].update(
+            views=row["views_sum"],
+            likes=row["likes_sum"],
+            dislikes=row["dislikes_sum"],
+            comments=row["comments_sum"],
+        )
+
+    # Merge the channel's per-video sketches so a viewer of several of its
+    # videos counts once.
+    sketches = {}
+    for channel_id, registers in (
+        UniqueViewerSketch.objects.filter(day=day)
+        .values_list("video__user_id", "registers")
+        .iterator()
+    ):
+        sketch = HyperLogLog.from_bytes(registers)
+        if channel_id in sketches:
+            sketches[channel_id].merge(sketch)
+        else:
+            sketches[channel_id] = sketch
+    for channel_id, sketch in sketches.items():
+        stats[channel_id]["unique_viewers"] = sketch.count()
+
+    for row in (
+        ChannelSubscription.objects.filter(created_at__date=day)
+        .values("channel_id")
+        .annotate(total=Count("id"))
+    ):
+        stats[row["channel_id"]]["subscribers_gained"] = row["total"]
+
+    ChannelDailyStats.objects.bulk_create(
+        [
+            ChannelDailyStats(channel_id=channel_id, day=day, **values)
+            for channel_id, values in stats.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["channel", "day"],
+        update_fields=CHANNEL_STAT_FIELDS,
+        batch_size=500,
+    )
+
+
+def _day_window(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def prune_video_views(before, batch_size=5000):
+    """Delete legacy VideoView rows older than ``before`` in batches."""
+    deleted = 0
+    while True:
+        ids = list(
+            VideoView.objects.filter(viewed_at__lt=before)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += VideoView.objects.filter(id__in=ids).delete()[0]
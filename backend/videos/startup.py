@@ -0,0 +1,61 @@
+import json
+import subprocess
+import sys
+
+from django.conf import settings
+
+# Only needed for uploads, deletions or offline jobs; importing any of them
+# while starting up is a regression (see videos.storage).
+HEAVY_MODULES = ("imagekitio", "httpx", "numpy", "scipy", "PIL", "redis")
+
+_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+ready = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+loaded = time.perf_counter()
+print(json.dumps({
+    "setup_seconds": ready - started,
+    "urls_seconds": loaded - ready,
+    "modules": sorted(sys.modules),
+}))
+"""
+
+
+def measure_startup():
+    """Set up Django in a new interpreter and report what it cost.
+
+    ``setup_seconds`` covers ``django.setup()`` (settings, apps, models) and
+    ``urls_seconds`` the URLconf and views, which the first request pays for.
+    ``imports`` holds ``(module, self_us, cumulative_us, depth)`` rows from
+    ``python -X importtime``; ``modules`` is everything loaded by the end.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _SCRIPT],
+        cwd=settings.BASE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report["imports"] = _parse_importtime(result.stderr)
+    report["heavy_modules"] = [
+        name for name in HEAVY_MODULES if name in set(report["modules"])
+    ]
+    return report
+
+
+def _parse_importtime(output):
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # column header
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
@@ -0,0 +1,43 @@
+from abc import ABC, abstractmethod
+from functools import cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class MediaStorage(ABC):
+    """Remote store for uploaded videos and images.
+
+    Implementations import their SDKs inside methods, so processes that
+    never upload or delete (migrations, read-only workers) do not load them.
+    URL building stays in plain functions (see ``imagekit_client``).
+    """
+
+    # Largest batch accepted by ``delete_files`` and returned by ``list_files``.
+    max_bulk_delete = 100
+    max_list_page = 1000
+
+    @abstractmethod
+    def upload_video(self, file_data, file_name="video.mp4"):
+        """Return ``{"file_id": ..., "url": ...}``."""
+
+    @abstractmethod
+    def upload_thumbnail(self, file_data, file_name="thumbnail.jpg"):
+        """Return ``{"file_id": ..., "url": ...}``."""
+
+    @abstractmethod
+    def upload_profile_photo(self, file_data, file_name="profile.jpg"):
+        """Return ``{"file_id": ..., "url": ...}``."""
+
+    @abstractmethod
+    def delete_files(self, file_ids):
+        """Delete up to ``max_bulk_delete`` files and return the ids that are gone."""
+
+    @abstractmethod
+    def list_files(self, folder, skip=0, limit=None):
+        """Return dicts with ``file_id``, ``url`` and ``created_at``."""
+
+
+@cache
+def get_storage():
+    return import_string(settings.MEDIA_STORAGE)()
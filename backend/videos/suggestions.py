@@ -0,0 +1,260 @@
+import heapq
+import logging
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left
+from datetime import timedelta
+
+from django.db import DatabaseError, connection
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import SuggestionChange, Video
+
+VIDEO = "video"
+CHANNEL = "channel"
+
+# Changes are polled at most this often; the whole index is rebuilt (and view
+# weights refreshed) on the longer interval or once the delta grows too big.
+CHANGE_POLL_SECONDS = 5
+FULL_REBUILD_SECONDS = 3600
+MAX_DELTA_ENTRIES = 5000
+CHANGE_LOG_RETENTION = timedelta(days=1)
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(_PUNCTUATION.sub(" ", text.lower()).split())
+
+
+class PrefixIndex:
+    """Immutable sorted-array prefix index with weighted top-k lookups.
+
+    Keys are kept sorted so a prefix maps to one contiguous range found with
+    two bisects. A segment tree of per-range argmax positions then yields the
+    range's entries in descending weight order in O(log n) per result, so
+    short prefixes matching most of the index stay fast.
+    """
+
+    def __init__(self, entries):
+        # entries: iterable of (key, text, kind, ref_id, weight)
+        entries = sorted(entries, key=lambda entry: entry[0])
+        self.keys = [entry[0] for entry in entries]
+        self.texts = [entry[1] for entry in entries]
+        self.kinds = [entry[2] for entry in entries]
+        self.ref_ids = array("q", (entry[3] for entry in entries))
+        self.weights = array("q", (entry[4] for entry in entries))
+
+        size = 1
+        while size < len(self.keys):
+            size *= 2
+        self._size = size
+        tree = array("q", [-1]) * (2 * size)
+        tree[size : size + len(self.keys)] = array("q", range(len(self.keys)))
+        for node in range(size - 1, 0, -1):
+            tree[node] = self._heavier(tree[2 * node], tree[2 * node + 1])
+        self._tree = tree
+
+    def __len__(self):
+        return len(self.keys)
+
+    def iter_matches(self, prefix):
+        """Yield positions of keys starting with ``prefix``, heaviest first."""
+        low = bisect_left(self.keys, prefix)
+        high = bisect_left(self.keys, prefix + "\U0010ffff", low)
+        heap = []
+        self._push(heap, low, high)
+        while heap:
+            _, position, low, high = heapq.heappop(heap)
+            yield position
+            self._push(heap, low, position)
+            self._push(heap, position + 1, high)
+
+    def _push(self, heap, low, high):
+        if low < high:
+            position = self._argmax(low, high)
+            heapq.heappush(heap, (-self.weights[position], position, low, high))
+
+    def _argmax(self, low, high):
+        best = -1
+        low += self._size
+        high += self._size
+        while low < high:
+            if low & 1:
+                best = self._heavier(best, self._tree[low])
+                low += 1
+            if high & 1:
+                high -= 1
+                best = self._heavier(best, self._tree[high])
+            low >>= 1
+            high >>= 1
+        return best
+
+    def _heavier(self, left, right):
+        if left < 0:
+            return right
+        if right < 0 or self.weights[left] >= self.weights[right]:
+            return left
+        return right
+
+
+class SuggestionIndex:
+    """Process-wide suggestion index kept current from SuggestionChange rows.
+
+    New and edited videos go to a small delta list and removed ones are
+    hidden with tombstones until the next full rebuild merges them in.
+
+    Requests never build the index themselves: ``suggest`` hands due work to
+    a background thread and answers from the current snapshot, which the
+    thread replaces in a single assignment once it's done. Until the first
+    build finishes there are no suggestions.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refreshing = False
+        # (main, delta, removed), always replaced as a whole.
+        self._snapshot = None
+        self._channels = set()
+        self._last_change_id = 0
+        self._built_at = 0.0
+        self._checked_at = 0.0
+
+    def suggest(self, query, limit=10):
+        if not normalize(query):
+            return []
+        self._schedule_refresh()
+        return self.lookup(query, limit)
+
+    def lookup(self, query, limit=10):
+        """Return suggestions from the loaded index without checking for changes."""
+        prefix = normalize(query)
+        snapshot = self._snapshot
+        if not prefix or snapshot is None:
+            return []
+        main, delta, removed = snapshot
+
+        main_matches = (
+            (
+                -main.weights[position],
+                main.keys[position],
+                main.texts[position],
+                main.kinds[position],
+                main.ref_ids[position],
+            )
+            for position in main.iter_matches(prefix)
+            if not (main.kinds[position] == VIDEO and main.ref_ids[position] in removed)
+        )
+        delta_matches = sorted(
+            (-weight, key, text, kind, ref_id)
+            for key, text, kind, ref_id, weight in delta
+            if key.startswith(prefix)
+        )
+
+        results = []
+        seen = set()
+        for _, key, text, kind, ref_id in heapq.merge(main_matches, delta_matches):
+            # Re-uploads often share a title; suggest each distinct text once.
+            if (kind, key) in seen:
+                continue
+            seen.add((kind, key))
+            result = {"text": text, "type": kind}
+            if kind == VIDEO:
+                result["video_id"] = ref_id
+            results.append(result)
+            if len(results) >= limit:
+                break
+        return results
+
+    def _schedule_refresh(self):
+        if time.monotonic() - self._checked_at < CHANGE_POLL_SECONDS:
+            return
+        with self._lock:
+            if self._refreshing or time.monotonic() - self._checked_at < CHANGE_POLL_SECONDS:
+                return
+            self._refreshing = True
+        threading.Thread(
+            target=self._refresh_in_background, name="suggestion-index", daemon=True
+        ).start()
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except DatabaseError:
+            logger.exception("Refreshing the suggestion index failed.")
+        finally:
+            # Failed refreshes are retried after the poll interval, not per request.
+            self._checked_at = time.monotonic()
+            with self._lock:
+                self._refreshing = False
+            connection.close()
+
+    def refresh(self):
+        """Apply pending changes, or rebuild when due, and swap the result in."""
+        if self._snapshot is None or time.monotonic() - self._built_at > FULL_REBUILD_SECONDS:
+            self._rebuild()
+        else:
+            self._apply_changes()
+            if len(self._snapshot[1]) > MAX_DELTA_ENTRIES:
+                self._rebuild()
+        self._checked_at = time.monotonic()
+
+    def load(self, entries, channels=(), last_change_id=0):
+        self._channels = set(channels)
+        self._last_change_id = last_change_id
+        self._built_at = time.monotonic()
+        self._snapshot = (PrefixIndex(entries), [], frozenset())
+
+    def _rebuild(self):
+        last_change_id = (
+            SuggestionChange.objects.order_by("-id").values_list("id", flat=True).first() or 0
+        )
+        entries = []
+        for video_id, title, views in Video.objects.values_list("id", "title", "views").iterator():
+            entries.append((normalize(title), title, VIDEO, video_id, views))
+        channels = set()
+        for username, total_views in (
+            Video.objects.values("user__username")
+            .annotate(total=Sum("views"))
+            .values_list("user__username", "total")
+        ):
+            channels.add(username)
+            entries.append((normalize(username), username, CHANNEL, 0, total_views or 0))
+
+        self.load(entries, channels, last_change_id)
+        SuggestionChange.objects.filter(
+            created_at__lt=timezone.now() - CHANGE_LOG_RETENTION
+        ).delete()
+
+    def _apply_changes(self):
+        changes = list(
+            SuggestionChange.objects.filter(id__gt=self._last_change_id)
+            .order_by("id")
+            .values_list("id", "video_id")
+        )
+        if not changes:
+            return
+        main, delta, removed = self._snapshot
+        changed_ids = {video_id for _, video_id in changes}
+        delta = [entry for entry in delta if entry[3] not in changed_ids]
+        for video_id, title, views, username in Video.objects.filter(
+            id__in=changed_ids
+        ).values_list("id", "title", "views", "user__username"):
+            delta.append((normalize(title), title, VIDEO, video_id, views))
+            if username not in self._channels:
+                self._channels.add(username)
+                delta.append((normalize(username), username, CHANNEL, 0, views))
+
+        self._last_change_id = changes[-1][0]
+        self._snapshot = (main, delta, removed | changed_ids)
+
+
+suggestion_index = SuggestionIndex()
@@ -1,3 +1,1492 @@
-from django.test import TestCase
+import asyncio
+import base64
+import hashlib
+import io
+import json
+import math
+import os
+import random
+import struct
+import tempfile
+import threading
+import unittest
+import warnings
+from datetime import datetime, time, timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.core.signals import request_finished, request_started
+from django.conf import settings
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    DatabaseError,
+    close_old_connections,
+    connection,
+    connections,
+    transaction,
+)
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.authentication import issue_access_token
+from backend.db_router import PrimaryReplicaRouter, ReplicaPinMiddleware
+from backend.sqlite import tune_sqlite
+from videos.cards import fragments, load_public_cards, video_card
+from videos.catalog import CatalogImporter, iter_video_export_rows, stream_jsonl
+from videos.counters import reconcile_comment_counts
+from videos.feed import rank_home_feed
+from videos.file_cleanup import drain_file_deletions, find_orphaned_files
+from videos.hyperloglog import HyperLogLog
+from videos.images import normalize_profile_photo, normalize_thumbnail
+from videos.live import InProcessBroker, stream_counter_events
+from videos.media_probe import MAX_BITRATE, probe_media
+from videos.models import (
+    ChannelDailyStats,
+    ChannelStats,
+    ChannelSubscription,
+    Comment,
+    PendingFileDeletion,
+    PlaybackProgress,
+    Playlist,
+    RelatedVideo,
+    SuggestionChange,
+    UniqueViewerSketch,
+    Video,
+    VideoDailyStats,
+    VideoLike,
+    VideoView,
+    WatchHistory,
+    WatchLater,
+)
+from videos.playlists import rebalance
+from videos.positions import key_between, keys_between
+from videos.progress import ProgressBuffer, _write, continue_watching
+from videos.recommendations import build_related_videos
+from videos.renderers import ORJSONRenderer
+from videos.rollups import rollup_day
+from videos.startup import measure_startup
+from videos.suggestions import VIDEO, PrefixIndex, SuggestionIndex, normalize
+from videos.throttling import TokenBucketThrottle
+from videos.views import VideoLiveThrottle, _serialize_video
+
+
+class HyperLogLogAccuracyTests(SimpleTestCase):
+    # Four standard errors (~6.5% at the default precision) keeps the
+    # deterministic hash well inside the bound.
+    tolerance = 4 * 1.04 / (2 ** 6)
+
+    def assert_close(self, estimate, exact):
+        self.assertLessEqual(abs(estimate - exact), max(2, exact * self.tolerance))
+
+    def test_estimates_match_exact_counts(self):
+        for exact in (1, 10, 100, 1_000, 10_000, 100_000):
+            sketch = HyperLogLog()
+            for index in range(exact):
+                sketch.add(f"user:{index}")
+            self.assert_close(sketch.count(), exact)
+
+    def test_repeated_viewers_do_not_change_sketch(self):
+        sketch = HyperLogLog()
+        self.assertTrue(sketch.add("ip:10.0.0.1"))
+        self.assertFalse(sketch.add("ip:10.0.0.1"))
+        self.assertEqual(sketch.count(), 1)
+
+    def test_merged_days_estimate_window_union(self):
+        # Seven overlapping daily audiences of 2,000 viewers each.
+        days = []
+        viewers = set()
+        for day in range(7):
+            sketch = HyperLogLog()
+            for index in range(day * 1_000, day * 1_000 + 2_000):
+                sketch.add(f"user:{index}")
+                viewers.add(index)
+            days.append(HyperLogLog.from_bytes(sketch.to_bytes()))
+
+        self.assert_close(HyperLogLog.union(days).count(), len(viewers))
+
+    def test_serialized_sketch_is_compact(self):
+        sketch = HyperLogLog()
+        sketch.add("user:1")
+        self.assertLess(len(sketch.to_bytes()), 100)
+        for index in range(100_000):
+            sketch.add(f"user:{index}")
+        self.assertLessEqual(len(sketch.to_bytes()), 4 * 1024)
+
+
+def _mp4_box(box_type, body):
+    return struct.pack(">I4s", 8 + len(body), box_type) + body
+
+
+def _ebml_element(element_id, body):
+    id_bytes = element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+    return id_bytes + bytes([0x01]) + len(body).to_bytes(7, "big") + body
+
+
+class MediaProbeTests(SimpleTestCase):
+    def test_probes_mp4_with_moov_after_media_data(self):
+        mvhd = _mp4_box(b"mvhd", struct.pack(">4xIIII", 0, 0, 1000, 12_500) + bytes(80))
+        tkhd = _mp4_box(b"tkhd", bytes(76) + struct.pack(">II", 854 << 16, 480 << 16))
+        hdlr = _mp4_box(b"hdlr", bytes(8) + b"vide" + bytes(12))
+        stsd = _mp4_box(b"stsd", struct.pack(">4xI", 1) + _mp4_box(b"avc1", bytes(78)))
+        stbl = _mp4_box(b"stbl", stsd)
+        trak = _mp4_box(b"trak", tkhd + _mp4_box(b"mdia", hdlr + _mp4_box(b"minf", stbl)))
+        data = (
+            _mp4_box(b"ftyp", b"isom" + bytes(4))
+            + _mp4_box(b"mdat", bytes(50_000))
+            + _mp4_box(b"moov", mvhd + trak)
+        )
+
+        metadata = probe_media(io.BytesIO(data))
+
+        self.assertEqual(metadata["duration"], 12.5)
+        self.assertEqual((metadata["width"], metadata["height"]), (854, 480))
+        self.assertEqual(metadata["codec"], "avc1")
+        self.assertEqual(metadata["bitrate"], int(len(data) * 8 / 12.5))
+
+    def test_probes_webm_header(self):
+        info = _ebml_element(0x1549A966, _ebml_element(0x4489, struct.pack(">d", 4000.0)))
+        video = _ebml_element(
+            0xE0, _ebml_element(0xB0, (640).to_bytes(2, "big")) + _ebml_element(0xBA, (360).to_bytes(2, "big"))
+        )
+        track = _ebml_element(
+            0xAE, _ebml_element(0x83, b"\x01") + _ebml_element(0x86, b"V_VP9") + video
+        )
+        segment = _ebml_element(
+            0x18538067,
+            info + _ebml_element(0x1654AE6B, track) + _ebml_element(0x1F43B675, bytes(1000)),
+        )
+        data = _ebml_element(0x1A45DFA3, _ebml_element(0x4282, b"webm")) + segment
+
+        metadata = probe_media(io.BytesIO(data))
+
+        self.assertEqual(metadata["duration"], 4.0)
+        self.assertEqual((metadata["width"], metadata["height"]), (640, 360))
+        self.assertEqual(metadata["codec"], "V_VP9")
+
+    def test_damaged_durations_are_dropped(self):
+        def mp4(mvhd_body):
+            return _mp4_box(b"ftyp", b"isom" + bytes(4)) + _mp4_box(
+                b"moov", _mp4_box(b"mvhd", mvhd_body + bytes(80))
+            )
+
+        def webm(duration):
+            info = _ebml_element(0x1549A966, _ebml_element(0x4489, struct.pack(">d", duration)))
+            return _ebml_element(0x1A45DFA3, b"") + _ebml_element(0x18538067, info)
+
+        for data in (
+            webm(math.nan),
+            webm(math.inf),
+            webm(-4000.0),
+            mp4(struct.pack(">4xIIII", 0, 0, 1000, 0)),
+        ):
+            metadata = probe_media(io.BytesIO(data))
+            self.assertIsNone(metadata["duration"])
+            self.assertIsNone(metadata["bitrate"])
+
+    def test_tiny_mvhd_duration_clamps_bitrate(self):
+        mvhd = _mp4_box(b"mvhd", struct.pack(">4xIIII", 0, 0, 4_000_000_000, 1) + bytes(80))
+        data = _mp4_box(b"ftyp", b"isom" + bytes(4)) + _mp4_box(b"moov", mvhd) + bytes(100_000)
+
+        metadata = probe_media(io.BytesIO(data))
+
+        self.assertGreater(metadata["duration"], 0)
+        self.assertEqual(metadata["bitrate"], MAX_BITRATE)
+
+    def test_unknown_format_returns_empty_metadata(self):
+        file_obj = io.BytesIO(b"RIFF" + bytes(100))
+        metadata = probe_media(file_obj)
+        self.assertEqual(set(metadata.values()), {None})
+        self.assertEqual(file_obj.tell(), 0)
+
+
+class SuggestionIndexTests(SimpleTestCase):
+    def test_prefix_matches_come_heaviest_first(self):
+        rng = random.Random(3)
+        words = ["cat", "car", "cart", "dog", "do", "cab"]
+        entries = [
+            (word, word, VIDEO, index, rng.randrange(1000))
+            for index, word in enumerate(rng.choice(words) for _ in range(500))
+        ]
+        index = PrefixIndex(entries)
+
+        for prefix in ("c", "ca", "car", "d", "x"):
+            expected = sorted(
+                (weight for key, _, _, _, weight in entries if key.startswith(prefix)),
+                reverse=True,
+            )
+            found = [index.weights[position] for position in index.iter_matches(prefix)]
+            self.assertEqual(found, expected)
+
+    def test_lookup_normalizes_and_deduplicates(self):
+        index = SuggestionIndex()
+        titles = [("Café Tour: Paris!", 50), ("cafe tour paris", 10), ("Cafeteria", 20)]
+        index.load(
+            (normalize(title), title, VIDEO, video_id, views)
+            for video_id, (title, views) in enumerate(titles, start=1)
+        )
+
+        results = index.lookup("CAFE", limit=5)
+
+        self.assertEqual([result["text"] for result in results], ["Café Tour: Paris!", "Cafeteria"])
+        self.assertEqual(index.lookup("  ", limit=5), [])
+
+    def test_suggest_answers_from_old_index_while_refresh_runs(self):
+        index = SuggestionIndex()
+        index.load([("cats", "Cats", VIDEO, 1, 10)])
+        started, release = threading.Event(), threading.Event()
+
+        def slow_refresh():
+            started.set()
+            release.wait(5)
+
+        with mock.patch.object(index, "refresh", side_effect=slow_refresh) as refresh:
+            self.assertEqual([r["text"] for r in index.suggest("ca")], ["Cats"])
+            self.assertTrue(started.wait(5))
+            # A second request while the first refresh is running neither
+            # waits nor starts another one.
+            self.assertEqual([r["text"] for r in index.suggest("ca")], ["Cats"])
+            release.set()
+        self.assertEqual(refresh.call_count, 1)
+
+
+class SuggestionIndexRefreshTests(TestCase):
+    def test_refresh_swaps_in_changes(self):
+        user = User.objects.create_user(username="maker")
+        first = Video.objects.create(user=user, title="Cats", file_id="f1", Video_url="https://x/1.mp4")
+        index = SuggestionIndex()
+        index.refresh()
+        self.assertEqual([r["text"] for r in index.lookup("ca")], ["Cats"])
+
+        second = Video.objects.create(user=user, title="Camping", file_id="f2", Video_url="https://x/2.mp4")
+        removed_id = first.id
+        first.delete()
+        SuggestionChange.log(removed_id, second.id)
+        index.refresh()
+
+        self.assertEqual([r["text"] for r in index.lookup("ca")], ["Camping"])
+
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+@unittest.skipIf(Image is None, "Pillow is not installed")
+class ImageNormalizationTests(SimpleTestCase):
+    def jpeg(self, size, **save_options):
+        output = io.BytesIO()
+        Image.new("RGB", size, (200, 30, 30)).save(output, "JPEG", **save_options)
+        return output.getvalue()
+
+    def test_profile_photo_is_cropped_and_stripped(self):
+        exif = Image.Exif()
+        exif[0x010F] = "PhoneMaker"
+        data, extension = normalize_profile_photo(self.jpeg((3000, 2000), exif=exif.tobytes()))
+
+        image = Image.open(io.BytesIO(data))
+        self.assertIn(extension, ("webp", "jpg"))
+        self.assertEqual(image.size, (256, 256))
+        self.assertEqual(dict(image.getexif()), {})
+
+    def test_thumbnail_from_data_url_keeps_aspect_ratio(self):
+        data_url = "data:image/jpeg;base64," + base64.b64encode(self.jpeg((1920, 1080))).decode()
+        data, _ = normalize_thumbnail(data_url)
+        self.assertEqual(Image.open(io.BytesIO(data)).size, (1280, 720))
+
+    def test_oversized_dimensions_are_rejected_before_decoding(self):
+        output = io.BytesIO()
+        Image.new("1", (9000, 8000)).save(output, "PNG")
+        with self.assertRaises(ValueError):
+            normalize_thumbnail(output.getvalue())
+
+
+class ThumbnailSrcsetTests(SimpleTestCase):
+    def test_generated_thumbnail_variants_keep_16_9(self):
+        video = Video(Video_url="https://ik.imagekit.io/demo/clip.mp4")
+        candidates = [entry.split(" ") for entry in video.thumbnail_srcset.split(", ")]
+        self.assertEqual(
+            [width for _, width in candidates], ["240w", "320w", "480w", "640w", "960w", "1280w"]
+        )
+        self.assertEqual(
+            candidates[0][0],
+            "https://ik.imagekit.io/demo/clip.mp4/ik-thumbnail.jpg?tr=so-0,w-240,h-135,f-auto",
+        )
+        self.assertEqual(video.display_thumbnail_url, candidates[2][0])
+
+    def test_custom_thumbnail_is_resized_and_keeps_its_query(self):
+        video = Video(
+            Video_url="https://ik.imagekit.io/demo/clip.mp4",
+            thumbnail_url="https://ik.imagekit.io/demo/thumbnails/t.webp?v=2",
+        )
+        self.assertEqual(
+            video.thumbnail_variant_url(640),
+            "https://ik.imagekit.io/demo/thumbnails/t.webp?v=2&tr=w-640,h-360,f-auto",
+        )
+        self.assertEqual(Video().thumbnail_srcset, "")
+
+
+class VideoCardTests(SimpleTestCase):
+    def setUp(self):
+        fragments.clear()
+        self.video = Video(
+            id=7,
+            user=User(id=3, username="alice"),
+            title='Say "hi" \u2014 caf\u00e9',
+            Video_url="https://ik.imagekit.io/demo/clip.mp4",
+            views=10,
+        )
+        self.video.created_at = self.video.updated_at = timezone.now()
+
+    def render(self, **fields):
+        return json.loads(ORJSONRenderer().render({"results": [video_card(self.video, **fields)]}))
+
+    def test_card_matches_serialized_video(self):
+        expected = _serialize_video(self.video, subscriber_count=2, is_subscribed=True)
+        card = self.render(subscriber_count=2, is_subscribed=True)["results"][0]
+        self.assertEqual(card, expected)
+
+    def test_counters_are_fresh_on_cached_fragment(self):
+        self.render(subscriber_count=0, is_subscribed=False)
+        self.video.views = 11
+        self.video.title = "Renamed"
+        card = self.render(subscriber_count=0, is_subscribed=False)["results"][0]
+        self.assertEqual(card["views"], 11)
+        # The static part is only re-encoded once the version changes.
+        self.assertNotEqual(card["title"], "Renamed")
+        self.video.updated_at = timezone.now()
+        card = self.render(subscriber_count=0, is_subscribed=False)["results"][0]
+        self.assertEqual(card["title"], "Renamed")
+
+
+class PublicCardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username="alice")
+        self.video = Video.objects.create(
+            user=user, title="Clip", file_id="f1", Video_url="https://ik.imagekit.io/demo/clip.mp4"
+        )
+
+    def card(self):
+        _, fragment = load_public_cards([self.video.id])[self.video.id]
+        return json.loads(b"{" + fragment + b"}")
+
+    def test_cached_static_part_with_fresh_counters(self):
+        self.assertEqual(self.card()["views"], 0)
+        Video.objects.filter(id=self.video.id).update(views=5, title="Not re-read")
+        # One query for versions and counters; the static part is cached.
+        with self.assertNumQueries(1):
+            card = self.card()
+        self.assertEqual((card["views"], card["title"]), (5, "Clip"))
+
+    def test_edit_changes_the_cached_version(self):
+        self.card()
+        self.video.title = "Renamed"
+        self.video.save()
+        self.assertEqual(self.card()["title"], "Renamed")
+
+    def test_deleted_videos_are_skipped(self):
+        self.assertEqual(load_public_cards([self.video.id + 1]), {})
+
+    def test_edits_bump_the_fragment_version_and_counter_writes_do_not(self):
+        version = self.video.updated_at
+        self.video.views = 3
+        self.video.save(update_fields=["views"])
+        self.video.refresh_from_db()
+        self.assertEqual(self.video.updated_at, version)
+
+        self.video.title = "Renamed"
+        self.video.save()
+        self.video.refresh_from_db()
+        self.assertGreater(self.video.updated_at, version)
+
+
+class StartupBudgetTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.report = measure_startup()
+
+    # Wall-clock startup time depends on the machine; CI checks it with
+    # `manage.py profile_startup --budget-ms`.
+    def test_heavy_integrations_load_lazily(self):
+        self.assertEqual(self.report["heavy_modules"], [])
+
+
+class IdempotentLibraryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.viewer = User.objects.create_user(username="viewer")
+        self.channels = [User.objects.create_user(username=f"channel{i}") for i in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+
+    def subscriber_counts(self):
+        return dict(ChannelStats.objects.values_list("user__username", "subscriber_count"))
+
+    def test_repeated_put_and_delete_keep_counts_exact(self):
+        for _ in range(2):
+            response = self.client.put("/api/videos/channel/channel0/subscribe/")
+            self.assertEqual(response.json()["subscriber_count"], 1)
+        for _ in range(2):
+            response = self.client.delete("/api/videos/channel/channel0/subscribe/")
+            self.assertEqual(response.json()["subscriber_count"], 0)
+
+    def test_bulk_subscribe_recounts_channels(self):
+        self.client.put("/api/videos/channel/channel0/subscribe/")
+        response = self.client.post(
+            "/api/videos/subscriptions/bulk/",
+            {"add": ["channel0", "channel1", "channel2", "missing"], "remove": ["channel2"]},
+            format="json",
+        )
+        self.assertEqual(response.json()["unknown"], ["missing"])
+        self.assertEqual(
+            self.subscriber_counts(), {"channel0": 1, "channel1": 1, "channel2": 0}
+        )
+
+    def test_bulk_endpoints_reject_non_object_bodies(self):
+        for path in ("/api/videos/subscriptions/bulk/", "/api/videos/watch-later/bulk/"):
+            for body in ([1, 2], "channel0", 5):
+                response = self.client.post(path, body, format="json")
+                self.assertEqual(response.status_code, 400, (path, body))
+                self.assertFalse(response.json()["success"])
+
+    def saved(self):
+        return set(WatchLater.objects.filter(user=self.viewer).values_list("video_id", flat=True))
+
+    def make_videos(self, count):
+        return [
+            Video.objects.create(
+                user=self.channels[0],
+                title=f"Clip {index}",
+                file_id=f"clip{index}",
+                Video_url=f"https://ik.imagekit.io/demo/clip{index}.mp4",
+            ).id
+            for index in range(count)
+        ]
+
+    def test_watch_later_put_and_delete_are_idempotent(self):
+        [video_id] = self.make_videos(1)
+        for _ in range(2):
+            response = self.client.put(f"/api/videos/{video_id}/watch-later/")
+            self.assertEqual(response.json(), {"success": True, "is_watch_later": True})
+        self.assertEqual(self.saved(), {video_id})
+        for _ in range(2):
+            response = self.client.delete(f"/api/videos/{video_id}/watch-later/")
+            self.assertEqual(response.json(), {"success": True, "is_watch_later": False})
+        self.assertEqual(self.saved(), set())
+        self.assertEqual(self.client.put(f"/api/videos/{video_id + 99}/watch-later/").status_code, 404)
+
+    def test_watch_later_bulk(self):
+        first, second, third = self.make_videos(3)
+        self.client.put(f"/api/videos/{third}/watch-later/")
+        response = self.client.post(
+            "/api/videos/watch-later/bulk/",
+            {"add": [first, second, first, 999], "remove": [second, third]},
+            format="json",
+        )
+        self.assertEqual(
+            response.json(),
+            {"success": True, "saved": [first], "removed": [second, third], "unknown": [999]},
+        )
+        self.assertEqual(self.saved(), {first})
+
+
+class PositionKeyTests(SimpleTestCase):
+    def test_random_inserts_stay_ordered_and_short(self):
+        rng = random.Random(7)
+        keys = []
+        for _ in range(5_000):
+            index = rng.randrange(len(keys) + 1)
+            before = keys[index - 1] if index else None
+            after = keys[index] if index < len(keys) else None
+            keys.insert(index, key_between(before, after))
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(set(keys)), len(keys))
+        self.assertLessEqual(max(map(len, keys)), 12)
+
+    def test_batches_fill_gaps_in_order(self):
+        for before, after in ((None, None), ("n1", None), (None, "n1"), ("n1", "n2")):
+            keys = keys_between(before, after, 1_000)
+            self.assertEqual(keys, sorted(set(keys)))
+            self.assertTrue(before is None or keys[0] > before)
+            self.assertTrue(after is None or keys[-1] < after)
+
+
+class PlaylistTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="curator")
+        self.videos = [
+            Video.objects.create(
+                user=self.user,
+                title=f"Clip {i}",
+                file_id=f"f{i}",
+                Video_url=f"https://ik.imagekit.io/demo/{i}.mp4",
+            )
+            for i in range(6)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        response = self.client.post("/api/videos/playlists/", {"title": "Mix"}, format="json")
+        self.playlist = Playlist.objects.get(id=response.json()["playlist"]["id"])
+        self.client.post(
+            f"/api/videos/playlists/{self.playlist.id}/items/",
+            {"video_ids": [video.id for video in self.videos]},
+            format="json",
+        )
+
+    def titles(self, page_size=50):
+        titles, url = [], f"/api/videos/playlists/{self.playlist.id}/?page_size={page_size}"
+        while url:
+            body = self.client.get(url).json()
+            titles += [card["title"] for card in body["results"]]
+            url = body["next"]
+        return titles
+
+    def item_id(self, index):
+        return self.playlist.items.get(video=self.videos[index]).id
+
+    def test_move_writes_one_row(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                f"/api/videos/playlists/{self.playlist.id}/items/{self.item_id(0)}/move/",
+                {"after": self.item_id(3)},
+                format="json",
+            )
+        self.assertTrue(response.json()["success"])
+        updates = [query for query in queries if query["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            self.titles(page_size=4), ["Clip 1", "Clip 2", "Clip 3", "Clip 0", "Clip 4", "Clip 5"]
+        )
+
+    def test_add_requires_a_list_of_ids(self):
+        url = f"/api/videos/playlists/{self.playlist.id}/items/"
+        for body in ({"video_ids": "123"}, {"video_ids": {"1": 1}}, {"video_ids": 5}, [1, 2]):
+            response = self.client.post(url, body, format="json")
+            self.assertEqual(response.status_code, 400, body)
+        self.assertEqual(self.playlist.items.count(), 6)
+
+    def test_bulk_add_skips_duplicates_and_unknown_videos(self):
+        response = self.client.post(
+            f"/api/videos/playlists/{self.playlist.id}/items/",
+            {"video_ids": [self.videos[0].id, self.videos[-1].id + 100]},
+            format="json",
+        )
+        self.assertEqual(response.json()["added"], [])
+        self.playlist.refresh_from_db()
+        self.assertEqual(self.playlist.item_count, 6)
+
+    def test_rebalance_keeps_order(self):
+        before = self.titles()
+        rebalance(self.playlist)
+        self.assertEqual(self.titles(), before)
+
+
+class PlaybackProgressTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="watcher")
+        self.videos = [
+            Video.objects.create(
+                user=self.user,
+                title=f"Talk {i}",
+                file_id=f"t{i}",
+                Video_url=f"https://ik.imagekit.io/demo/t{i}.mp4",
+                duration=600,
+            )
+            for i in range(3)
+        ]
+        self.buffer = ProgressBuffer(interval=None)
+
+    def test_heartbeats_coalesce_into_one_upsert(self):
+        for second in range(0, 300, 5):
+            for video in self.videos:
+                self.buffer.record(self.user.id, video.id, second)
+        # Videos and users lookup, then one INSERT ... ON CONFLICT.
+        with self.assertNumQueries(3):
+            self.assertEqual(self.buffer.flush(), 3)
+        self.assertEqual(
+            set(PlaybackProgress.objects.values_list("position_seconds", flat=True)), {295}
+        )
+
+        self.buffer.record(self.user.id, self.videos[0].id, 590)
+        self.buffer.record(self.user.id, self.videos[1].id, 320)
+        self.buffer.flush()
+        self.assertEqual(PlaybackProgress.objects.count(), 3)
+        self.assertEqual(
+            [row[:2] for row in continue_watching(self.user.id)],
+            [(self.videos[1].id, 320), (self.videos[2].id, 295)],
+        )
+
+    def test_deleted_videos_are_dropped_from_batch(self):
+        self.buffer.record(self.user.id, self.videos[0].id, 60)
+        self.buffer.record(self.user.id, self.videos[-1].id + 100, 60)
+        self.assertEqual(self.buffer.flush(), 1)
+
+    def test_failed_flush_is_logged_and_retried(self):
+        class Stop(Exception):
+            pass
+
+        self.buffer.record(self.user.id, self.videos[0].id, 60)
+        self.buffer.record(self.user.id, self.videos[1].id, 60)
+        attempts = []
+
+        def flaky_write(batch):
+            attempts.append(batch)
+            if len(attempts) == 1:
+                # A newer heartbeat arrives while the first write fails.
+                self.buffer.record(self.user.id, self.videos[0].id, 90)
+                raise DatabaseError("connection lost")
+            return _write(batch)
+
+        with (
+            mock.patch("videos.progress._write", side_effect=flaky_write),
+            mock.patch("videos.progress.time.sleep", side_effect=[None, None, Stop]),
+            mock.patch("videos.progress.close_old_connections") as close_connections,
+            self.assertLogs("videos.progress", "ERROR") as logs,
+        ):
+            with self.assertRaises(Stop):
+                self.buffer._run()
+
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(close_connections.call_count, 4)
+        self.assertEqual(
+            dict(PlaybackProgress.objects.values_list("video_id", "position_seconds")),
+            {self.videos[0].id: 90, self.videos[1].id: 60},
+        )
+
+    def test_unexpected_error_does_not_stop_the_flusher(self):
+        class Stop(Exception):
+            pass
+
+        self.buffer.record(self.user.id, self.videos[0].id, 60)
+        attempts = []
+
+        def broken_write(batch):
+            attempts.append(batch)
+            if len(attempts) == 1:
+                self.buffer.record(self.user.id, self.videos[1].id, 30)
+                raise TypeError("bad heartbeat")
+            return _write(batch)
+
+        with (
+            mock.patch("videos.progress._write", side_effect=broken_write),
+            mock.patch("videos.progress.time.sleep", side_effect=[None, None, Stop]),
+            mock.patch("videos.progress.close_old_connections"),
+            self.assertLogs("videos.progress", "ERROR") as logs,
+        ):
+            with self.assertRaises(Stop):
+                self.buffer._run()
+
+        self.assertEqual(len(attempts), 2)
+        self.assertIn("batch dropped", logs.output[0])
+        # The failing batch is dropped; later heartbeats still get written.
+        self.assertEqual(
+            dict(PlaybackProgress.objects.values_list("video_id", "position_seconds")),
+            {self.videos[1].id: 30},
+        )
+
+
+class ContendedLock:
+    """Lock that records whether anyone had to wait for it."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.contended = threading.Event()
+
+    def acquire(self, timeout=-1):
+        if self._lock.acquire(blocking=False):
+            return True
+        self.contended.set()
+        return self._lock.acquire(timeout=timeout)
+
+    def release(self):
+        self._lock.release()
+
+    def locked(self):
+        return self._lock.locked()
+
+
+class SQLiteWriteQueueTests(SimpleTestCase):
+    alias = "sqlite_queue"
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # A scratch file rather than a test database, registered once the
+        # runner and SimpleTestCase have set theirs up.
+        directory = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(directory.cleanup)
+        config = tune_sqlite(
+            {
+                "ENGINE": "django.db.backends.sqlite3",
+                "NAME": os.path.join(directory.name, "queue.sqlite3"),
+            },
+            busy_timeout_seconds=2,
+            mmap_size=1 << 20,
+            cache_size_kib=1024,
+        )
+        configured = connections.configure_settings(
+            {DEFAULT_DB_ALIAS: settings.DATABASES[DEFAULT_DB_ALIAS], cls.alias: config}
+        )
+        connections.settings[cls.alias] = configured[cls.alias]
+        cls.databases = {cls.alias}
+        cls.addClassCleanup(connections.settings.pop, cls.alias)
+        cls.addClassCleanup(connections.__delitem__, cls.alias)
+        cls.addClassCleanup(connections[cls.alias].close)
+
+    def setUp(self):
+        self.db = connections[self.alias]
+        self.execute("CREATE TABLE item (id INTEGER PRIMARY KEY, name TEXT)")
+        self.addCleanup(self.execute, "DROP TABLE item")
+
+    def execute(self, query, params=None):
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute(query, params)
+
+    def insert(self, name):
+        self.execute("INSERT INTO item (name) VALUES (%s)", [name])
+
+    def names(self):
+        with self.db.cursor() as cursor:
+            cursor.execute("SELECT name FROM item ORDER BY id")
+            return [row[0] for row in cursor.fetchall()]
+
+    def hold_transaction(self):
+        """Start a thread that writes in atomic() and commits when told to."""
+        holding, release = threading.Event(), threading.Event()
+
+        def writer():
+            try:
+                with transaction.atomic(using=self.alias):
+                    self.insert("holder")
+                    holding.set()
+                    release.wait(5)
+            finally:
+                connections[self.alias].close()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        self.assertTrue(holding.wait(5))
+        return thread, release
+
+    def test_pragmas_are_applied(self):
+        with self.db.cursor() as cursor:
+            values = {}
+            for pragma in ("journal_mode", "synchronous", "mmap_size", "cache_size", "temp_store"):
+                cursor.execute(f"PRAGMA {pragma}")
+                values[pragma] = cursor.fetchone()[0]
+        self.assertEqual(
+            values,
+            {"journal_mode": "wal", "synchronous": 1, "mmap_size": 1 << 20, "cache_size": -1024, "temp_store": 2},
+        )
+
+    def test_writers_queue_behind_an_open_transaction(self):
+        def autocommit():
+            self.insert("queued")
+
+        def atomic():
+            with transaction.atomic(using=self.alias):
+                self.insert("queued")
+
+        def queued(write):
+            try:
+                write()
+            finally:
+                connections[self.alias].close()
+
+        for label, write in (("autocommit", autocommit), ("atomic", atomic)):
+            lock = ContendedLock()
+            name = str(self.db.settings_dict["NAME"])
+            with self.subTest(label), mock.patch.dict("backend.sqlite.base._write_locks", {name: lock}):
+                holder, release = self.hold_transaction()
+                waiter = threading.Thread(target=queued, args=[write])
+                waiter.start()
+
+                self.assertTrue(lock.contended.wait(5))  # queued on the lock, not in SQLite
+                self.assertTrue(waiter.is_alive())
+                release.set()
+                holder.join(5)
+                waiter.join(5)
+                self.assertEqual(self.names()[-2:], ["holder", "queued"])
+
+    def test_lock_is_released_on_commit_rollback_close_and_errors(self):
+        lock = self.db.write_lock
+
+        with transaction.atomic(using=self.alias):
+            self.insert("committed")
+            self.assertTrue(lock.locked())
+        self.assertFalse(lock.locked())
+
+        with transaction.atomic(using=self.alias):
+            self.insert("rolled back")
+            transaction.set_rollback(True, using=self.alias)
+        self.assertFalse(lock.locked())
+
+        with self.assertRaises(ValueError):
+            with transaction.atomic(using=self.alias):
+                self.insert("failed")
+                raise ValueError
+        self.assertFalse(lock.locked())
+
+        with self.assertRaises(DatabaseError):
+            self.execute("INSERT INTO missing (name) VALUES (%s)", ["nowhere"])
+        self.assertFalse(lock.locked())
+
+        with transaction.atomic(using=self.alias):
+            self.insert("closed")
+            self.db.close()
+        self.assertFalse(lock.locked())
+
+        self.assertEqual(self.names(), ["committed"])
+
+    def test_reads_do_not_take_the_lock(self):
+        self.insert("committed")
+        holder, release = self.hold_transaction()
+        try:
+            with mock.patch.object(self.db, "acquire_write_lock") as acquire:
+                self.assertEqual(self.names(), ["committed"])
+            acquire.assert_not_called()
+        finally:
+            release.set()
+            holder.join(5)
+
+
+@override_settings(REPLICA_PIN_SECONDS=5)
+@mock.patch("backend.db_router.get_replica_aliases", return_value=["replica_1"])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def request(self, method="get", user_id=None):
+        request = getattr(RequestFactory(), method)("/")
+        if user_id is not None:
+            # The SPA calls the API cross-site: a bearer token and no cookies.
+            token = issue_access_token(User(id=user_id, username=f"u{user_id}", is_active=True))
+            request.META["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+        return request
+
+    def read_aliases(self, request, write=False):
+        seen = []
+
+        def view(request):
+            router = PrimaryReplicaRouter()
+            seen.append(router.db_for_read(Video))
+            if write:
+                router.db_for_write(Video)
+                seen.append(router.db_for_read(Video))
+            return HttpResponse()
+
+        ReplicaPinMiddleware(view)(request)
+        return seen
+
+    def test_reads_go_to_replica(self, _):
+        self.assertEqual(self.read_aliases(self.request(user_id=1)), ["replica_1"])
+
+    def test_write_pins_client_without_cookies(self, _):
+        self.assertEqual(self.read_aliases(self.request("post", user_id=1), write=True), ["default"] * 2)
+        self.assertEqual(self.read_aliases(self.request(user_id=1)), ["default"])
+        # Other clients and anonymous ones still read from replicas.
+        self.assertEqual(self.read_aliases(self.request(user_id=2)), ["replica_1"])
+        self.assertEqual(self.read_aliases(self.request()), ["replica_1"])
+        # The pin only lasts for the request.
+        self.assertEqual(PrimaryReplicaRouter().db_for_read(Video), "replica_1")
+
+    def test_get_that_writes_pins_the_rest_of_the_request_and_after(self, _):
+        self.assertEqual(self.read_aliases(self.request(user_id=1), write=True), ["replica_1", "default"])
+        self.assertEqual(self.read_aliases(self.request(user_id=1)), ["default"])
+
+    def test_post_without_writes_does_not_pin(self, _):
+        self.assertEqual(self.read_aliases(self.request("post", user_id=1)), ["default"])
+        self.assertEqual(self.read_aliases(self.request(user_id=1)), ["replica_1"])
+
+
+class _FixedKeyThrottle(TokenBucketThrottle):
+    rate = "10/min"
+
+    def get_cache_key(self, request, view):
+        return "throttle_test"
+
+
+class TokenBucketThrottleTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = 1_000.0
+
+    def allowed(self, count):
+        throttle = _FixedKeyThrottle()
+        throttle.timer = lambda: self.now
+        return sum(throttle.allow_request(None, None) for _ in range(count))
+
+    def test_burst_then_steady_refill(self):
+        self.assertEqual(self.allowed(15), 10)
+        self.now += 30  # half the window refills half the bucket
+        self.assertEqual(self.allowed(10), 5)
+        self.now += 3_600  # never more than a full bucket
+        self.assertEqual(self.allowed(15), 10)
+
+    def test_concurrent_requests_spend_each_token_once(self):
+        results = []
+
+        def hit():
+            results.append(self.allowed(5))
+
+        threads = [threading.Thread(target=hit) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sum(results), 10)
+
+
+class DailyRollupTests(TestCase):
+    def setUp(self):
+        self.channel = User.objects.create_user(username="creator")
+        self.videos = [
+            Video.objects.create(
+                user=self.channel,
+                title=f"Daily {i}",
+                file_id=f"d{i}",
+                Video_url=f"https://ik.imagekit.io/demo/d{i}.mp4",
+            )
+            for i in range(2)
+        ]
+
+    def test_views_are_counted_per_day_and_kept_by_rollups(self):
+        today = timezone.localdate()
+        yesterday = today - timedelta(days=1)
+        VideoDailyStats.objects.create(video=self.videos[0], day=yesterday, views=2)
+        for _ in range(3):
+            VideoDailyStats.count_view(self.videos[0].id)
+        VideoDailyStats.count_view(self.videos[1].id)
+
+        rollup_day(today)
+        rollup_day(yesterday)  # backfill
+        views = dict(
+            VideoDailyStats.objects.filter(video=self.videos[0]).values_list("day", "views")
+        )
+        self.assertEqual(views, {today: 3, yesterday: 2})
+        self.assertEqual(ChannelDailyStats.objects.get(day=today).views, 4)
+
+    def test_recording_a_view_does_not_log_a_row(self):
+        APIClient().get(f"/api/videos/{self.videos[0].id}/")
+        self.assertFalse(VideoView.objects.exists())
+        self.assertEqual(VideoDailyStats.objects.get(video=self.videos[0]).views, 1)
+
+    def test_channel_viewers_counted_once_across_videos(self):
+        for video in self.videos:
+            UniqueViewerSketch.record(video, "user:1")
+        UniqueViewerSketch.record(self.videos[1], "user:2")
+        rollup_day(timezone.localdate())
+
+        self.assertEqual(
+            sum(VideoDailyStats.objects.values_list("unique_viewers", flat=True)), 3
+        )
+        self.assertEqual(ChannelDailyStats.objects.get(channel=self.channel).unique_viewers, 2)
+
+
+class UploadDeduplicationTests(TestCase):
+    content = b"not really a video, but the same bytes twice"
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="uploader")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.storage = mock.Mock()
+        self.storage.upload_video.return_value = {
+            "file_id": "file-1",
+            "url": "https://ik.imagekit.io/demo/videos/clip.mp4",
+        }
+        patcher = mock.patch("videos.views.get_storage", return_value=self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def upload(self):
+        return self.client.post(
+            "/api/videos/upload/",
+            {
+                "title": "Clip",
+                "video_file": SimpleUploadedFile("clip.mp4", self.content, content_type="video/mp4"),
+            },
+            format="multipart",
+        )
+
+    def test_reupload_reuses_stored_file(self):
+        self.assertTrue(self.upload().json()["success"])
+        self.assertTrue(self.upload().json()["success"])
+        self.assertEqual(self.storage.upload_video.call_count, 1)
+        self.assertEqual(set(Video.objects.values_list("file_id", flat=True)), {"file-1"})
+
+    def test_concurrent_upload_is_asked_to_retry(self):
+        # Another request claimed this file and is still uploading it.
+        size = len(self.content)
+        content_sha256 = hashlib.sha256(self.content).hexdigest()
+        cache.add(f"videos:upload:{content_sha256}:{size}", True)
+
+        response = self.upload()
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response["Retry-After"], "5")
+        self.storage.upload_video.assert_not_called()
+
+        # Once it saves its video, the retry reuses the stored file.
+        Video.objects.create(
+            user=self.user,
+            title="First click",
+            file_id="file-0",
+            Video_url="https://ik.imagekit.io/demo/videos/first.mp4",
+            content_sha256=content_sha256,
+            file_size=size,
+        )
+        response = self.upload()
+        self.assertTrue(response.json()["success"])
+        self.storage.upload_video.assert_not_called()
+        self.assertEqual(Video.objects.get(id=response.json()["video_id"]).file_id, "file-0")
+
+
+class FileDeletionOutboxTests(TestCase):
+    def setUp(self):
+        self.storage = mock.Mock(max_bulk_delete=100, max_list_page=1000)
+        patcher = mock.patch("videos.file_cleanup.get_storage", return_value=self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        Video.objects.create(
+            user=User.objects.create_user(username="owner"),
+            title="Still here",
+            file_id="shared",
+            Video_url="https://ik.imagekit.io/demo/videos/shared.mp4",
+        )
+
+    def test_drain_deletes_keeps_referenced_and_backs_off(self):
+        PendingFileDeletion.enqueue("gone", "flaky", "shared")
+        self.storage.delete_files.return_value = ["gone"]
+        self.assertEqual(drain_file_deletions(), (1, 1, 1))
+        self.assertEqual(sorted(self.storage.delete_files.call_args.args[0]), ["flaky", "gone"])
+
+        entry = PendingFileDeletion.objects.get()
+        self.assertEqual((entry.file_id, entry.attempts), ("flaky", 1))
+        self.assertGreater(entry.next_attempt_at, timezone.now() + timedelta(minutes=1))
+        self.assertEqual(drain_file_deletions(), (0, 0, 0))  # not due yet
+
+        PendingFileDeletion.objects.update(next_attempt_at=timezone.now())
+        self.storage.delete_files.side_effect = RuntimeError("ImageKit is down")
+        self.assertEqual(drain_file_deletions(), (0, 0, 1))
+        entry.refresh_from_db()
+        self.assertEqual((entry.attempts, entry.last_error), (2, "ImageKit is down"))
+
+    def test_orphans_skip_referenced_and_recent_files(self):
+        old = timezone.now() - timedelta(days=1)
+        self.storage.list_files.return_value = [
+            {"file_id": "shared", "url": "", "created_at": old},
+            {"file_id": "x", "url": "https://ik.imagekit.io/demo/videos/shared.mp4", "created_at": old},
+            {"file_id": "fresh", "url": "", "created_at": timezone.now()},
+            {"file_id": "orphan", "url": "", "created_at": old},
+        ]
+        orphans = [item["file_id"] for item in find_orphaned_files("videos")]
+        self.assertEqual(orphans, ["orphan"])
+
+
+class CoWatchRelatedVideoTests(TestCase):
+    def setUp(self):
+        channel = User.objects.create_user(username="studio")
+        self.videos = {
+            name: Video.objects.create(
+                user=channel,
+                title=name,
+                file_id=name,
+                Video_url=f"https://ik.imagekit.io/demo/{name}.mp4",
+            )
+            for name in "ABCD"
+        }
+        for index, names in enumerate(["AB", "AB", "AC"]):
+            user = User.objects.create_user(username=f"watcher{index}")
+            for name in names:
+                WatchHistory.objects.create(user=user, video=self.videos[name])
+        fan = User.objects.create_user(username="fan")
+        for name in "CD":
+            VideoLike.objects.create(user=fan, video=self.videos[name], value=VideoLike.LIKE)
+
+    def related(self, name):
+        return [
+            (row.related.title, round(row.score, 3))
+            for row in RelatedVideo.objects.filter(video=self.videos[name]).select_related("related")
+        ]
+
+    def test_neighbours_ranked_by_cosine_similarity(self):
+        self.assertEqual(build_related_videos(), 4)
+        # A: three watchers; B: two of them; C: one of them plus a like (weight 2).
+        self.assertEqual(self.related("A"), [("B", 0.816), ("C", 0.258)])
+        self.assertEqual(self.related("D"), [("C", 0.894)])
+
+    def test_top_k_limits_neighbours(self):
+        build_related_videos(top_k=1)
+        self.assertEqual(self.related("A"), [("B", 0.816)])
+
+
+class HomeFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.viewer = User.objects.create_user(username="viewer")
+        self.channel = User.objects.create_user(username="channel")
+        self.other = User.objects.create_user(username="other")
+        ChannelSubscription.objects.create(subscriber=self.viewer, channel=self.channel)
+
+    def make_video(self, user, name, days_old=0):
+        video = Video.objects.create(
+            user=user,
+            title=name,
+            file_id=name,
+            Video_url=f"https://ik.imagekit.io/demo/{name}.mp4",
+        )
+        Video.objects.filter(id=video.id).update(created_at=timezone.now() - timedelta(days=days_old))
+        return video.id
+
+    def test_subscriptions_rank_first_and_watched_and_own_are_left_out(self):
+        old_other = self.make_video(self.other, "old-other", days_old=30)
+        subscribed = self.make_video(self.channel, "subscribed", days_old=1)
+        watched = self.make_video(self.other, "watched")
+        own = self.make_video(self.viewer, "own")
+        WatchHistory.objects.create(user=self.viewer, video_id=watched)
+
+        feed = rank_home_feed(self.viewer)
+
+        self.assertEqual(feed[0], subscribed)
+        self.assertIn(old_other, feed)
+        self.assertNotIn(watched, feed)
+        self.assertNotIn(own, feed)
+
+    def test_short_feed_is_backfilled_with_newest_unwatched(self):
+        video_ids = [self.make_video(self.other, f"v{index}", days_old=index) for index in range(5)]
+        with mock.patch("videos.feed.FRESH_CANDIDATES", 1), mock.patch("videos.feed.TRENDING_LIMIT", 1):
+            feed = rank_home_feed(self.viewer)
+        self.assertEqual(sorted(feed), sorted(video_ids))
+        self.assertEqual(feed[-3:], video_ids[-3:])
+
+    def test_fully_watched_catalog_falls_back_to_trending(self):
+        video_ids = [self.make_video(self.other, f"v{index}") for index in range(3)]
+        own = self.make_video(self.viewer, "own")
+        for video_id in video_ids:
+            WatchHistory.objects.create(user=self.viewer, video_id=video_id)
+
+        feed = rank_home_feed(self.viewer)
+
+        self.assertEqual(sorted(feed), sorted(video_ids))
+        self.assertNotIn(own, feed)
+
+    def test_query_count_does_not_grow_with_history(self):
+        video_ids = [self.make_video(self.other, f"v{index}") for index in range(3)]
+        WatchHistory.objects.create(user=self.viewer, video_id=video_ids[0])
+        rank_home_feed(self.viewer)  # warm the trending cache
+
+        with self.assertNumQueries(6):
+            rank_home_feed(self.viewer)
+        for video_id in video_ids[1:]:
+            WatchHistory.objects.create(user=self.viewer, video_id=video_id)
+        with self.assertNumQueries(6):
+            rank_home_feed(self.viewer)
+
+
+class VideoListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.viewer = User.objects.create_user(username="viewer")
+        self.channels = [User.objects.create_user(username=f"channel{i}") for i in range(4)]
+        ChannelSubscription.objects.create(subscriber=self.viewer, channel=self.channels[0])
+        for index in range(12):
+            Video.objects.create(
+                user=self.channels[index % 4],
+                title=f"Cat {index}" if index % 2 else f"Dog {index}",
+                file_id=f"v{index}",
+                Video_url=f"https://ik.imagekit.io/demo/v{index}.mp4",
+                views=index,
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+
+    def test_page_is_served_from_cards_in_constant_queries(self):
+        self.client.get("/api/videos/")  # warm the card cache
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/videos/?ordering=-views")
+
+        # Count, page ids, card counters, subscriber counts and subscriptions.
+        self.assertEqual(len(queries), 5)
+        results = response.json()["results"]
+        self.assertEqual([card["views"] for card in results], list(range(11, -1, -1)))
+        self.assertIn("comment_count", results[0])
+        subscribed = {card["channel"]: card["is_subscribed"] for card in results}
+        self.assertEqual(subscribed, {"channel0": True, "channel1": False, "channel2": False, "channel3": False})
+
+    def test_search_and_channel_filters(self):
+        response = self.client.get("/api/videos/?search=cat&channel=CHANNEL1&ordering=-views")
+        self.assertEqual(
+            [card["title"] for card in response.json()["results"]], ["Cat 9", "Cat 5", "Cat 1"]
+        )
+
+
+class CommentCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="commenter")
+        self.video = Video.objects.create(
+            user=self.user, title="Talk", file_id="talk", Video_url="https://ik.imagekit.io/demo/talk.mp4"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add_comment(self, text, parent_id=None):
+        response = self.client.post(
+            f"/api/videos/{self.video.id}/comments/add/",
+            {"text": text, "parent_id": parent_id},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()["comment"]["id"]
+
+    def counts(self, thread_id):
+        self.video.refresh_from_db()
+        return self.video.comment_count, Comment.objects.get(id=thread_id).reply_count
+
+    def test_add_and_delete_keep_counters(self):
+        thread = self.add_comment("First")
+        reply = self.add_comment("Reply", parent_id=thread)
+        self.add_comment("Another reply", parent_id=thread)
+        self.assertEqual(self.counts(thread), (3, 2))
+
+        self.client.post(f"/api/videos/comments/{reply}/delete/")
+        self.assertEqual(self.counts(thread), (2, 1))
+
+        self.client.post(f"/api/videos/comments/{thread}/delete/")
+        self.video.refresh_from_db()
+        self.assertEqual(self.video.comment_count, 0)
+
+    def test_reconcile_fixes_drifted_counts(self):
+        thread = self.add_comment("First")
+        self.add_comment("Reply", parent_id=thread)
+        Video.objects.filter(id=self.video.id).update(comment_count=7)
+        Comment.objects.filter(id=thread).update(reply_count=0)
+
+        self.assertEqual(reconcile_comment_counts(dry_run=True), (1, 1))
+        self.assertEqual(self.counts(thread), (7, 0))
+
+        self.assertEqual(reconcile_comment_counts(), (1, 1))
+        self.assertEqual(self.counts(thread), (2, 1))
+        self.assertEqual(reconcile_comment_counts(), (0, 0))
+
+
+class LiveCounterStreamTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.broker = InProcessBroker()
+        patcher = mock.patch("videos.live.broker", self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_events_are_coalesced_and_keepalives_sent(self):
+        stream = stream_counter_events(42)
+        self.assertEqual(await anext(stream), "retry: 3000\n\n")
+
+        self.broker.publish(42, {"views": 1})
+        self.broker.publish(42, {"views": 2, "likes": 1})
+        self.broker.publish(7, {"views": 5})
+        event = await anext(stream)
+        self.assertEqual(event, 'event: counters\ndata: {"views": 3, "likes": 1}\n\n')
+
+        with mock.patch("videos.live.KEEPALIVE_SECONDS", 0.01):
+            self.assertEqual(await anext(stream), ": keep-alive\n\n")
+        await stream.aclose()
+
+    async def test_disconnect_unsubscribes(self):
+        stream = stream_counter_events(42)
+        await anext(stream)
+        self.assertEqual(len(self.broker._subscriptions[42]), 1)
+
+        await stream.aclose()
+
+        self.assertNotIn(42, self.broker._subscriptions)
+        self.broker.publish(42, {"views": 1})  # nobody left to deliver to
+
+    async def test_opening_streams_is_throttled(self):
+        user = await User.objects.acreate(username="streamer")
+        video = await Video.objects.acreate(
+            user=user, title="Live", file_id="live", Video_url="https://ik.imagekit.io/demo/live.mp4"
+        )
+        with mock.patch.dict(VideoLiveThrottle.THROTTLE_RATES, {"video_live": "1/min"}):
+            first = await self.async_client.get(f"/api/videos/{video.id}/live/")
+            second = await self.async_client.get(f"/api/videos/{video.id}/live/")
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first["Content-Type"], "text/event-stream")
+        self.assertEqual(second.status_code, 429)
+        self.assertEqual(second["Retry-After"], "60")
+
+
+class ChannelStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.channel = User.objects.create_user(username="maker")
+
+    def test_bump_creates_row_and_clamps_at_zero(self):
+        uploaded_at = timezone.now()
+        ChannelStats.bump(self.channel.id, video_count=2, total_views=10, last_upload_at=uploaded_at)
+        ChannelStats.bump(self.channel.id, video_count=-5, total_views=3)
+
+        stats = ChannelStats.objects.get(user=self.channel)
+        self.assertEqual((stats.video_count, stats.total_views), (0, 13))
+        self.assertEqual(stats.last_upload_at, uploaded_at)
+
+    def test_channel_pages_walk_every_video_once(self):
+        created_at = timezone.now()
+        video_ids = []
+        for index in range(5):
+            video = Video.objects.create(
+                user=self.channel,
+                title=f"Clip {index}",
+                file_id=f"clip{index}",
+                Video_url=f"https://ik.imagekit.io/demo/clip{index}.mp4",
+            )
+            video_ids.append(video.id)
+        # Equal timestamps: the id tiebreaker keeps pages from overlapping.
+        Video.objects.filter(user=self.channel).update(created_at=created_at)
+        ChannelStats.bump(self.channel.id, video_count=5, subscriber_count=1)
+
+        client = APIClient()
+        url, seen = "/api/videos/channel/maker/?page_size=2", []
+        while url:
+            data = client.get(url).json()
+            self.assertEqual(data["video_count"], 5)
+            self.assertEqual(data["subscriber_count"], 1)
+            self.assertLessEqual(len(data["results"]), 2)
+            seen += [card["id"] for card in data["results"]]
+            url = data["next"]
+
+        self.assertEqual(seen, sorted(video_ids, reverse=True))
+
+
+class CatalogImportTests(TestCase):
+    RECORDS = [
+        {"type": "user", "username": "alice", "email": "alice@example.com"},
+        {"type": "user", "username": "bob"},
+        {
+            "type": "video",
+            "user": "alice",
+            "title": "Trip",
+            "file_id": "trip",
+            "url": "https://ik.imagekit.io/demo/trip.mp4",
+            "created_at": "2024-05-01T12:00:00+00:00",
+            "views": 42,
+            "likes": "7",
+            "duration": 12.5,
+            "width": 1280,
+            "height": 720,
+        },
+        {"type": "comment", "user": "bob", "video_file_id": "trip", "text": "Nice!"},
+        {"type": "subscription", "subscriber": "bob", "channel": "alice"},
+    ]
+
+    def test_import_then_export_round_trips(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as catalog:
+            catalog.write("".join(json.dumps(record) + "\n" for record in self.RECORDS))
+        self.addCleanup(os.remove, catalog.name)
+        out, err = io.StringIO(), io.StringIO()
+
+        call_command("import_catalog", catalog.name, stdout=out, stderr=err)
+
+        self.assertIn("2 users, 1 videos, 1 comments, 1 subscriptions", out.getvalue())
+        self.assertEqual(err.getvalue(), "")
+        alice = User.objects.get(username="alice")
+        [row] = [json.loads(line) for line in stream_jsonl(iter_video_export_rows(alice))]
+        source = self.RECORDS[2]
+        self.assertEqual(row["title"], source["title"])
+        self.assertEqual(row["video_url"], source["url"])
+        self.assertEqual(row["created_at"], source["created_at"])
+        self.assertEqual(
+            [row[field] for field in ("views", "likes", "comment_count", "duration", "width", "height")],
+            [42, 7, 1, 12.5, 1280, 720],
+        )
+        self.assertEqual(ChannelStats.objects.get(user=alice).subscriber_count, 1)
+
+    async def test_export_streams_through_asgi_handler(self):
+        alice = await User.objects.acreate(username="alice")
+        for i in range(3):
+            await Video.objects.acreate(
+                user=alice, title=f"Clip {i}", file_id=f"c{i}", Video_url=f"https://ik.imagekit.io/demo/c{i}.mp4"
+            )
+        token = await sync_to_async(issue_access_token)(alice)
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": "/api/videos/channel/alice/export/",
+            "query_string": b"output=jsonl",
+            "headers": [(b"host", b"testserver"), (b"authorization", f"Bearer {token}".encode())],
+        }
+        requested = False
+        sent = []
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await asyncio.Event().wait()  # the client never disconnects
+
+        async def send(message):
+            sent.append(message)
+
+        # Like the test client, keep the signals from closing the test's connection.
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+        try:
+            with mock.patch("videos.catalog.EXPORT_LINES_PER_PULL", 1), warnings.catch_warnings():
+                # Django warns when it has to buffer a sync iterator under ASGI.
+                warnings.filterwarnings("error", "StreamingHttpResponse must consume")
+                await ASGIHandler()(scope, receive, send)
+        finally:
+            request_started.connect(close_old_connections)
+            request_finished.connect(close_old_connections)
+
+        self.assertEqual(sent[0]["status"], 200)
+        bodies = [message["body"] for message in sent[1:] if message.get("body")]
+        self.assertEqual(len(bodies), 3)
+        self.assertEqual([json.loads(body)["title"] for body in bodies], ["Clip 0", "Clip 1", "Clip 2"])
+
+    def test_bad_rows_are_skipped_and_reported_by_line(self):
+        good_video = dict(self.RECORDS[2])
+        lines = [
+            json.dumps(self.RECORDS[0]),
+            "{not json",
+            json.dumps({**good_video, "file_id": "bad", "views": "lots"}),
+            "",
+            json.dumps({**good_video, "file_id": "neg", "likes": -1}),
+            json.dumps({**good_video, "file_id": "ghost", "user": "nobody"}),
+            json.dumps(["a", "list"]),
+            json.dumps({"type": "comment", "user": "alice", "video_file_id": "missing", "text": "?"}),
+            json.dumps(good_video),
+        ]
+        importer = CatalogImporter(batch_size=2)
+
+        stats = importer.feed(lines)
+
+        self.assertEqual((stats["users"], stats["videos"]), (1, 1))
+        self.assertEqual((stats["invalid"], stats["skipped"]), (4, 2))
+        self.assertEqual(
+            importer.errors,
+            [
+                (2, "not valid JSON"),
+                (3, "views must be a non-negative number"),
+                (5, "likes must be a non-negative number"),
+                (7, "not a JSON object"),
+                (6, "unknown user 'nobody'"),
+                (8, "unknown video file_id 'missing'"),
+            ],
+        )
+        self.assertEqual(list(Video.objects.values_list("file_id", flat=True)), ["trip"])
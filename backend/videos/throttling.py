@@ -0,0 +1,73 @@
+import threading
+
+from django.core.cache.backends.redis import RedisCache
+from rest_framework.throttling import SimpleRateThrottle
+
+# Refill and spend in one step on the Redis server. Returns the tokens left
+# before spending, as a string so Redis keeps the fraction.
+_REDIS_TAKE_TOKEN = """
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "updated_at")
+local capacity, duration, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * capacity / duration)
+if tokens >= 1 then
+    redis.call("HSET", KEYS[1], "tokens", tokens - 1, "updated_at", now)
+    redis.call("EXPIRE", KEYS[1], math.ceil(duration))
+end
+return tostring(tokens)
+"""
+
+# Other caches (locmem) live in this process, where a lock makes the
+# read-modify-write atomic.
+_local_lock = threading.Lock()
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """Token bucket kept in the shared cache.
+
+    The configured rate (e.g. "30/min") is both the bucket size and the refill
+    speed, so a client can burst up to its full budget and then continue at
+    the steady rate. Subclasses provide ``scope`` and ``get_cache_key``.
+
+    Concurrent requests never spend the same token: on Redis the bucket is
+    updated by a server-side script, elsewhere under a process lock.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        if isinstance(self.cache, RedisCache):
+            self.tokens = self._take_token_redis()
+        else:
+            self.tokens = self._take_token_local()
+        if self.tokens < 1:
+            return self.throttle_failure()
+        return self.throttle_success()
+
+    def _take_token_redis(self):
+        client = self.cache._cache.get_client(self.key, write=True)
+        script = client.register_script(_REDIS_TAKE_TOKEN)
+        key = self.cache.make_and_validate_key(self.key)
+        return float(script(keys=[key], args=[self.num_requests, self.duration, self.now]))
+
+    def _take_token_local(self):
+        with _local_lock:
+            tokens, updated_at = self.cache.get(self.key, (self.num_requests, self.now))
+            refill = max(0, self.now - updated_at) * self.num_requests / self.duration
+            tokens = min(self.num_requests, tokens + refill)
+            if tokens >= 1:
+                self.cache.set(self.key, (tokens - 1, self.now), self.duration)
+        return tokens
+
+    def throttle_success(self):
+        return True
+
+    def wait(self):
+        return (1 - self.tokens) * self.duration / self.num_requests
@@ -1,92 +1,125 @@
+import hashlib
+import math
 from datetime import timedelta
 
+from asgiref.sync import sync_to_async
 from django.contrib.auth.models import User
-from django.db import DatabaseError
-from django.db.models import Count, Q
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.db.models import F, Subquery
+from django.db.models.functions import Greatest
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from rest_framework import filters, generics, serializers, status
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.pagination import PageNumberPagination
+from rest_framework import filters, generics, status
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
-from videos.imagekit_client import (
-    delete_video as delete_imagekit_video,
-    upload_thumbnail,
-    upload_video,
-)
+from .cards import load_public_cards, render_card
+from .catalog import iter_video_export_rows, stream_async, stream_csv, stream_jsonl
+from .feed import get_home_feed_ids, get_trending_video_ids
+from .live import publish_counters, stream_counter_events
 from .forms import VideoUploadForm
+from .media_probe import probe_media
+from .playlists import PLAYLIST_MAX_ITEMS, append_videos, lock_playlist, move_item, remove_item
+from .progress import continue_watching, record_progress, resume_position
+from .storage import get_storage
+from .suggestions import suggestion_index
+from .throttling import TokenBucketThrottle
 from .models import (
+    ChannelDailyStats,
+    ChannelStats,
     ChannelSubscription,
     Comment,
     CommentLike,
+    PendingFileDeletion,
+    Playlist,
+    RelatedVideo,
+    SuggestionChange,
+    UniqueViewerSketch,
     Video,
+    VideoDailyStats,
     VideoLike,
-    VideoView,
     WatchHistory,
     WatchLater,
 )
 
 
+ANALYTICS_DEFAULT_DAYS = 28
+ANALYTICS_MAX_DAYS = 365
+RELATED_LIMIT = 12
+SUGGESTION_LIMIT = 10
+SUGGESTION_MAX_LIMIT = 20
+# Items (added plus removed) accepted by one bulk library request.
+BULK_LIBRARY_LIMIT = 500
+# Only one request uploads a given file; others wait for its stored copy.
+UPLOAD_CLAIM_KEY = "videos:upload:{content_sha256}:{size}"
+UPLOAD_CLAIM_SECONDS = 600
+UPLOAD_CLAIM_RETRY_SECONDS = 5
+
+
 class VideoListPagination(PageNumberPagination):
     page_size = 12
     page_size_query_param = "page_size"
     max_page_size = 50
 
 
-class VideoListSerializer(serializers.ModelSerializer):
-    video_url = serializers.CharField(source="Video_url")
-    thumbnail_url = serializers.SerializerMethodField()
-    streaming_url = serializers.SerializerMethodField()
-    optimized_url = serializers.SerializerMethodField()
-    channel = serializers.CharField(source="user.username")
-    is_subscribed = serializers.SerializerMethodField()
-    subscriber_count = serializers.SerializerMethodField()
-
-    class Meta:
-        model = Video
-        fields = [
-            "id",
-            "title",
-            "description",
-            "video_url",
-            "thumbnail_url",
-            "streaming_url",
-            "optimized_url",
-            "views",
-            "unique_views",
-            "likes",
-            "dislikes",
-            "channel",
-            "subscriber_count",
-            "is_subscribed",
-            "created_at",
-        ]
+class ChannelVideoPagination(CursorPagination):
+    page_size = 12
+    page_size_query_param = "page_size"
+    max_page_size = 50
+    ordering = ("-created_at", "-id")
+
+
+class PlaylistItemPagination(CursorPagination):
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    ordering = ("position",)
 
-    def get_thumbnail_url(self, obj):
-        return obj.display_thumbnail_url
 
-    def get_streaming_url(self, obj):
-        return obj.streaming_url
+class ViewerRateThrottle(TokenBucketThrottle):
+    def get_cache_key(self, request, view):
+        user = request.user if request.user.is_authenticated else None
+        viewer_key = _get_viewer_key(request, user)
+        if not viewer_key:
+            return None
+        return self.cache_format % {"scope": self.scope, "ident": viewer_key}
 
-    def get_optimized_url(self, obj):
-        return obj.optimized_url
 
-    def get_is_subscribed(self, obj):
-        request = self.context.get("request")
-        user = request.user if request and request.user.is_authenticated else None
-        if not user:
-            return False
-        return ChannelSubscription.objects.filter(subscriber=user, channel=obj.user).exists()
+class VideoReadThrottle(ViewerRateThrottle):
+    scope = "video_read"
 
-    def get_subscriber_count(self, obj):
-        return ChannelSubscription.objects.filter(channel=obj.user).count()
+
+class VideoViewThrottle(ViewerRateThrottle):
+    scope = "video_view"
+
+
+class VideoWriteThrottle(ViewerRateThrottle):
+    scope = "video_write"
+
+
+class VideoProgressThrottle(ViewerRateThrottle):
+    scope = "video_progress"
+
+
+class VideoLiveThrottle(TokenBucketThrottle):
+    # The live stream is a plain async view without DRF authentication, so
+    # connections are counted per client address.
+    scope = "video_live"
+
+    def get_cache_key(self, request, view):
+        viewer_key = _get_viewer_key(request, None)
+        if not viewer_key:
+            return None
+        return self.cache_format % {"scope": self.scope, "ident": viewer_key}
 
 
 class VideoListAPIView(generics.ListAPIView):
     permission_classes = [AllowAny]
-    serializer_class = VideoListSerializer
+    throttle_classes = [VideoReadThrottle]
     pagination_class = VideoListPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ["title"]
@@ -94,51 +127,197 @@ class VideoListAPIView(generics.ListAPIView):
     ordering = ["-created_at"]
 
     def get_queryset(self):
-        queryset = Video.objects.select_related("user").all()
+        queryset = Video.objects.all()
         channel = (self.request.query_params.get("channel") or "").strip()
         if channel:
             queryset = queryset.filter(user__username__iexact=channel)
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        # Only ids are filtered and paged; cards come from the card cache.
+        video_ids = self.filter_queryset(self.get_queryset()).values_list("id", flat=True)
+        page_ids = self.paginate_queryset(video_ids)
+        current_user = request.user if request.user.is_authenticated else None
+        return self.get_paginated_response(_serialize_video_list(page_ids, current_user))
+
 
 @api_view(["GET"])
 @permission_classes([AllowAny])
 def api_channel_videos(request, username):
-    videos = Video.objects.select_related("user").filter(user__username=username)
+    stats = ChannelStats.objects.select_related("user").filter(user__username=username).first()
+    if stats is None:
+        stats = ChannelStats(user=get_object_or_404(User, username=username))
+    channel = stats.user
     current_user = request.user if request.user.is_authenticated else None
+    is_subscribed = bool(
+        current_user
+        and ChannelSubscription.objects.filter(subscriber=current_user, channel=channel).exists()
+    )
+
+    paginator = ChannelVideoPagination()
+    page = paginator.paginate_queryset(
+        Video.objects.filter(user=channel).only("id", "created_at"), request
+    )
+    cards = load_public_cards([video.id for video in page])
     return Response(
         {
-            "channel": username,
-            "subscriber_count": ChannelSubscription.objects.filter(
-                channel__username=username
-            ).count(),
-            "is_subscribed": bool(
-                current_user
-                and ChannelSubscription.objects.filter(
-                    subscriber=current_user, channel__username=username
-                ).exists()
-            ),
-            "results": [_serialize_video(video, current_user) for video in videos],
+            "channel": channel.username,
+            "subscriber_count": stats.subscriber_count,
+            "video_count": stats.video_count,
+            "total_views": stats.total_views,
+            "last_upload_at": stats.last_upload_at.isoformat() if stats.last_upload_at else None,
+            "is_subscribed": is_subscribed,
+            "next": paginator.get_next_link(),
+            "previous": paginator.get_previous_link(),
+            "results": [
+                render_card(
+                    cards[video.id][1],
+                    subscriber_count=stats.subscriber_count,
+                    is_subscribed=is_subscribed,
+                )
+                for video in page
+                if video.id in cards
+            ],
         }
     )
 
 
 @api_view(["GET"])
 @permission_classes([AllowAny])
+@throttle_classes([VideoReadThrottle])
+def api_top_channels(request):
+    order = "-total_views" if request.query_params.get("order") == "views" else "-subscriber_count"
+    paginator = VideoListPagination()
+    page = paginator.paginate_queryset(
+        ChannelStats.objects.select_related("user").filter(video_count__gt=0).order_by(order, "user_id"),
+        request,
+    )
+    return paginator.get_paginated_response(
+        [
+            {
+                "channel": stats.user.username,
+                "video_count": stats.video_count,
+                "total_views": stats.total_views,
+                "total_likes": stats.total_likes,
+                "subscriber_count": stats.subscriber_count,
+                "last_upload_at": stats.last_upload_at.isoformat() if stats.last_upload_at else None,
+            }
+            for stats in page
+        ]
+    )
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+@throttle_classes([VideoReadThrottle])
 def api_video_detail(request, video_id):
     video = get_object_or_404(Video.objects.select_related("user"), id=video_id)
     current_user = request.user if request.user.is_authenticated else None
-    _record_video_view(request, current_user, video)
-    _record_watch_history(current_user, video)
+    # Views over the viewer's budget are served but not written.
+    if VideoViewThrottle().allow_request(request, None):
+        _record_video_view(request, current_user, video)
+        _record_watch_history(current_user, video)
 
     data = _serialize_video(video, current_user)
     data["user_vote"] = _get_user_vote_value(current_user, video)
     data["is_watch_later"] = _is_watch_later(current_user, video)
+    data["resume_position"] = resume_position(current_user.id, video.id) if current_user else None
     return Response(data)
 
 
+async def api_video_live(request, video_id):
+    """Server-sent counter deltas for one video; needs an ASGI server."""
+    if request.method != "GET":
+        return JsonResponse({"success": False, "error": "Method not allowed."}, status=405)
+    throttle = VideoLiveThrottle()
+    if not await sync_to_async(throttle.allow_request)(request, None):
+        return JsonResponse(
+            {"success": False, "error": "Too many live connections. Try again shortly."},
+            status=429,
+            headers={"Retry-After": str(math.ceil(throttle.wait()))},
+        )
+    if not await Video.objects.filter(id=video_id).aexists():
+        return JsonResponse({"success": False, "error": "Video not found."}, status=404)
+    return StreamingHttpResponse(
+        stream_counter_events(video_id),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def api_related_videos(request, video_id):
+    video = get_object_or_404(Video, id=video_id)
+    related_ids = list(
+        RelatedVideo.objects.filter(video=video).values_list("related_id", flat=True)[
+            :RELATED_LIMIT
+        ]
+    )
+
+    # Cold-start videos have few or no co-watch neighbours yet: fill up with
+    # the channel's other videos, then the newest uploads.
+    for fallback in (
+        Video.objects.filter(user_id=video.user_id),
+        Video.objects.all(),
+    ):
+        if len(related_ids) >= RELATED_LIMIT:
+            break
+        related_ids += list(
+            fallback.exclude(id__in=[video.id, *related_ids])
+            .order_by("-created_at")
+            .values_list("id", flat=True)[: RELATED_LIMIT - len(related_ids)]
+        )
+
+    current_user = request.user if request.user.is_authenticated else None
+    return Response({"results": _serialize_video_list(related_ids, current_user)})
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def api_video_analytics(request, video_id):
+    video = get_object_or_404(Video, id=video_id, user=request.user)
+    rows = VideoDailyStats.objects.filter(video=video, day__gte=_analytics_start_day(request))
+    fields = ["views", "unique_viewers", "likes", "dislikes", "comments"]
+    return Response({"video_id": video.id, **_serialize_daily_stats(rows, fields)})
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def api_channel_analytics(request, username):
+    if username != request.user.username:
+        return Response(
+            {"success": False, "error": "You can only view your own channel analytics."},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+    rows = ChannelDailyStats.objects.filter(
+        channel=request.user, day__gte=_analytics_start_day(request)
+    )
+    fields = ["views", "unique_viewers", "likes", "dislikes", "comments", "subscribers_gained"]
+    return Response({"channel": username, **_serialize_daily_stats(rows, fields)})
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def api_channel_export(request, username):
+    if username != request.user.username:
+        return Response(
+            {"success": False, "error": "You can only export your own channel."},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+    rows = iter_video_export_rows(request.user)
+    if request.query_params.get("output") == "jsonl":
+        lines, content_type, extension = stream_jsonl(rows), "application/x-ndjson", "jsonl"
+    else:
+        lines, content_type, extension = stream_csv(rows), "text/csv", "csv"
+    response = StreamingHttpResponse(stream_async(lines), content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{username}-videos.{extension}"'
+    return response
+
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
+@throttle_classes([VideoWriteThrottle])
 def api_video_vote(request, video_id):
     current_user = request.user
     video = get_object_or_404(Video, id=video_id)
@@ -157,26 +336,46 @@ def api_video_upload(request):
         custom_thumbnail = request.POST.get("thumbnail_data", "")
 
         try:
-            result = upload_video(file_data=video_file.read(), file_name=video_file.name)
+            metadata = probe_media(video_file, video_file.size)
+            file_data, content_sha256 = _read_upload(video_file)
+            claim_key, result = _claim_upload(content_sha256, len(file_data))
+        except Exception as exc:
+            return Response(
+                {"success": False, "error": str(exc)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if claim_key is None and result is None:
+            return Response(
+                {"success": False, "error": "This file is already being uploaded. Try again shortly."},
+                status=status.HTTP_409_CONFLICT,
+                headers={"Retry-After": str(UPLOAD_CLAIM_RETRY_SECONDS)},
+            )
+
+        try:
+            if result is None:
+                result = get_storage().upload_video(file_data=file_data, file_name=video_file.name)
             thumbnail_url = ""
+            thumbnail_file_id = ""
             thumbnail_file = request.FILES.get("thumbnail_file")
             if thumbnail_file:
                 try:
                     base_name = video_file.name.split(".", 1)[0]
-                    thumb_result = upload_thumbnail(
-                        file_data=thumbnail_file.read(),
+                    thumb_result = get_storage().upload_thumbnail(
+                        file_data=thumbnail_file,
                         file_name=thumbnail_file.name or base_name + "_thumb.jpg",
                     )
                     thumbnail_url = thumb_result["url"]
+                    thumbnail_file_id = thumb_result["file_id"]
                 except Exception:
                     pass
             elif custom_thumbnail and custom_thumbnail.startswith("data:image"):
                 try:
                     base_name = video_file.name.split(".", 1)[0]
-                    thumb_result = upload_thumbnail(
+                    thumb_result = get_storage().upload_thumbnail(
                         file_data=custom_thumbnail, file_name=base_name + "_thumb.jpg"
                     )
                     thumbnail_url = thumb_result["url"]
+                    thumbnail_file_id = thumb_result["file_id"]
                 except Exception:
                     pass
 
@@ -187,13 +386,27 @@ def api_video_upload(request):
                 file_id=result["file_id"],
                 Video_url=result["url"],
                 thumbnail_url=thumbnail_url,
+                thumbnail_file_id=thumbnail_file_id,
+                duration=metadata["duration"],
+                width=metadata["width"],
+                height=metadata["height"],
+                bitrate=metadata["bitrate"],
+                codec=metadata["codec"] or "",
+                content_sha256=content_sha256,
+                file_size=len(file_data),
             )
+            SuggestionChange.log(video.id)
+            ChannelStats.bump(current_user.id, video_count=1, last_upload_at=video.created_at)
             return Response({"success": True, "video_id": video.id})
         except Exception as exc:
             return Response(
                 {"success": False, "error": str(exc)},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        finally:
+            # Held until the Video row exists, so retries find the stored copy.
+            if claim_key:
+                cache.delete(claim_key)
 
     errors = []
     for field, field_errors in form.errors.items():
@@ -210,11 +423,27 @@ def api_video_upload(request):
 def api_video_delete(request, video_id):
     current_user = request.user
     video = get_object_or_404(Video, id=video_id, user=current_user)
-    try:
-        delete_imagekit_video(video.file_id)
-    except Exception:
-        pass
-    video.delete()
+    # Remote files are removed by the deletion worker, which skips files
+    # another video still uses (deduplicated uploads share one file).
+    with transaction.atomic():
+        PendingFileDeletion.enqueue(video.file_id, video.thumbnail_file_id)
+        SuggestionChange.log(video.id)
+        Playlist.objects.filter(items__video=video).update(
+            item_count=Greatest(F("item_count") - 1, 0)
+        )
+        ChannelStats.bump(
+            current_user.id,
+            video_count=-1,
+            total_views=-video.views,
+            total_likes=-video.likes,
+            last_upload_at=Subquery(
+                Video.objects.filter(user=current_user)
+                .exclude(id=video.id)
+                .order_by("-created_at")
+                .values("created_at")[:1]
+            ),
+        )
+        video.delete()
     return Response({"success": True})
 
 
@@ -222,16 +451,62 @@ def api_video_delete(request, video_id):
 @permission_classes([IsAuthenticated])
 def api_watch_history(request):
     current_user = request.user
-    history_items = (
-        WatchHistory.objects.select_related("video", "video__user")
-        .filter(user=current_user)
+    watched_at = dict(
+        WatchHistory.objects.filter(user=current_user)
         .order_by("-watched_at")
+        .values_list("video_id", "watched_at")
+    )
+    results = _serialize_video_list(
+        list(watched_at),
+        current_user,
+        extras={video_id: {"watched_at": value.isoformat()} for video_id, value in watched_at.items()},
+    )
+    return Response({"results": results})
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+@throttle_classes([VideoProgressThrottle])
+def api_video_progress(request, video_id):
+    """Player heartbeat: ``{"position": seconds, "duration": seconds}``.
+
+    Buffered in memory and written in batches, so it is accepted without
+    touching the database.
+    """
+    try:
+        position = float(request.data.get("position"))
+        duration = request.data.get("duration")
+        duration = float(duration) if duration not in (None, "") else None
+    except (TypeError, ValueError):
+        position = duration = math.nan
+    if not (math.isfinite(position) and position >= 0) or not (
+        duration is None or (math.isfinite(duration) and duration > 0)
+    ):
+        return Response(
+            {"success": False, "error": '"position" and "duration" must be seconds.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    record_progress(request.user.id, video_id, position, duration)
+    return Response({"success": True}, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def api_continue_watching(request):
+    current_user = request.user
+    rows = continue_watching(current_user.id)
+    results = _serialize_video_list(
+        [video_id for video_id, *_ in rows],
+        current_user,
+        extras={
+            video_id: {
+                "resume_position": position,
+                "duration": duration,
+                "progress_updated_at": at.isoformat(),
+            }
+            for video_id, position, duration, at in rows
+        },
     )
-    results = []
-    for item in history_items:
-        data = _serialize_video(item.video, current_user)
-        data["watched_at"] = item.watched_at.isoformat()
-        results.append(data)
     return Response({"results": results})
 
 
@@ -239,37 +514,51 @@ def api_watch_history(request):
 @permission_classes([IsAuthenticated])
 def api_liked_videos(request):
     current_user = request.user
-    liked_items = (
-        VideoLike.objects.select_related("video", "video__user")
-        .filter(user=current_user, value=VideoLike.LIKE)
+    liked_ids = list(
+        VideoLike.objects.filter(user=current_user, value=VideoLike.LIKE)
         .order_by("-created_at")
+        .values_list("video_id", flat=True)
     )
-    return Response(
-        {"results": [_serialize_video(item.video, current_user) for item in liked_items]}
-    )
+    return Response({"results": _serialize_video_list(liked_ids, current_user)})
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def api_watch_later_list(request):
     current_user = request.user
-    items = (
-        WatchLater.objects.select_related("video", "video__user")
-        .filter(user=current_user)
+    saved_at = dict(
+        WatchLater.objects.filter(user=current_user)
         .order_by("-created_at")
+        .values_list("video_id", "created_at")
+    )
+    results = _serialize_video_list(
+        list(saved_at),
+        current_user,
+        extras={video_id: {"saved_at": value.isoformat()} for video_id, value in saved_at.items()},
     )
-    results = []
-    for item in items:
-        data = _serialize_video(item.video, current_user)
-        data["saved_at"] = item.created_at.isoformat()
-        results.append(data)
     return Response({"results": results})
 
 
-@api_view(["POST"])
+@api_view(["POST", "PUT", "DELETE"])
 @permission_classes([IsAuthenticated])
 def api_watch_later_toggle(request, video_id):
+    """PUT saves and DELETE removes, both idempotent; POST toggles."""
     current_user = request.user
+    if request.method == "DELETE":
+        WatchLater.objects.filter(user=current_user, video_id=video_id).delete()
+        return Response({"success": True, "is_watch_later": False})
+    if request.method == "PUT":
+        # Foreign keys are checked at commit, too late to answer 404 from.
+        if not Video.objects.filter(id=video_id).exists():
+            return Response(
+                {"success": False, "error": "Video not found."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        WatchLater.objects.bulk_create(
+            [WatchLater(user=current_user, video_id=video_id)], ignore_conflicts=True
+        )
+        return Response({"success": True, "is_watch_later": True})
+
     video = get_object_or_404(Video, id=video_id)
     existing = WatchLater.objects.filter(user=current_user, video=video).first()
     if existing:
@@ -280,22 +569,221 @@ def api_watch_later_toggle(request, video_id):
     return Response({"success": True, "is_watch_later": True})
 
 
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+@throttle_classes([VideoWriteThrottle])
+def api_watch_later_bulk(request):
+    """Save and remove many videos: ``{"add": [video ids], "remove": [video ids]}``."""
+    changes = _bulk_changes(request.data, int)
+    if changes is None:
+        return _bulk_changes_error()
+    add, remove = changes
+
+    current_user = request.user
+    with transaction.atomic():
+        saved = set(Video.objects.filter(id__in=add).values_list("id", flat=True)) if add else set()
+        WatchLater.objects.bulk_create(
+            [WatchLater(user=current_user, video_id=video_id) for video_id in saved],
+            ignore_conflicts=True,
+        )
+        if remove:
+            WatchLater.objects.filter(user=current_user, video_id__in=remove).delete()
+    return Response(
+        {
+            "success": True,
+            "saved": [video_id for video_id in add if video_id in saved],
+            "removed": remove,
+            "unknown": [video_id for video_id in add if video_id not in saved],
+        }
+    )
+
+
+@api_view(["GET", "POST"])
+@permission_classes([IsAuthenticated])
+def api_playlists(request):
+    """GET lists the user's playlists; POST creates one."""
+    current_user = request.user
+    if request.method == "GET":
+        playlists = current_user.playlists.select_related("user")
+        return Response({"results": [_serialize_playlist(playlist) for playlist in playlists]})
+
+    title = str(request.data.get("title") or "").strip()
+    if not title or len(title) > Playlist._meta.get_field("title").max_length:
+        return Response(
+            {"success": False, "error": "Title is required (at most 150 characters)."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    playlist = Playlist.objects.create(
+        user=current_user,
+        title=title,
+        description=str(request.data.get("description") or "").strip(),
+        is_public=request.data.get("is_public", True) in (True, "true", "1", 1),
+    )
+    return Response(
+        {"success": True, "playlist": _serialize_playlist(playlist)},
+        status=status.HTTP_201_CREATED,
+    )
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+@throttle_classes([VideoReadThrottle])
+def api_playlist_detail(request, playlist_id):
+    """A playlist and one keyset page of its videos, in playlist order."""
+    current_user = request.user if request.user.is_authenticated else None
+    playlist = get_object_or_404(Playlist.objects.select_related("user"), id=playlist_id)
+    if not playlist.is_public and (not current_user or playlist.user_id != current_user.id):
+        return Response(
+            {"success": False, "error": "Playlist not found."},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+
+    paginator = PlaylistItemPagination()
+    page = paginator.paginate_queryset(
+        playlist.items.only("id", "video_id", "position", "added_at"), request
+    )
+    results = _serialize_video_list(
+        [item.video_id for item in page],
+        current_user,
+        extras={
+            item.video_id: {
+                "item_id": item.id,
+                "position": item.position,
+                "added_at": item.added_at.isoformat(),
+            }
+            for item in page
+        },
+    )
+    return Response(
+        {
+            **_serialize_playlist(playlist),
+            "next": paginator.get_next_link(),
+            "previous": paginator.get_previous_link(),
+            "results": results,
+        }
+    )
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+@throttle_classes([VideoWriteThrottle])
+def api_playlist_delete(request, playlist_id):
+    get_object_or_404(Playlist, id=playlist_id, user=request.user).delete()
+    return Response({"success": True})
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+@throttle_classes([VideoWriteThrottle])
+def api_playlist_add(request, playlist_id):
+    """Append videos: ``{"video_ids": [...]}``. Ones already in the playlist are skipped."""
+    video_ids = request.data.get("video_ids") if isinstance(request.data, dict) else None
+    try:
+        if not isinstance(video_ids, list):
+            raise TypeError
+        video_ids = list(dict.fromkeys(int(video_id) for video_id in video_ids))
+    except (TypeError, ValueError):
+        video_ids = []
+    if not video_ids or len(video_ids) > BULK_LIBRARY_LIMIT:
+        return Response(
+            {
+                "success": False,
+                "error": f'Send "video_ids", a list of at most {BULK_LIBRARY_LIMIT} video ids.',
+            },
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    with transaction.atomic():
+        playlist = lock_playlist(playlist_id, request.user)
+        if playlist is None:
+            return _playlist_not_found()
+        added = append_videos(playlist, video_ids)
+    if added is None:
+        return Response(
+            {"success": False, "error": f"Playlists hold at most {PLAYLIST_MAX_ITEMS} videos."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return Response(
+        {
+            "success": True,
+            "added": added,
+            "skipped": [video_id for video_id in video_ids if video_id not in set(added)],
+        }
+    )
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+@throttle_classes([VideoWriteThrottle])
+def api_playlist_move(request, playlist_id, item_id):
+    """Move an item after another: ``{"after": item id}``, or ``null`` to make it first."""
+    after_id = request.data.get("after")
+    if after_id is not None:
+        try:
+            after_id = int(after_id)
+        except (TypeError, ValueError):
+            after_id = item_id  # rejected by move_item below
+
+    with transaction.atomic():
+        playlist = lock_playlist(playlist_id, request.user)
+        if playlist is None:
+            return _playlist_not_found()
+        item = playlist.items.filter(id=item_id).only("id").first()
+        if item is None:
+            return Response(
+                {"success": False, "error": "Item not found."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        position = move_item(playlist, item, after_id)
+    if position is None:
+        return Response(
+            {"success": False, "error": '"after" must be another item of this playlist or null.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return Response({"success": True, "item_id": item.id, "position": position})
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+@throttle_classes([VideoWriteThrottle])
+def api_playlist_remove(request, playlist_id, item_id):
+    with transaction.atomic():
+        playlist = lock_playlist(playlist_id, request.user)
+        if playlist is None:
+            return _playlist_not_found()
+        removed = remove_item(playlist, item_id)
+    return Response({"success": True, "removed": removed})
+
+
 @api_view(["GET"])
 @permission_classes([AllowAny])
+@throttle_classes([VideoReadThrottle])
 def api_video_comments(request, video_id):
     current_user = request.user if request.user.is_authenticated else None
-    comments = (
+    comments = list(
         Comment.objects.select_related("user")
         .filter(video_id=video_id, parent__isnull=True)
         .order_by("-created_at")
     )
-    return Response(
-        {"results": [_serialize_comment(comment, current_user) for comment in comments]}
+    return Response({"results": _serialize_comment_list(comments, current_user)})
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+@throttle_classes([VideoReadThrottle])
+def api_comment_replies(request, comment_id):
+    current_user = request.user if request.user.is_authenticated else None
+    replies = list(
+        Comment.objects.select_related("user")
+        .filter(parent_id=comment_id)
+        .order_by("created_at")
     )
+    return Response({"results": _serialize_comment_list(replies, current_user)})
 
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
+@throttle_classes([VideoWriteThrottle])
 def api_add_comment(request, video_id):
     text = (request.data.get("text") or "").strip()
     parent_id = request.data.get("parent_id")
@@ -310,17 +798,49 @@ def api_add_comment(request, video_id):
     if parent_id:
         parent = get_object_or_404(Comment, id=parent_id, video=video)
 
-    comment = Comment.objects.create(
-        user=request.user,
-        video=video,
-        parent=parent,
-        text=text,
-    )
-    return Response({"success": True, "comment": _serialize_comment(comment, request.user)})
+    with transaction.atomic():
+        comment = Comment.objects.create(
+            user=request.user,
+            video=video,
+            parent=parent,
+            text=text,
+        )
+        Video.objects.filter(id=video.id).update(comment_count=F("comment_count") + 1)
+        if parent:
+            Comment.objects.filter(id=parent.id).update(reply_count=F("reply_count") + 1)
+    publish_counters(video.id, comment_count=1)
+    return Response({"success": True, "comment": _serialize_comment(comment)})
 
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
+@throttle_classes([VideoWriteThrottle])
+def api_delete_comment(request, comment_id):
+    comment = get_object_or_404(Comment.objects.select_related("video"), id=comment_id)
+    if request.user.id not in (comment.user_id, comment.video.user_id):
+        return Response(
+            {"success": False, "error": "You can only delete your own comments."},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+
+    with transaction.atomic():
+        # Deleting a thread cascades to its replies; count what actually went.
+        _, deleted = comment.delete()
+        removed = deleted.get(Comment._meta.label, 0)
+        Video.objects.filter(id=comment.video_id).update(
+            comment_count=Greatest(F("comment_count") - removed, 0)
+        )
+        if comment.parent_id:
+            Comment.objects.filter(id=comment.parent_id).update(
+                reply_count=Greatest(F("reply_count") - 1, 0)
+            )
+    publish_counters(comment.video_id, comment_count=-removed)
+    return Response({"success": True})
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+@throttle_classes([VideoWriteThrottle])
 def api_toggle_comment_like(request, comment_id):
     comment = get_object_or_404(Comment, id=comment_id)
     existing = CommentLike.objects.filter(user=request.user, comment=comment).first()
@@ -339,47 +859,61 @@ def api_toggle_comment_like(request, comment_id):
 
 @api_view(["GET"])
 @permission_classes([AllowAny])
+@throttle_classes([VideoReadThrottle])
 def api_trending_videos(request):
-    week_ago = timezone.now() - timedelta(days=7)
-    videos = (
-        Video.objects.select_related("user")
-        .annotate(
-            recent_unique_views=Count(
-                "view_records",
-                filter=Q(view_records__viewed_at__gte=week_ago),
-                distinct=True,
-            ),
-            comment_count=Count("comments", distinct=True),
-        )
-        .order_by("-recent_unique_views", "-likes", "-comment_count", "-views")[:30]
-    )
     current_user = request.user if request.user.is_authenticated else None
-    return Response(
-        {"results": [_serialize_video(video, current_user) for video in videos]}
-    )
+    return Response({"results": _serialize_video_list(get_trending_video_ids(), current_user)})
 
 
-@api_view(["POST"])
+@api_view(["GET"])
+@permission_classes([AllowAny])
+@throttle_classes([VideoReadThrottle])
+def api_video_suggestions(request):
+    try:
+        limit = int(request.query_params.get("limit", SUGGESTION_LIMIT))
+    except ValueError:
+        limit = SUGGESTION_LIMIT
+    limit = max(1, min(limit, SUGGESTION_MAX_LIMIT))
+    query = request.query_params.get("q", "")[:100]
+    return Response({"results": suggestion_index.suggest(query, limit)})
+
+
+@api_view(["POST", "PUT", "DELETE"])
 @permission_classes([IsAuthenticated])
 def api_toggle_subscribe(request, username):
-    channel = get_object_or_404(User, username=username)
+    """PUT subscribes and DELETE unsubscribes, both idempotent; POST toggles."""
+    channel = get_object_or_404(User.objects.only("id"), username=username)
     if channel == request.user:
         return Response(
             {"success": False, "error": "You cannot subscribe to your own channel."},
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    existing = ChannelSubscription.objects.filter(
-        subscriber=request.user, channel=channel
-    ).first()
-    if existing:
-        existing.delete()
-        is_subscribed = False
-    else:
-        ChannelSubscription.objects.create(subscriber=request.user, channel=channel)
-        is_subscribed = True
+    subscriptions = ChannelSubscription.objects.filter(subscriber=request.user, channel=channel)
+    with transaction.atomic():
+        if request.method == "PUT":
+            ChannelSubscription.objects.bulk_create(
+                [ChannelSubscription(subscriber=request.user, channel=channel)],
+                ignore_conflicts=True,
+            )
+            ChannelStats.recount_subscribers([channel.id])
+            is_subscribed = True
+        elif request.method == "DELETE":
+            removed, _ = subscriptions.delete()
+            if removed:
+                ChannelStats.bump(channel.id, subscriber_count=-removed)
+            is_subscribed = False
+        else:
+            existing = subscriptions.first()
+            if existing:
+                existing.delete()
+                is_subscribed = False
+            else:
+                ChannelSubscription.objects.create(subscriber=request.user, channel=channel)
+                is_subscribed = True
+            ChannelStats.bump(channel.id, subscriber_count=1 if is_subscribed else -1)
 
-    subscriber_count = ChannelSubscription.objects.filter(channel=channel).count()
+    subscriber_count = _subscriber_counts([channel.id]).get(channel.id, 0)
     return Response(
         {
             "success": True,
@@ -389,18 +923,193 @@ def api_toggle_subscribe(request, username):
     )
 
 
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+@throttle_classes([VideoWriteThrottle])
+def api_subscriptions_bulk(request):
+    """Subscribe to and unsubscribe from many channels:
+    ``{"add": [usernames], "remove": [usernames]}``."""
+    changes = _bulk_changes(request.data, str)
+    if changes is None:
+        return _bulk_changes_error()
+    add, remove = changes
+
+    current_user = request.user
+    channel_ids = dict(
+        User.objects.filter(username__in=[*add, *remove])
+        .exclude(id=current_user.id)
+        .values_list("username", "id")
+    )
+    subscribe_ids = [channel_ids[name] for name in add if name in channel_ids]
+    unsubscribe_ids = [channel_ids[name] for name in remove if name in channel_ids]
+    with transaction.atomic():
+        ChannelSubscription.objects.bulk_create(
+            [
+                ChannelSubscription(subscriber=current_user, channel_id=channel_id)
+                for channel_id in subscribe_ids
+            ],
+            ignore_conflicts=True,
+        )
+        if unsubscribe_ids:
+            ChannelSubscription.objects.filter(
+                subscriber=current_user, channel_id__in=unsubscribe_ids
+            ).delete()
+        # Inserts that hit an existing row are skipped silently, so
+        # recount rather than applying deltas.
+        ChannelStats.recount_subscribers([*subscribe_ids, *unsubscribe_ids])
+    return Response(
+        {
+            "success": True,
+            "subscribed": [name for name in add if name in channel_ids],
+            "unsubscribed": [name for name in remove if name in channel_ids],
+            "unknown": [name for name in [*add, *remove] if name not in channel_ids],
+        }
+    )
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+@throttle_classes([VideoReadThrottle])
+def api_home_feed(request):
+    paginator = VideoListPagination()
+    if not request.user.is_authenticated:
+        page_ids = paginator.paginate_queryset(Video.objects.values_list("id", flat=True), request)
+        return paginator.get_paginated_response(_serialize_video_list(page_ids))
+
+    page_ids = paginator.paginate_queryset(get_home_feed_ids(request.user), request)
+    return paginator.get_paginated_response(_serialize_video_list(page_ids, request.user))
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def api_subscribed_feed(request):
     channel_ids = ChannelSubscription.objects.filter(subscriber=request.user).values_list(
         "channel_id", flat=True
     )
-    videos = Video.objects.select_related("user").filter(user_id__in=channel_ids)
+    video_ids = Video.objects.filter(user_id__in=channel_ids).values_list("id", flat=True)
 
     paginator = VideoListPagination()
-    page = paginator.paginate_queryset(videos, request)
-    results = [_serialize_video(video, request.user) for video in page]
-    return paginator.get_paginated_response(results)
+    page_ids = paginator.paginate_queryset(video_ids, request)
+    return paginator.get_paginated_response(_serialize_video_list(page_ids, request.user))
+
+
+def _bulk_changes(data, convert):
+    """``[add, remove]`` from a bulk request body, deduplicated; None if malformed.
+
+    Items listed in both end up removed.
+    """
+    if not isinstance(data, dict):
+        return None
+    changes = []
+    for key in ("add", "remove"):
+        values = data.get(key) or []
+        if not isinstance(values, list):
+            return None
+        try:
+            changes.append(list(dict.fromkeys(convert(value) for value in values)))
+        except (TypeError, ValueError):
+            return None
+    add, remove = changes
+    if len(add) + len(remove) > BULK_LIBRARY_LIMIT:
+        return None
+    return [[value for value in add if value not in remove], remove]
+
+
+def _bulk_changes_error():
+    return Response(
+        {
+            "success": False,
+            "error": f'Send "add" and/or "remove" lists with at most {BULK_LIBRARY_LIMIT} items.',
+        },
+        status=status.HTTP_400_BAD_REQUEST,
+    )
+
+
+def _playlist_not_found():
+    return Response(
+        {"success": False, "error": "Playlist not found."},
+        status=status.HTTP_404_NOT_FOUND,
+    )
+
+
+def _serialize_playlist(playlist):
+    return {
+        "id": playlist.id,
+        "title": playlist.title,
+        "description": playlist.description,
+        "is_public": playlist.is_public,
+        "item_count": playlist.item_count,
+        "owner": playlist.user.username,
+        "created_at": playlist.created_at.isoformat(),
+        "updated_at": playlist.updated_at.isoformat(),
+    }
+
+
+def _analytics_start_day(request):
+    try:
+        days = int(request.query_params.get("days", ANALYTICS_DEFAULT_DAYS))
+    except ValueError:
+        days = ANALYTICS_DEFAULT_DAYS
+    days = min(max(days, 1), ANALYTICS_MAX_DAYS)
+    return timezone.localdate() - timedelta(days=days - 1)
+
+
+def _serialize_daily_stats(rows, fields):
+    series = [
+        {"day": row["day"].isoformat(), **{field: row[field] for field in fields}}
+        for row in rows.order_by("day").values("day", *fields)
+    ]
+    # Daily unique viewers overlap, so they are not summed into the totals.
+    totals = {
+        field: sum(point[field] for point in series)
+        for field in fields
+        if field != "unique_viewers"
+    }
+    return {"days": series, "totals": totals}
+
+
+def _read_upload(uploaded_file):
+    # Hash while reading so the file is only traversed once.
+    digest = hashlib.sha256()
+    chunks = []
+    for chunk in uploaded_file.chunks():
+        digest.update(chunk)
+        chunks.append(chunk)
+    return b"".join(chunks), digest.hexdigest()
+
+
+def _claim_upload(content_sha256, size):
+    """``(claim_key, stored_copy)`` for an upload of this content.
+
+    Returns a stored copy (``{"file_id", "url"}``) when a video already has
+    the same content. Otherwise returns a claim key: the caller uploads and
+    deletes the key once its Video row is saved. Both are None while another
+    request holds the claim; the caller asks the client to retry. Claims live
+    in the cache, so they only span workers with a shared cache (REDIS_URL).
+    """
+    claim_key = UPLOAD_CLAIM_KEY.format(content_sha256=content_sha256, size=size)
+    stored_copy = _stored_copy(content_sha256, size)
+    if stored_copy:
+        return None, stored_copy
+    if not cache.add(claim_key, True, UPLOAD_CLAIM_SECONDS):
+        return None, None
+    # The previous holder may have finished between the two checks.
+    stored_copy = _stored_copy(content_sha256, size)
+    if stored_copy:
+        cache.delete(claim_key)
+        return None, stored_copy
+    return claim_key, None
+
+
+def _stored_copy(content_sha256, size):
+    duplicate = (
+        Video.objects.filter(content_sha256=content_sha256, file_size=size)
+        .values("file_id", "Video_url")
+        .first()
+    )
+    if duplicate is None:
+        return None
+    return {"file_id": duplicate["file_id"], "url": duplicate["Video_url"]}
 
 
 def _get_user_vote_value(user, video):
@@ -415,41 +1124,97 @@ def _get_user_vote_value(user, video):
     return like.value
 
 
-def _serialize_video(video, current_user=None):
+def _serialize_video_list(video_ids, current_user=None, extras=None):
+    """Cards for list responses, in ``video_ids`` order; missing videos are skipped.
+
+    The public part of each card comes from the shared card cache. The
+    viewer's overlay (subscription state, plus ``extras`` keyed by video id)
+    is computed for the whole page and merged in at render time.
+    """
+    cards = load_public_cards(video_ids)
+    # Channel subscription data for the whole page in two queries.
+    channel_ids = {channel_id for channel_id, _ in cards.values()}
+    subscriber_counts = _subscriber_counts(channel_ids)
+    subscribed_channel_ids = set()
+    if current_user:
+        subscribed_channel_ids = set(
+            ChannelSubscription.objects.filter(
+                subscriber=current_user, channel_id__in=channel_ids
+            ).values_list("channel_id", flat=True)
+        )
+
+    extras = extras or {}
+    results = []
+    for video_id in video_ids:
+        if video_id not in cards:
+            continue
+        channel_id, fragment = cards[video_id]
+        results.append(
+            render_card(
+                fragment,
+                subscriber_count=subscriber_counts.get(channel_id, 0),
+                is_subscribed=channel_id in subscribed_channel_ids,
+                **extras.get(video_id, {}),
+            )
+        )
+    return results
+
+
+def _subscriber_counts(channel_ids):
+    return dict(
+        ChannelStats.objects.filter(user_id__in=channel_ids).values_list(
+            "user_id", "subscriber_count"
+        )
+    )
+
+
+def _serialize_video(video, current_user=None, subscriber_count=None, is_subscribed=None):
+    if subscriber_count is None:
+        subscriber_count = _subscriber_counts([video.user_id]).get(video.user_id, 0)
+    if is_subscribed is None:
+        is_subscribed = bool(
+            current_user
+            and ChannelSubscription.objects.filter(
+                subscriber=current_user, channel=video.user
+            ).exists()
+        )
     return {
         "id": video.id,
         "title": video.title,
         "description": video.description,
         "video_url": video.Video_url,
         "thumbnail_url": video.display_thumbnail_url,
+        "thumbnail_srcset": video.thumbnail_srcset,
         "streaming_url": video.streaming_url,
         "optimized_url": video.optimized_url,
         "views": video.views,
         "unique_views": video.unique_views,
         "likes": video.likes,
         "dislikes": video.dislikes,
+        "comment_count": video.comment_count,
         "channel": video.user.username,
-        "subscriber_count": ChannelSubscription.objects.filter(channel=video.user).count(),
-        "is_subscribed": bool(
-            current_user
-            and ChannelSubscription.objects.filter(
-                subscriber=current_user, channel=video.user
-            ).exists()
-        ),
+        "subscriber_count": subscriber_count,
+        "is_subscribed": is_subscribed,
         "created_at": video.created_at.isoformat(),
     }
 
 
-def _serialize_comment(comment, current_user):
-    replies = (
-        Comment.objects.select_related("user")
-        .filter(parent=comment)
-        .order_by("created_at")
-    )
-    liked = bool(
-        current_user
-        and CommentLike.objects.filter(user=current_user, comment=comment).exists()
-    )
+def _serialize_comment_list(comments, current_user):
+    liked_ids = set()
+    if current_user and comments:
+        liked_ids = set(
+            CommentLike.objects.filter(user=current_user, comment__in=comments).values_list(
+                "comment_id", flat=True
+            )
+        )
+    return [
+        _serialize_comment(comment, liked=comment.id in liked_ids)
+        for comment in comments
+    ]
+
+
+def _serialize_comment(comment, liked=False):
+    # Replies are fetched separately from the replies endpoint when reply_count > 0.
     return {
         "id": comment.id,
         "video_id": comment.video_id,
@@ -457,26 +1222,9 @@ def _serialize_comment(comment, current_user):
         "text": comment.text,
         "likes": comment.likes,
         "liked": liked,
+        "reply_count": comment.reply_count,
         "author": comment.user.username,
         "created_at": comment.created_at.isoformat(),
-        "replies": [
-            {
-                "id": reply.id,
-                "video_id": reply.video_id,
-                "parent_id": reply.parent_id,
-                "text": reply.text,
-                "likes": reply.likes,
-                "liked": bool(
-                    current_user
-                    and CommentLike.objects.filter(
-                        user=current_user, comment=reply
-                    ).exists()
-                ),
-                "author": reply.user.username,
-                "created_at": reply.created_at.isoformat(),
-            }
-            for reply in replies
-        ],
     }
 
 
@@ -503,18 +1251,22 @@ def _record_watch_history(user, video):
 def _record_video_view(request, user, video):
     video.views += 1
     video.save(update_fields=["views"])
+    publish_counters(video.id, views=1)
+    ChannelStats.bump(video.user_id, total_views=1)
+
+    VideoDailyStats.count_view(video.id)
 
     viewer_key = _get_viewer_key(request, user)
     if not viewer_key:
         return
 
     try:
-        _, created = VideoView.objects.get_or_create(video=video, viewer_key=viewer_key)
-        if created:
-            video.unique_views += 1
-            video.save(update_fields=["unique_views"])
+        unique_views = UniqueViewerSketch.record(video, viewer_key)
     except DatabaseError:
         return
+    if unique_views is not None and unique_views != video.unique_views:
+        video.unique_views = unique_views
+        video.save(update_fields=["unique_views"])
 
 
 def _get_viewer_key(request, user):
@@ -534,6 +1286,7 @@ def _apply_video_vote(video, user, vote_type):
         return {"success": False, "error": "Invalid vote"}, 400
 
     value = VideoLike.LIKE if vote_type == "like" else VideoLike.DISLIKE
+    likes_before, dislikes_before = video.likes, video.dislikes
     existing_vote = VideoLike.objects.filter(user=user, video=video).first()
 
     if existing_vote:
@@ -565,6 +1318,13 @@ def _apply_video_vote(video, user, vote_type):
         user_vote = value
 
     video.save(update_fields=["likes", "dislikes"])
+    if video.likes != likes_before:
+        ChannelStats.bump(video.user_id, total_likes=video.likes - likes_before)
+    publish_counters(
+        video.id,
+        likes=video.likes - likes_before,
+        dislikes=video.dislikes - dislikes_before,
+    )
     return {
         "success": True,
         "likes": video.likes,
@@ -31,11 +31,12 @@ function App() {
   const [theme, setTheme] = useState(() => (localStorage.getItem("theme") === "dark" ? "dark" : "light"));
   const [searchInput, setSearchInput] = useState("");
   const [searchQuery, setSearchQuery] = useState("");
+  const [suggestions, setSuggestions] = useState([]);
 
   const refreshMe = async () => {
     try {
-      const data = await api.me();
-      setMe(data.authenticated ? data.user : null);
+      const data = await api.bootstrap();
+      setMe(data.authenticated ? { ...data.user, ...data.profile } : null);
     } catch {
       setMe(null);
     } finally {
@@ -52,6 +53,27 @@ function App() {
     applyTheme(theme);
   }, [theme]);
 
+  useEffect(() => {
+    const query = searchInput.trim();
+    if (!query) {
+      setSuggestions([]);
+      return undefined;
+    }
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const data = await api.searchSuggestions(query);
+        if (!cancelled) setSuggestions(data.results || []);
+      } catch {
+        if (!cancelled) setSuggestions([]);
+      }
+    }, 120);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [searchInput]);
+
   const logout = async () => {
     await api.logout();
     setMe(null);
@@ -83,9 +105,15 @@ function App() {
           </div>
 
           <form onSubmit={onSearch} className="mx-2 hidden max-w-xl flex-1 items-center md:flex">
+            <datalist id="search-suggestions">
+              {suggestions.map((item) => (
+                <option key={`${item.type}-${item.video_id || item.text}`} value={item.text} />
+              ))}
+            </datalist>
             <input
               value={searchInput}
               onChange={(e) => setSearchInput(e.target.value)}
+              list="search-suggestions"
               className="h-10 w-full rounded-l-full border border-neutral-300 bg-white px-4 text-sm outline-none focus:border-blue-500 dark:border-neutral-700 dark:bg-neutral-900 dark:text-neutral-100"
               placeholder="Search"
             />
@@ -148,6 +176,7 @@ function App() {
             <input
               value={searchInput}
               onChange={(e) => setSearchInput(e.target.value)}
+              list="search-suggestions"
               className="h-9 w-full rounded-l-full border border-neutral-300 bg-white px-4 text-sm outline-none focus:border-blue-500 dark:border-neutral-700 dark:bg-neutral-900 dark:text-neutral-100"
               placeholder="Search"
             />
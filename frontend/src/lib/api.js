@@ -57,9 +57,12 @@ async function request(path, options = {}) {
   return payload;
 }
 
+// Filled by bootstrap so writes can skip the extra CSRF round trip.
+let csrfToken = "";
+
 async function requestWithCsrf(path, options = {}) {
-  await ensureCsrf();
-  const csrftoken = getCookie("csrftoken");
+  if (!csrfToken) await ensureCsrf();
+  const csrftoken = csrfToken || getCookie("csrftoken");
   const token = getAccessToken();
   return request(path, {
     ...options,
@@ -73,11 +76,20 @@ async function requestWithCsrf(path, options = {}) {
 
 export const api = {
   listVideos: () => request("/api/videos/"),
-  listChannelVideos: (username) => request(`/api/videos/channel/${encodeURIComponent(username)}/`),
+  searchVideos: (query) => request(`/api/videos/?search=${encodeURIComponent(query)}`),
+  homeFeed: () => request("/api/videos/home/"),
+  searchSuggestions: (query) => request(`/api/videos/suggestions/?q=${encodeURIComponent(query)}`),
+  listChannelVideos: (username, cursor = "") =>
+    request(
+      `/api/videos/channel/${encodeURIComponent(username)}/${cursor ? `?cursor=${encodeURIComponent(cursor)}` : ""}`
+    ),
+  listTopChannels: (order = "subscribers") => request(`/api/videos/channels/top/?order=${order}`),
   listHistory: () => request("/api/videos/history/"),
   listLikedVideos: () => request("/api/videos/liked/"),
   listWatchLater: () => request("/api/videos/watch-later/"),
   getVideo: (videoId) => request(`/api/videos/${videoId}/`),
+  listRelatedVideos: (videoId) => request(`/api/videos/${videoId}/related/`),
+  liveCounters: (videoId) => new EventSource(apiUrl(`/api/videos/${videoId}/live/`), { withCredentials: true }),
   voteVideo: (videoId, vote) =>
     requestWithCsrf(`/api/videos/${videoId}/vote/`, {
       method: "POST",
@@ -88,10 +100,17 @@ export const api = {
     requestWithCsrf(`/api/videos/${videoId}/delete/`, {
       method: "POST"
     }),
-  toggleWatchLater: (videoId) =>
+  setWatchLater: (videoId, saved) =>
     requestWithCsrf(`/api/videos/${videoId}/watch-later/`, {
-      method: "POST"
+      method: saved ? "PUT" : "DELETE"
+    }),
+  sendProgress: (videoId, position, duration) =>
+    requestWithCsrf(`/api/videos/${videoId}/progress/`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ position, duration: duration || null })
     }),
+  listContinueWatching: () => request("/api/videos/continue-watching/"),
   uploadVideo: (formData) =>
     requestWithCsrf("/api/videos/upload/", {
       method: "POST",
@@ -104,6 +123,8 @@ export const api = {
       body: JSON.stringify({ username, password })
     });
     setAccessToken(data?.access_token || "");
+    // Django rotates the CSRF token on login.
+    csrfToken = "";
     return data;
   },
   register: async (username, email, password, confirmPassword) => {
@@ -118,6 +139,8 @@ export const api = {
       })
     });
     setAccessToken(data?.access_token || "");
+    // Django rotates the CSRF token on login.
+    csrfToken = "";
     return data;
   },
   logout: async () => {
@@ -130,6 +153,14 @@ export const api = {
     }
     return { success: true };
   },
+  bootstrap: async () => {
+    const data = await request("/api/auth/bootstrap/");
+    csrfToken = data?.csrf_token || "";
+    if (!data?.authenticated) {
+      setAccessToken("");
+    }
+    return data;
+  },
   me: async () => {
     try {
       const data = await request("/api/auth/me/");
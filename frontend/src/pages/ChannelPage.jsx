@@ -5,15 +5,38 @@ import { api } from "../lib/api";
 export function ChannelPage() {
   const { username } = useParams();
   const [videos, setVideos] = useState([]);
+  const [channel, setChannel] = useState(null);
+  const [nextCursor, setNextCursor] = useState("");
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState("");
 
+  const cursorFrom = (link) => (link ? new URL(link).searchParams.get("cursor") || "" : "");
+
   useEffect(() => {
+    setVideos([]);
     api
       .listChannelVideos(username)
-      .then((data) => setVideos(data.results || []))
+      .then((data) => {
+        setChannel(data);
+        setVideos(data.results || []);
+        setNextCursor(cursorFrom(data.next));
+      })
       .catch((err) => setError(err.message));
   }, [username]);
 
+  const loadMore = async () => {
+    try {
+      setLoadingMore(true);
+      const data = await api.listChannelVideos(username, nextCursor);
+      setVideos((prev) => [...prev, ...(data.results || [])]);
+      setNextCursor(cursorFrom(data.next));
+    } catch (err) {
+      setError(err.message);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   if (error) return <p className="text-sm font-medium text-red-700 dark:text-red-400">{error}</p>;
 
   return (
@@ -24,7 +47,9 @@ export function ChannelPage() {
         </div>
         <div>
           <h1 className="text-xl font-semibold text-neutral-900 dark:text-neutral-100">{username}</h1>
-          <p className="text-sm text-neutral-600 dark:text-neutral-400">{videos.length} videos</p>
+          <p className="text-sm text-neutral-600 dark:text-neutral-400">
+            {channel ? `${channel.subscriber_count} subscribers • ${channel.video_count} videos` : ""}
+          </p>
         </div>
       </div>
 
@@ -38,10 +63,13 @@ export function ChannelPage() {
                 <img
                   className="aspect-video w-full object-cover transition duration-200 group-hover:scale-[1.02]"
                   src={video.thumbnail_url}
+                  srcSet={video.thumbnail_srcset || undefined}
+                  sizes="(min-width: 1280px) 25vw, (min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw"
                   alt={video.title}
                   onError={(e) => {
                     e.currentTarget.onerror = null;
-                    e.currentTarget.src = `${video.video_url}/ik-thumbnail.jpg?tr=so-0,w-480,h-270`;
+                    e.currentTarget.removeAttribute("srcset");
+                    e.currentTarget.src = `${video.video_url}/ik-thumbnail.jpg?tr=so-0,w-480,h-270,f-auto`;
                   }}
                 />
               </div>
@@ -55,6 +83,18 @@ export function ChannelPage() {
           ))}
         </div>
       )}
+
+      {nextCursor && (
+        <div className="mt-8 flex justify-center">
+          <button
+            className="rounded-full bg-neutral-100 px-4 py-2 text-sm hover:bg-neutral-200 disabled:opacity-60 dark:bg-neutral-800 dark:hover:bg-neutral-700"
+            onClick={loadMore}
+            disabled={loadingMore}
+          >
+            {loadingMore ? "Loading..." : "Load more"}
+          </button>
+        </div>
+      )}
     </section>
   );
 }
@@ -4,6 +4,7 @@ import { api } from "../lib/api";
 
 export function HistoryPage() {
   const [videos, setVideos] = useState([]);
+  const [resumable, setResumable] = useState([]);
   const [error, setError] = useState("");
 
   useEffect(() => {
@@ -11,12 +12,50 @@ export function HistoryPage() {
       .listHistory()
       .then((data) => setVideos(data.results || []))
       .catch((err) => setError(err.message));
+    api
+      .listContinueWatching()
+      .then((data) => setResumable(data.results || []))
+      .catch(() => setResumable([]));
   }, []);
 
   if (error) return <p className="text-sm font-medium text-red-700 dark:text-red-400">{error}</p>;
 
   return (
     <section>
+      {resumable.length > 0 && (
+        <div className="mb-8">
+          <h2 className="mb-4 text-xl font-semibold">Continue watching</h2>
+          <div className="grid grid-cols-1 gap-x-4 gap-y-8 sm:grid-cols-2 lg:grid-cols-3 xl:grid-cols-4">
+            {resumable.map((video) => (
+              <Link className="group" to={`/videos/${video.id}`} key={video.id}>
+                <div className="relative overflow-hidden rounded-xl">
+                  <img
+                    className="aspect-video w-full object-cover transition duration-200 group-hover:scale-[1.02]"
+                    src={video.thumbnail_url}
+                    srcSet={video.thumbnail_srcset || undefined}
+                    sizes="(min-width: 1280px) 25vw, (min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw"
+                    alt={video.title}
+                  />
+                  {video.duration ? (
+                    <div className="absolute inset-x-0 bottom-0 h-1 bg-neutral-500/60">
+                      <div
+                        className="h-full bg-red-600"
+                        style={{ width: `${Math.min(100, (video.resume_position / video.duration) * 100)}%` }}
+                      />
+                    </div>
+                  ) : null}
+                </div>
+                <div className="mt-3 min-w-0">
+                  <h3 className="max-h-10 overflow-hidden text-sm font-semibold leading-5 text-neutral-900 dark:text-neutral-100">
+                    {video.title}
+                  </h3>
+                  <p className="mt-1 text-xs text-neutral-600 dark:text-neutral-400">{video.channel}</p>
+                </div>
+              </Link>
+            ))}
+          </div>
+        </div>
+      )}
       <h1 className="mb-4 text-xl font-semibold">Watch history</h1>
       <div className="grid grid-cols-1 gap-x-4 gap-y-8 sm:grid-cols-2 lg:grid-cols-3 xl:grid-cols-4">
         {videos.map((video) => (
@@ -25,10 +64,13 @@ export function HistoryPage() {
               <img
                 className="aspect-video w-full object-cover transition duration-200 group-hover:scale-[1.02]"
                 src={video.thumbnail_url}
+                srcSet={video.thumbnail_srcset || undefined}
+                sizes="(min-width: 1280px) 25vw, (min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw"
                 alt={video.title}
                 onError={(e) => {
                   e.currentTarget.onerror = null;
-                  e.currentTarget.src = `${video.video_url}/ik-thumbnail.jpg?tr=so-0,w-480,h-270`;
+                  e.currentTarget.removeAttribute("srcset");
+                  e.currentTarget.src = `${video.video_url}/ik-thumbnail.jpg?tr=so-0,w-480,h-270,f-auto`;
                 }}
               />
             </div>
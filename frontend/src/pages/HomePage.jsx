@@ -23,23 +23,28 @@ export function HomePage({ searchQuery = "", initialCategory = "All" }) {
     setActiveCategory(initialCategory);
   }, [initialCategory]);
 
+  const query = (searchQuery || "").trim();
+
   useEffect(() => {
-    api
-      .listVideos()
-      .then((data) => setVideos(data.results || []))
-      .catch((err) => setError(err.message));
-  }, []);
+    // The feed is only one page of picks; searches go to the server so every match is found.
+    let cancelled = false;
+    setError("");
+    (query ? api.searchVideos(query) : api.homeFeed())
+      .then((data) => {
+        if (!cancelled) setVideos(data.results || []);
+      })
+      .catch((err) => {
+        if (!cancelled) setError(err.message);
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [query]);
 
-  const filteredVideos = useMemo(() => {
-    const q = (searchQuery || "").trim().toLowerCase();
-    return videos.filter((video) => {
-      const inCategory = matchCategory(video, activeCategory);
-      if (!inCategory) return false;
-      if (!q) return true;
-      const text = `${video.title || ""} ${video.channel || ""} ${video.description || ""}`.toLowerCase();
-      return text.includes(q);
-    });
-  }, [videos, activeCategory, searchQuery]);
+  const filteredVideos = useMemo(
+    () => videos.filter((video) => matchCategory(video, activeCategory)),
+    [videos, activeCategory]
+  );
 
   if (error) return <p className="text-sm font-medium text-red-700 dark:text-red-400">{error}</p>;
 
@@ -76,10 +81,13 @@ export function HomePage({ searchQuery = "", initialCategory = "All" }) {
               <img
                 className="aspect-video w-full object-cover transition duration-200 group-hover:scale-[1.02]"
                 src={video.thumbnail_url}
+                srcSet={video.thumbnail_srcset || undefined}
+                sizes="(min-width: 1280px) 25vw, (min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw"
                 alt={video.title}
                 onError={(e) => {
                   e.currentTarget.onerror = null;
-                  e.currentTarget.src = `${video.video_url}/ik-thumbnail.jpg?tr=so-0,w-480,h-270`;
+                  e.currentTarget.removeAttribute("srcset");
+                  e.currentTarget.src = `${video.video_url}/ik-thumbnail.jpg?tr=so-0,w-480,h-270,f-auto`;
                 }}
               />
             </div>
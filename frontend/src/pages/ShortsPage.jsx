@@ -24,11 +24,14 @@ export function ShortsPage() {
             <div className="aspect-[9/16] overflow-hidden rounded-xl bg-black">
               <img
                 src={video.thumbnail_url}
+                srcSet={video.thumbnail_srcset || undefined}
+                sizes="(min-width: 1024px) 20vw, (min-width: 640px) 33vw, 50vw"
                 alt={video.title}
                 className="h-full w-full object-cover transition group-hover:scale-105"
                 onError={(e) => {
                   e.currentTarget.onerror = null;
-                  e.currentTarget.src = `${video.video_url}/ik-thumbnail.jpg?tr=so-0,w-480,h-270`;
+                  e.currentTarget.removeAttribute("srcset");
+                  e.currentTarget.src = `${video.video_url}/ik-thumbnail.jpg?tr=so-0,w-480,h-270,f-auto`;
                 }}
               />
             </div>
@@ -1,13 +1,16 @@
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import { Link, useNavigate, useParams } from "react-router-dom";
 import { api } from "../lib/api";
 
+const PROGRESS_INTERVAL_MS = 5000;
+
 export function VideoPage({ me }) {
   const { videoId } = useParams();
   const navigate = useNavigate();
   const [video, setVideo] = useState(null);
   const [error, setError] = useState("");
   const [working, setWorking] = useState(false);
+  const [related, setRelated] = useState([]);
 
   useEffect(() => {
     api
@@ -16,9 +19,42 @@ export function VideoPage({ me }) {
       .catch((err) => setError(err.message));
   }, [videoId]);
 
+  useEffect(() => {
+    setRelated([]);
+    api
+      .listRelatedVideos(videoId)
+      .then((data) => setRelated(data.results || []))
+      .catch(() => setRelated([]));
+  }, [videoId]);
+
+  // Our own votes come back in the next live delta; skip them there.
+  const ownDelta = useRef({});
+
+  useEffect(() => {
+    const source = api.liveCounters(videoId);
+    source.addEventListener("counters", (event) => {
+      const delta = JSON.parse(event.data);
+      const own = ownDelta.current;
+      ownDelta.current = {};
+      setVideo((prev) => {
+        if (!prev) return prev;
+        const next = { ...prev };
+        for (const [key, value] of Object.entries(delta)) {
+          next[key] = (next[key] || 0) + value - (own[key] || 0);
+        }
+        return next;
+      });
+    });
+    return () => source.close();
+  }, [videoId]);
+
   const vote = async (type) => {
     try {
       const data = await api.voteVideo(videoId, type);
+      ownDelta.current = {
+        likes: (ownDelta.current.likes || 0) + data.likes - video.likes,
+        dislikes: (ownDelta.current.dislikes || 0) + data.dislikes - video.dislikes
+      };
       setVideo((prev) =>
         prev
           ? { ...prev, likes: data.likes, dislikes: data.dislikes, user_vote: data.user_vote }
@@ -29,9 +65,30 @@ export function VideoPage({ me }) {
     }
   };
 
+  // Heartbeats while playing let "continue watching" resume at the right spot.
+  const player = useRef(null);
+
+  useEffect(() => {
+    if (!me || !video) return undefined;
+    const send = () => {
+      const element = player.current;
+      if (element && !element.paused) {
+        api.sendProgress(videoId, element.currentTime, element.duration).catch(() => {});
+      }
+    };
+    const timer = window.setInterval(send, PROGRESS_INTERVAL_MS);
+    return () => window.clearInterval(timer);
+  }, [me, video?.id, videoId]);
+
+  const resume = () => {
+    if (player.current && video?.resume_position) {
+      player.current.currentTime = video.resume_position;
+    }
+  };
+
   const toggleWatchLater = async () => {
     try {
-      const data = await api.toggleWatchLater(videoId);
+      const data = await api.setWatchLater(videoId, !video?.is_watch_later);
       setVideo((prev) => (prev ? { ...prev, is_watch_later: data.is_watch_later } : prev));
     } catch (err) {
       setError(err.message);
@@ -57,6 +114,8 @@ export function VideoPage({ me }) {
   return (
     <section className="mx-auto max-w-5xl">
       <video
+        ref={player}
+        onLoadedMetadata={resume}
         className="aspect-video w-full rounded-xl bg-black"
         src={video.optimized_url}
         controls
@@ -132,6 +191,35 @@ export function VideoPage({ me }) {
         </p>
         <p>{video.description || "No description."}</p>
       </div>
+
+      {related.length > 0 && (
+        <div className="mt-6">
+          <h2 className="mb-3 text-base font-semibold text-neutral-900 dark:text-neutral-100">Up next</h2>
+          <div className="grid grid-cols-1 gap-x-4 gap-y-6 sm:grid-cols-2 lg:grid-cols-3">
+            {related.map((item) => (
+              <Link className="group" to={`/videos/${item.id}`} key={item.id}>
+                <div className="overflow-hidden rounded-xl">
+                  <img
+                    className="aspect-video w-full object-cover transition duration-200 group-hover:scale-[1.02]"
+                    src={item.thumbnail_url}
+                    srcSet={item.thumbnail_srcset || undefined}
+                    sizes="(min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw"
+                    alt={item.title}
+                  />
+                </div>
+                <div className="mt-2 min-w-0">
+                  <h3 className="max-h-10 overflow-hidden text-sm font-semibold leading-5 text-neutral-900 dark:text-neutral-100">
+                    {item.title}
+                  </h3>
+                  <p className="mt-1 text-xs text-neutral-600 dark:text-neutral-400">
+                    {item.channel} • {item.views} views
+                  </p>
+                </div>
+              </Link>
+            ))}
+          </div>
+        </div>
+      )}
     </section>
   );
 }
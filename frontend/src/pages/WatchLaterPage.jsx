@@ -25,10 +25,13 @@ export function WatchLaterPage() {
               <img
                 className="aspect-video w-full object-cover transition duration-200 group-hover:scale-[1.02]"
                 src={video.thumbnail_url}
+                srcSet={video.thumbnail_srcset || undefined}
+                sizes="(min-width: 1280px) 25vw, (min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw"
                 alt={video.title}
                 onError={(e) => {
                   e.currentTarget.onerror = null;
-                  e.currentTarget.src = `${video.video_url}/ik-thumbnail.jpg?tr=so-0,w-480,h-270`;
+                  e.currentTarget.removeAttribute("srcset");
+                  e.currentTarget.src = `${video.video_url}/ik-thumbnail.jpg?tr=so-0,w-480,h-270,f-auto`;
                 }}
               />
             </div>